@@ -0,0 +1,105 @@
+"""Anjani admission controller"""
+# Copyright (C) 2020 - 2023  UserbotIndo Team, <https://github.com/userbotindo.git>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import asyncio
+import logging
+from typing import Callable, Optional
+
+from .metrics import AdmissionMode
+
+
+class AdmissionController:
+    """Switch to shedding mode while updates pile up or the loop lags behind.
+
+    In shedding mode the dispatcher skips listeners marked as sheddable, so the
+    backlog is spent on moderation listeners and commands. The mode only goes
+    back to normal once both signals drop under half of their threshold, to
+    avoid flapping.
+    """
+
+    log: logging.Logger
+    depth: Callable[[], int]
+    lag: Callable[[], float]
+    depth_high: int
+    lag_high: float
+    interval: float
+    shedding: bool
+
+    _task: Optional["asyncio.Task[None]"]
+
+    def __init__(
+        self,
+        depth: Callable[[], int],
+        lag: Callable[[], float],
+        *,
+        depth_high: int,
+        lag_high: float,
+        interval: float = 0.5,
+    ) -> None:
+        self.log = logging.getLogger("admission")
+        self.depth = depth
+        self.lag = lag
+        self.depth_high = depth_high
+        self.lag_high = lag_high
+        self.interval = interval
+        self.shedding = False
+
+        self._task = None
+        AdmissionMode.state("normal")
+
+    def start(self) -> None:
+        if self.depth_high <= 0 and self.lag_high <= 0:
+            return
+
+        self._task = asyncio.get_event_loop().create_task(self._watch())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+        self._task = None
+
+    def _under_pressure(self, ratio: float) -> bool:
+        depth, lag = self.depth(), self.lag()
+        return (self.depth_high > 0 and depth >= self.depth_high * ratio) or (
+            self.lag_high > 0 and lag >= self.lag_high * ratio
+        )
+
+    def update(self) -> None:
+        if not self.shedding and self._under_pressure(1):
+            self.shedding = True
+            AdmissionMode.state("shedding")
+            self.log.warning(
+                "Under pressure (backlog %d, loop lag %.3fs), shedding low priority listeners",
+                self.depth(),
+                self.lag(),
+            )
+        elif self.shedding and not self._under_pressure(0.5):
+            self.shedding = False
+            AdmissionMode.state("normal")
+            self.log.info("Pressure relieved, running every listener again")
+
+    async def _watch(self) -> None:
+        while True:
+            self.update()
+            await asyncio.sleep(self.interval)
@@ -16,16 +16,19 @@
 
 import asyncio
 import logging
+from os import cpu_count
 from typing import Optional
 
 import aiohttp
 import pyrogram
 
+from anjani import util
 from anjani.util.config import Config
 
 from .command_dispatcher import CommandDispatcher
 from .database_provider import DatabaseProvider
 from .event_dispatcher import EventDispatcher
+from .loop_monitor import InstrumentedExecutor, LoopMonitor
 from .plugin_extenter import PluginExtender
 from .telegram_bot import TelegramBot
 
@@ -37,6 +40,7 @@ class Anjani(TelegramBot, DatabaseProvider, PluginExtender, CommandDispatcher, E
     client: pyrogram.client.Client
     config: Config
     loop: asyncio.AbstractEventLoop
+    loop_monitor: LoopMonitor
     stopping: bool
 
     def __init__(self, config: Config):
@@ -45,6 +49,13 @@ class Anjani(TelegramBot, DatabaseProvider, PluginExtender, CommandDispatcher, E
         self.loop = asyncio.get_event_loop()
         self.stopping = False
 
+        # Instrument util.run_sync calls and watch for callbacks blocking the loop
+        self.loop.set_default_executor(InstrumentedExecutor("default"))
+        util.async_helper.set_executor("cpu", InstrumentedExecutor("cpu", cpu_count() or 1))
+        util.async_helper.set_executor("io", InstrumentedExecutor("io"))
+        self.loop_monitor = LoopMonitor(self.loop, block_threshold=config.LOOP_BLOCK_THRESHOLD)
+        self.loop_monitor.start()
+
         # Initialize mixins
         super().__init__()
 
@@ -72,13 +83,33 @@ class Anjani(TelegramBot, DatabaseProvider, PluginExtender, CommandDispatcher, E
 
         self.log.info("Stopping")
         if self.loaded:
-            await self.dispatch_event("stop")
+            if self.catch_up_task is not None:
+                self.catch_up_task.cancel()
+                await asyncio.gather(self.catch_up_task, return_exceptions=True)
+                self.catch_up_task = None
+            if self.client.is_connected:
+                # Stop taking updates, the pyrogram workers hand their last ones to the shards
+                await self.client.dispatcher.stop()
+            # Plugins are still running and the client connected while the shards drain
+            await self.update_shards.stop(self.config.DISPATCH_DRAIN_TIMEOUT)
+            await self.admission.stop()
+            await self.dispatch_lifecycle("stop")
             if self.client.is_connected:
                 await self.client.stop()
 
+        if self.update_recorder is not None:
+            await self.update_recorder.stop()
+
         await self.http.close()
+        await self.chat_settings.stop()
+        await self.change_streams.stop()
+        await self.indexes.stop()
+        # Plugins are stopped, write what they left in the buffers
+        await util.db.bulk_writer.flush_all()
         await self.db.close()
+        await self.loop_monitor.stop()
+        util.async_helper.shutdown_executors(wait=False)
 
         self.log.info("Running post-stop hooks")
         if self.loaded:
-            await self.dispatch_event("stopped")
+            await self.dispatch_lifecycle("stopped")
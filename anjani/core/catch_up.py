@@ -0,0 +1,138 @@
+"""Anjani missed updates catch up"""
+# Copyright (C) 2020 - 2023  UserbotIndo Team, <https://github.com/userbotindo.git>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import asyncio
+from time import monotonic, time
+from typing import Any, Callable, Optional, Tuple
+
+from pyrogram import raw
+
+from .metrics import CatchUpEtaSecond, CatchUpProgress, CatchUpUpdateCount
+
+QueueItem = Tuple[Any, Any, Any]
+
+
+class CatchUpFeeder:
+    """Stream missed updates into the client updates queue without flooding it.
+
+    Updates are fed at most `rate` per second and only while less than
+    `high_watermark` updates are pending, so live updates keep interleaving with
+    the backlog. `depth` counts the pending updates, the queue size by default;
+    it must include the updates already handed to the dispatcher shards. Either limit is disabled when not positive. Service messages older
+    than `service_max_age` seconds are dropped.
+    """
+
+    queue: "asyncio.Queue[QueueItem]"
+    depth: Callable[[], int]
+    rate: float
+    high_watermark: int
+    service_max_age: float
+
+    start_pts: int
+    target_pts: Optional[int]
+
+    _next_at: float
+    _started_at: float
+
+    def __init__(
+        self,
+        queue: "asyncio.Queue[QueueItem]",
+        *,
+        rate: float,
+        high_watermark: int,
+        service_max_age: float,
+        start_pts: int,
+        target_pts: Optional[int] = None,
+        depth: Optional[Callable[[], int]] = None,
+    ) -> None:
+        self.queue = queue
+        self.depth = depth or queue.qsize
+        self.rate = rate
+        self.high_watermark = high_watermark
+        self.service_max_age = service_max_age
+        self.start_pts = start_pts
+        self.target_pts = target_pts
+
+        self._next_at = self._started_at = monotonic()
+        CatchUpProgress.set(0)
+        CatchUpEtaSecond.set(0)
+
+    def is_stale(self, message: Any) -> bool:
+        if isinstance(message, raw.types.MessageEmpty):
+            return True
+
+        # Greeting a member that joined hours ago is only noise
+        return (
+            isinstance(message, raw.types.MessageService)
+            and self.service_max_age > 0
+            and time() - message.date > self.service_max_age
+        )
+
+    async def put(self, item: QueueItem) -> None:
+        while 0 < self.high_watermark <= self.depth():
+            await asyncio.sleep(0.1)
+
+        if self.rate > 0:
+            now = monotonic()
+            if self._next_at > now:
+                await asyncio.sleep(self._next_at - now)
+                now = monotonic()
+
+            self._next_at = max(self._next_at, now) + 1 / self.rate
+
+        await self.queue.put(item)
+        CatchUpUpdateCount.labels("dispatched").inc()
+
+    async def feed_messages(self, messages: Any, users: Any, chats: Any) -> None:
+        for message in messages:
+            if self.is_stale(message):
+                CatchUpUpdateCount.labels("dropped").inc()
+                continue
+
+            await self.put(
+                (
+                    raw.types.update_new_message.UpdateNewMessage(
+                        message=message, pts=0, pts_count=0
+                    ),
+                    users,
+                    chats,
+                )
+            )
+
+    async def feed_updates(self, updates: Any, users: Any, chats: Any) -> None:
+        for update in updates:
+            message = getattr(update, "message", None)
+            if message is not None and self.is_stale(message):
+                CatchUpUpdateCount.labels("dropped").inc()
+                continue
+
+            await self.put((update, users, chats))
+
+    def progress(self, pts: int) -> None:
+        """Report the progress once the updates up to pts are queued"""
+        if not self.target_pts or self.target_pts <= self.start_pts:
+            return
+
+        done = min(1.0, max(0.0, (pts - self.start_pts) / (self.target_pts - self.start_pts)))
+        CatchUpProgress.set(done)
+        if done > 0:
+            elapsed = monotonic() - self._started_at
+            CatchUpEtaSecond.set(elapsed / done - elapsed)
+
+    def finish(self) -> None:
+        CatchUpProgress.set(1)
+        CatchUpEtaSecond.set(0)
@@ -0,0 +1,393 @@
+"""Anjani change streams"""
+# Copyright (C) 2020 - 2023  UserbotIndo Team, <https://github.com/userbotindo.git>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+import inspect
+import logging
+import threading
+from typing import (
+    Any,
+    Callable,
+    FrozenSet,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+from anjani import util
+from anjani.util.db.memory import match
+
+from .metrics import ChangeStreamEventCount
+
+# The resume token is too old or can't be resumed from, the stream has to start over
+RESUME_FAILED_CODES = frozenset({260, 280, 286})
+
+ChangeCallback = Callable[[Mapping[str, Any]], Any]
+ResetCallback = Callable[[], Any]
+
+
+class Subscription:
+    """Interest of a subscriber in the changes of a collection"""
+
+    collection: str
+    callback: ChangeCallback
+    operations: Optional[FrozenSet[str]]
+    filter: Optional[Mapping[str, Any]]
+    full_document: bool
+    reset: Optional[ResetCallback]
+
+    def __init__(
+        self,
+        collection: str,
+        callback: ChangeCallback,
+        *,
+        operations: Optional[Iterable[str]] = None,
+        filter: Optional[Mapping[str, Any]] = None,  # skipcq: PYL-W0622
+        full_document: bool = False,
+        reset: Optional[ResetCallback] = None,
+    ) -> None:
+        self.collection = collection
+        self.callback = callback
+        self.operations = frozenset(operations) if operations is not None else None
+        self.filter = filter
+        self.full_document = full_document
+        self.reset = reset
+
+    def build_match(self) -> Mapping[str, Any]:
+        query: Mapping[str, Any] = {"ns.coll": self.collection}
+        if self.operations is not None:
+            query = {**query, "operationType": {"$in": sorted(self.operations)}}
+        if self.filter is not None:
+            query = {"$and": [query, self.filter]}
+
+        return query
+
+    def matches(self, change: Mapping[str, Any]) -> bool:
+        if change.get("ns", {}).get("coll") != self.collection:
+            return False
+        if self.operations is not None and change["operationType"] not in self.operations:
+            return False
+
+        return self.filter is None or match(change, self.filter)
+
+
+class ChangeStreamService:
+    """A single change stream of the database shared by every subscriber.
+
+    Subscribers register the collections and operation types they want, and the
+    server only sends the union of them. The stream is read by a blocking loop on
+    its own thread that hands every change to the event loop, so an idle stream
+    costs nothing but a pending getMore. The resume token is saved periodically,
+    a restart picks up where the previous run stopped.
+    """
+
+    db: util.db.AsyncDatabase
+    log: logging.Logger
+    name: str
+    max_await_time_ms: int
+    save_interval: float
+
+    _loop: Optional[asyncio.AbstractEventLoop]
+    _subscriptions: List[Subscription]
+    _spec: Tuple[int, List[Mapping[str, Any]], Optional[str]]
+    _token: Optional[Mapping[str, Any]]
+    _saved_token: Optional[Mapping[str, Any]]
+    _stopping: threading.Event
+    _thread: Optional[threading.Thread]
+    _task: Optional["asyncio.Task[None]"]
+    _save_task: Optional["asyncio.Task[None]"]
+    _tasks: Set["asyncio.Task[Any]"]
+
+    def __init__(
+        self,
+        db: util.db.AsyncDatabase,
+        *,
+        name: str = "database",
+        max_await_time_ms: int = 1000,
+        save_interval: float = 10,
+    ) -> None:
+        self.db = db
+        self.log = logging.getLogger("change_streams")
+        self.name = name
+        self.max_await_time_ms = max_await_time_ms
+        self.save_interval = save_interval
+
+        self._loop = None
+        self._subscriptions = []
+        self._spec = (0, [], None)
+        self._token = None
+        self._saved_token = None
+        self._stopping = threading.Event()
+        self._thread = None
+        self._task = None
+        self._save_task = None
+        self._tasks = set()
+
+    @property
+    def running(self) -> bool:
+        return self._loop is not None
+
+    def subscribe(
+        self,
+        collection: str,
+        callback: ChangeCallback,
+        *,
+        operations: Optional[Iterable[str]] = None,
+        filter: Optional[Mapping[str, Any]] = None,  # skipcq: PYL-W0622
+        full_document: bool = False,
+        reset: Optional[ResetCallback] = None,
+    ) -> Subscription:
+        """Call `callback` with every change of a collection.
+
+        Parameters:
+            collection (`str`):
+                Name of the collection to watch.
+            callback (`Callable`):
+                Function or coroutine function receiving the change document.
+            operations (`Iterable[str]`, *Optional*):
+                Operation types to receive, eg: "insert" or "update". Defaults to all.
+            filter (`Mapping[str, Any]`, *Optional*):
+                Additional query the change document must match.
+            full_document (`bool`, *Optional*):
+                Look up the current document of updates into "fullDocument".
+            reset (`Callable`, *Optional*):
+                Called when changes may have been missed and the subscriber should
+                drop anything derived from them.
+        """
+        subscription = Subscription(
+            collection,
+            callback,
+            operations=operations,
+            filter=filter,
+            full_document=full_document,
+            reset=reset,
+        )
+        self._subscriptions.append(subscription)
+        self._rebuild()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        try:
+            self._subscriptions.remove(subscription)
+        except ValueError:
+            return
+
+        self._rebuild()
+
+    def _rebuild(self) -> None:
+        version = self._spec[0] + 1
+        if not self._subscriptions:
+            self._spec = (version, [], None)
+        else:
+            matches: List[Mapping[str, Any]] = [sub.build_match() for sub in self._subscriptions]
+            # Everything is gone, every subscriber has to know
+            matches.append({"operationType": "dropDatabase"})
+            full_document = (
+                "updateLookup" if any(sub.full_document for sub in self._subscriptions) else None
+            )
+            self._spec = (version, [{"$match": {"$or": matches}}], full_document)
+
+        # The thread reopens the stream by itself when it sees a new version
+        if self._task is not None:
+            self._task.cancel()
+            self._task = self._loop.create_task(self._consume())  # type: ignore
+
+    async def start(self) -> None:
+        """Start watching, resuming after the last saved change"""
+        if self.running:
+            return
+
+        self._loop = asyncio.get_event_loop()
+        self._stopping.clear()
+
+        doc = await self.db.get_collection("CHANGE_STREAM").find_one({"_id": self.name})
+        self._token = self._saved_token = doc["token"] if doc else None
+
+        if isinstance(self.db, util.db.AsyncDatabase):
+            self._thread = threading.Thread(target=self._run, name="change_streams", daemon=True)
+            self._thread.start()
+        else:
+            # Databases without a blocking driver (the in-memory one) are read on the loop
+            self._task = self._loop.create_task(self._consume())
+
+        self._save_task = self._loop.create_task(self._save_periodically())
+
+    async def stop(self) -> None:
+        if not self.running:
+            return
+
+        self._stopping.set()
+        for task in (self._task, self._save_task):
+            if task is None:
+                continue
+
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+        if self._thread is not None:
+            # A pending getMore returns within max_await_time_ms
+            await util.run_sync_in("io", self._thread.join)
+
+        self._task = self._save_task = self._thread = None
+        await self._save()
+        self._loop = None
+
+    async def _save(self) -> None:
+        token = self._token
+        if token is None or token == self._saved_token:
+            return
+
+        await self.db.get_collection("CHANGE_STREAM").update_one(
+            {"_id": self.name}, {"$set": {"token": token}}, upsert=True
+        )
+        self._saved_token = token
+
+    async def _save_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.save_interval)
+            try:
+                await self._save()
+            except PyMongoError as e:
+                self.log.warning("Failed to save the change stream resume token", exc_info=e)
+
+    def _run(self) -> None:
+        token = self._token
+        while not self._stopping.is_set():
+            version, pipeline, full_document = self._spec
+            if not pipeline:
+                self._stopping.wait(1)
+                continue
+
+            try:
+                with self.db.dispatch.watch(
+                    pipeline,
+                    full_document=full_document,
+                    resume_after=token,
+                    max_await_time_ms=self.max_await_time_ms,
+                ) as stream:
+                    while stream.alive and not self._stopping.is_set() and version == self._spec[0]:
+                        # Blocks on the server for at most max_await_time_ms
+                        change = stream.try_next()
+                        if stream.resume_token != token:
+                            token = stream.resume_token
+                            self._call(self._dispatch, change, token)
+
+                    if not stream.alive:
+                        # Invalidated, the database was dropped or renamed
+                        token = None
+            except OperationFailure as e:
+                if token is not None and e.code in RESUME_FAILED_CODES:
+                    self.log.warning("Can't resume the change stream, starting over", exc_info=e)
+                else:
+                    self.log.error("Change stream error, retrying", exc_info=e)
+                    self._stopping.wait(5)
+
+                # Some changes may be lost
+                token = None
+                self._call(self._reset)
+            except PyMongoError as e:
+                self.log.error("Change stream error, retrying", exc_info=e)
+                if token is None:
+                    self._call(self._reset)
+                self._stopping.wait(5)
+
+    def _call(self, func: Callable[..., Any], *args: Any) -> None:
+        loop = self._loop
+        if loop is None:
+            return
+
+        try:
+            loop.call_soon_threadsafe(func, *args)
+        except RuntimeError:
+            # Loop closed while we were waiting on the server
+            pass
+
+    async def _consume(self) -> None:
+        version, pipeline, full_document = self._spec
+        if not pipeline:
+            return
+
+        while True:
+            token = self._token
+            try:
+                async with self.db.watch(
+                    pipeline, full_document=full_document, resume_after=token
+                ) as stream:
+                    async for change in stream:
+                        self._dispatch(change, stream.resume_token)
+
+                # Invalidated, the database was dropped or renamed
+                self._token = None
+            except OperationFailure as e:
+                if token is not None and e.code in RESUME_FAILED_CODES:
+                    self.log.warning("Can't resume the change stream, starting over", exc_info=e)
+                else:
+                    self.log.error("Change stream error, retrying", exc_info=e)
+                    await asyncio.sleep(5)
+
+                # Some changes may be lost
+                self._token = None
+                self._reset()
+            except PyMongoError as e:
+                self.log.error("Change stream error, retrying", exc_info=e)
+                if token is None:
+                    self._reset()
+                await asyncio.sleep(5)
+
+    def _dispatch(self, change: Optional[Mapping[str, Any]], token: Any) -> None:
+        self._token = token
+        if change is None:
+            return
+
+        operation = change["operationType"]
+        collection = change.get("ns", {}).get("coll", "")
+        ChangeStreamEventCount.labels(collection, operation).inc()
+        if operation in {"dropDatabase", "invalidate"}:
+            self._reset()
+            return
+
+        for subscription in list(self._subscriptions):
+            if subscription.matches(change):
+                self._run_callback(subscription.callback, change)
+
+    def _reset(self) -> None:
+        for subscription in list(self._subscriptions):
+            if subscription.reset is not None:
+                self._run_callback(subscription.reset)
+
+    def _run_callback(self, callback: Callable[..., Any], *args: Any) -> None:
+        try:
+            if inspect.iscoroutinefunction(callback):
+                task = self._loop.create_task(callback(*args))  # type: ignore
+                self._tasks.add(task)
+                task.add_done_callback(self._on_callback_done)
+            else:
+                callback(*args)
+        except Exception as e:  # skipcq: PYL-W0703
+            self.log.error("Unhandled error in change stream subscriber", exc_info=e)
+
+    def _on_callback_done(self, task: "asyncio.Task[Any]") -> None:
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            self.log.error("Unhandled error in change stream subscriber", exc_info=task.exception())
@@ -0,0 +1,263 @@
+"""Anjani chat settings cache"""
+# Copyright (C) 2020 - 2023  UserbotIndo Team, <https://github.com/userbotindo.git>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+import logging
+from collections import OrderedDict
+from time import monotonic
+from typing import Any, Iterable, List, Mapping, MutableMapping, Optional, Set, Tuple
+
+from anjani import util
+
+from .change_streams import ChangeStreamService, Subscription
+from .metrics import ChatSettingsCacheCount
+
+Snapshot = MutableMapping[str, Optional[Mapping[str, Any]]]
+
+
+class ChatSettingsCache:
+    """LRU cache holding a per-chat snapshot of every registered plugin setting.
+
+    A snapshot is filled lazily on the first read of a chat, with all registered
+    collections fetched concurrently. Entries are kept coherent by a single change
+    stream watching the registered collections.
+    """
+
+    db: util.db.AsyncDatabase
+    log: logging.Logger
+    maxsize: int
+    ttl: float
+
+    _entries: "OrderedDict[int, Tuple[float, Snapshot]]"
+    _index: MutableMapping[Tuple[str, Any], int]
+    _pending: MutableMapping[int, "asyncio.Task[Snapshot]"]
+    _registry: MutableMapping[str, Tuple[str, Optional[Tuple[str, ...]]]]
+    _stale: Set[int]
+    _started: bool
+    _subscriptions: List[Subscription]
+
+    def __init__(
+        self,
+        db: util.db.AsyncDatabase,
+        streams: ChangeStreamService,
+        *,
+        maxsize: int = 10000,
+        ttl: float = 600,
+    ) -> None:
+        self.db = db
+        self.streams = streams
+        self.log = logging.getLogger("chat_settings")
+        self.maxsize = maxsize
+        self.ttl = ttl
+
+        self._entries = OrderedDict()
+        self._index = {}
+        self._pending = {}
+        self._registry = {}
+        self._stale = set()
+        self._started = False
+        self._subscriptions = []
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def register(
+        self, collection: str, *, key: str = "chat_id", fields: Optional[Iterable[str]] = None
+    ) -> None:
+        """Register a settings collection to be part of every chat snapshot.
+
+        Parameters:
+            collection (`str`):
+                Name of the collection holding the setting documents.
+            key (`str`, *Optional*):
+                Field of the document that holds the chat id. Defaults to "chat_id".
+            fields (`Iterable[str]`, *Optional*):
+                Top level fields to keep in the snapshot. Updates that don't touch
+                these fields won't invalidate the cache. Defaults to the whole document.
+        """
+        fields = tuple(fields) if fields is not None else None
+        if collection in self._registry:
+            _, old_fields = self._registry[collection]
+            if old_fields is None or fields is None:
+                fields = None
+            else:
+                fields = tuple(sorted(set(old_fields) | set(fields)))
+
+        self._registry[collection] = (key, fields)
+        # Old snapshots are missing the newly registered collection
+        self.clear()
+
+        if self._started:
+            self.start()
+
+    def start(self) -> None:
+        """Start (or restart) watching the registered collections"""
+        self._unsubscribe()
+        self._started = True
+        for collection, (key, fields) in self._registry.items():
+            self._subscriptions.append(
+                self.streams.subscribe(
+                    collection,
+                    self._on_change,
+                    filter=self._build_filter(key, fields),
+                    full_document=True,
+                    # We may have missed some changes
+                    reset=self.clear,
+                )
+            )
+
+    async def stop(self) -> None:
+        self._started = False
+        self._unsubscribe()
+
+    def _unsubscribe(self) -> None:
+        while self._subscriptions:
+            self.streams.unsubscribe(self._subscriptions.pop())
+
+    def peek(self, chat_id: int) -> Optional[Snapshot]:
+        """Return the cached snapshot of a chat without touching the database.
+
+        Snapshots are warmed before the listeners of a message run, so handlers
+        read their settings synchronously and only `load` on a miss.
+        """
+        try:
+            timestamp, snapshot = self._entries[chat_id]
+        except KeyError:
+            return None
+
+        if monotonic() - timestamp > self.ttl:
+            self.invalidate(chat_id)
+            return None
+
+        self._entries.move_to_end(chat_id)
+        ChatSettingsCacheCount.labels("hit").inc()
+        return snapshot
+
+    async def load(self, chat_id: int) -> Snapshot:
+        """Return the snapshot of a chat, fetching it on cache miss"""
+        snapshot = self.peek(chat_id)
+        if snapshot is not None:
+            return snapshot
+
+        ChatSettingsCacheCount.labels("miss").inc()
+        # Coalesce concurrent misses of the same chat into one fetch
+        try:
+            task = self._pending[chat_id]
+        except KeyError:
+            task = asyncio.get_event_loop().create_task(self._fetch(chat_id))
+            self._pending[chat_id] = task
+
+        return await asyncio.shield(task)
+
+    async def get(self, chat_id: int, collection: str) -> Optional[Mapping[str, Any]]:
+        """Return the setting document of a registered collection for the chat"""
+        snapshot = await self.load(chat_id)
+        return snapshot.get(collection)
+
+    def invalidate(self, chat_id: int) -> None:
+        """Drop the snapshot of a chat, the next read will fetch it again"""
+        if chat_id in self._pending:
+            self._stale.add(chat_id)
+
+        try:
+            _, snapshot = self._entries.pop(chat_id)
+        except KeyError:
+            return
+
+        self._unindex(snapshot)
+
+    def clear(self) -> None:
+        self._stale.update(self._pending)
+        self._entries.clear()
+        self._index.clear()
+
+    async def _fetch(self, chat_id: int) -> Snapshot:
+        try:
+            names: List[str] = list(self._registry)
+            docs = await asyncio.gather(*(self._fetch_one(name, chat_id) for name in names))
+            snapshot: Snapshot = dict(zip(names, docs))
+
+            if chat_id in self._stale:
+                # Invalidated while we were fetching, don't keep a possibly outdated copy
+                self._stale.discard(chat_id)
+            else:
+                self._store(chat_id, snapshot)
+
+            return snapshot
+        finally:
+            del self._pending[chat_id]
+
+    async def _fetch_one(self, collection: str, chat_id: int) -> Optional[Mapping[str, Any]]:
+        key, fields = self._registry[collection]
+        projection = {field: True for field in fields} if fields is not None else None
+        return await self.db.get_collection(collection).find_one({key: chat_id}, projection)
+
+    def _store(self, chat_id: int, snapshot: Snapshot) -> None:
+        old = self._entries.pop(chat_id, None)
+        if old is not None:
+            self._unindex(old[1])
+
+        self._entries[chat_id] = (monotonic(), snapshot)
+        for collection, doc in snapshot.items():
+            if doc is not None:
+                self._index[(collection, doc["_id"])] = chat_id
+
+        while len(self._entries) > self.maxsize:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._unindex(evicted)
+
+    def _unindex(self, snapshot: Snapshot) -> None:
+        for collection, doc in snapshot.items():
+            if doc is not None:
+                self._index.pop((collection, doc["_id"]), None)
+
+    @staticmethod
+    def _build_filter(key: str, fields: Optional[Tuple[str, ...]]) -> Optional[Mapping[str, Any]]:
+        if fields is None:
+            return None
+
+        watched = (key, *fields)
+        return {
+            "$or": [
+                {"operationType": {"$ne": "update"}},
+                *(
+                    {f"updateDescription.updatedFields.{field}": {"$exists": True}}
+                    for field in watched
+                ),
+                {"updateDescription.removedFields": {"$in": list(watched)}},
+            ]
+        }
+
+    def _on_change(self, change: Mapping[str, Any]) -> None:
+        if change["operationType"] in {"drop", "rename"}:
+            self.clear()
+            return
+
+        collection = change["ns"]["coll"]
+        try:
+            key, _ = self._registry[collection]
+        except KeyError:
+            return
+
+        doc_id = change.get("documentKey", {}).get("_id")
+        chat_id = self._index.get((collection, doc_id))
+        if chat_id is not None:
+            self.invalidate(chat_id)
+
+        # The document may now belong to another chat (eg: chat migration)
+        doc = change.get("fullDocument")
+        if doc and key in doc:
+            self.invalidate(doc[key])
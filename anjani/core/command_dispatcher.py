@@ -18,7 +18,7 @@
 import inspect
 from typing import TYPE_CHECKING, Any, Iterable, MutableMapping, Optional, Union
 
-from pyrogram import ContinuePropagation, errors
+from pyrogram import errors
 from pyrogram.client import Client
 from pyrogram.enums.chat_action import ChatAction
 from pyrogram.enums.chat_type import ChatType
@@ -27,6 +27,7 @@ from pyrogram.types import Message
 
 from anjani import command, plugin, util
 from anjani.error import CommandHandlerError, CommandInvokeError, ExistingCommandError
+from anjani.filters import is_privileged
 
 from .anjani_mixin_base import MixinBase
 from .metrics import (
@@ -35,6 +36,7 @@ from .metrics import (
     EventLatencySecond,
     UnhandledError,
 )
+from .query_monitor import current_plugin
 
 if TYPE_CHECKING:
     from .anjani_bot import Anjani
@@ -70,6 +72,10 @@ class CommandDispatcher(MixinBase):
             util.misc.check_filters(filters, self)
 
         cmd = command.Command(name, plug, func, filters, aliases)
+        # Resolve the arguments conversion once instead of on every invocation
+        cmd.plan = util.converter.InvocationPlan.compile(func)
+        # Only admins, staff or the owner get through the filters
+        cmd.privileged = is_privileged(filters)
 
         if name in self.commands:
             orig = self.commands[name]
@@ -139,53 +145,61 @@ class CommandDispatcher(MixinBase):
                 return False  # ignore channel broadcasts
 
             if message.text is not None and message.text.startswith("/"):
+                parts = message.text.split()
+                parts[0] = parts[0][1:]
+
+                # Check if bot command contains a valid username
+                # eg: /ping@dAnjani_bot will return True
+                # If current bot instance is dAnjani_bot else False
+                if self.user.username and self.user.username in parts[0]:
+                    # Remove username from command
+                    parts[0] = parts[0].replace(f"@{self.user.username}", "")
+
+                # Filter if command is not in commands
+                try:
+                    cmd = self.commands[parts[0]]
+                except KeyError:
+                    return False
+
+                # Rate limit the user before the filters, they may call the API
                 user = message.from_user or message.sender_chat
-                if await self._limiter.exceeded(user.id):
+                if not self._limiter.allow_user(user.id):
                     return False
 
-                try:
-                    parts = message.text.split()
-                    parts[0] = parts[0][1:]
-
-                    # Check if bot command contains a valid username
-                    # eg: /ping@dAnjani_bot will return True
-                    # If current bot instance is dAnjani_bot else False
-                    if self.user.username and self.user.username in parts[0]:
-                        # Remove username from command
-                        parts[0] = parts[0].replace(f"@{self.user.username}", "")
-
-                    # Filter if command is not in commands
-                    try:
-                        cmd = self.commands[parts[0]]
-                    except KeyError:
-                        return False
-
-                    # Check additional built-in filters
-                    if cmd.filters:
-                        if inspect.iscoroutinefunction(cmd.filters.__call__):
-                            if not await cmd.filters(client, message):
-                                return False
-                        else:
-                            if not await util.run_sync(cmd.filters, client, message):
-                                return False
-
-                    message.command = parts
-                    return True
-                finally:
-                    # Increment user limit
-                    await self._limiter.increment(user.id)
+                # Check additional built-in filters
+                if cmd.filters:
+                    if inspect.iscoroutinefunction(cmd.filters.__call__):
+                        if not await cmd.filters(client, message):
+                            return False
+                    else:
+                        if not await util.run_sync(cmd.filters, client, message):
+                            return False
+
+                # Only charge the shared buckets once the filters passed, so members
+                # spamming commands can't starve moderation from admins and staff
+                if (
+                    not cmd.privileged
+                    and user.id not in self.staff
+                    and not self._limiter.allow_chat(
+                        user.id, message.chat.id if message.chat else None
+                    )
+                ):
+                    return False
+
+                message.command = parts
+                return True
 
             return False
 
         return create(func, "CustomCommandFilter")
 
-    @EventLatencySecond.labels("command").time()
     async def on_command(
         self: "Anjani", client: Client, message: Message  # skipcq: PYL-W0613
     ) -> None:
         # cmd never raises KeyError because we checked on command_predicate
         cmd = self.commands[message.command[0]]
-        with CommandLatencySecond.labels(cmd.name).time():
+        cmd_latency = CommandLatencySecond.labels(cmd.name)
+        with EventLatencySecond.labels("command").time(), cmd_latency.time():
             try:
                 # Construct invocation context
                 ctx = command.Context(
@@ -195,15 +209,16 @@ class CommandDispatcher(MixinBase):
                 )
 
                 # Parse and convert handler required parameters
-                signature = inspect.signature(cmd.func)
-                args = []  # type: list[Any]
-                kwargs = {}  # type: MutableMapping[str, Any]
-                if len(signature.parameters) > 1:
-                    args, kwargs = await util.converter.parse_arguments(signature, ctx, cmd.func)
+                args, kwargs = await cmd.plan(ctx)
 
                 # Invoke command function
+                plugin_token = current_plugin.set(cmd.plugin.name)
                 try:
-                    ret = await cmd.func(ctx, *args, **kwargs)
+                    if self.profiler is None:
+                        ret = await cmd.func(ctx, *args, **kwargs)
+                    else:
+                        with self.profiler.track("command", cmd.name):
+                            ret = await cmd.func(ctx, *args, **kwargs)
                     CommandCount.labels(cmd.name).inc()
                     # Response shortcut
                     if ret is not None:
@@ -241,6 +256,8 @@ class CommandDispatcher(MixinBase):
                     await self.dispatch_alert(
                         f"command `/{' '.join(message.command)}`", constructor_invoke, chat.id
                     )
+                finally:
+                    current_plugin.reset(plugin_token)
 
                 await self.dispatch_event("command", ctx, cmd)
             except Exception as e:  # skipcq: PYL-W0703
@@ -267,6 +284,3 @@ class CommandDispatcher(MixinBase):
                 await self.dispatch_alert(
                     f"command `/{' '.join(message.command)}`", constructor_handler, chat.id
                 )
-            finally:
-                # Continue processing handler of on_message
-                raise ContinuePropagation
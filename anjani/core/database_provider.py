@@ -15,11 +15,17 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import sys
-from typing import TYPE_CHECKING, Any
+from typing import TYPE_CHECKING, Any, MutableMapping
 
 from anjani import util
+from anjani.util.db.sqlite import SQLiteDatabase
 
 from .anjani_mixin_base import MixinBase
+from .change_streams import ChangeStreamService
+from .chat_settings_cache import ChatSettingsCache
+from .index_manager import IndexManager
+from .loop_monitor import InstrumentedExecutor
+from .query_monitor import QueryMonitor
 
 if TYPE_CHECKING:
     from .anjani_bot import Anjani
@@ -27,18 +33,48 @@ if TYPE_CHECKING:
 
 class DatabaseProvider(MixinBase):
     db: util.db.AsyncDatabase
+    change_streams: ChangeStreamService
+    chat_settings: ChatSettingsCache
+    indexes: IndexManager
+    query_monitor: QueryMonitor
 
     def __init__(self: "Anjani", **kwargs: Any) -> None:
+        self.query_monitor = QueryMonitor(slow_threshold=self.config.DB_SLOW_QUERY_THRESHOLD)
+        self.db = self.init_database()
+        self.change_streams = ChangeStreamService(self.db)
+        self.chat_settings = ChatSettingsCache(self.db, self.change_streams)
+        self.indexes = IndexManager(self.db)
+
+        # Propagate initialization to other mixins
+        super().__init__(**kwargs)
+
+    def init_database(self: "Anjani") -> util.db.AsyncDatabase:
+        if self.config.DB_BACKEND == "sqlite":
+            # DB_URI is the path of the database file
+            return SQLiteDatabase(self.config.DB_URI)  # type: ignore
+
+        kwargs: MutableMapping[str, Any] = {
+            "connect": False,
+            "event_listeners": [self.query_monitor],
+        }
         if sys.platform == "win32":
             import certifi
 
-            client = util.db.AsyncClient(
-                self.config.DB_URI, connect=False, tlsCAFile=certifi.where()
-            )
-        else:
-            client = util.db.AsyncClient(self.config.DB_URI, connect=False)
+            kwargs["tlsCAFile"] = certifi.where()
 
-        self.db = client.get_database("AnjaniBot")
+        util.db.cursor_base.set_default_batch_size(self.config.DB_BATCH_SIZE)
 
-        # Propagate initialization to other mixins
-        super().__init__(**kwargs)
+        if self.config.DB_BACKEND == "native":
+            if util.db.native.available():
+                client = util.db.native.NativeClient(self.config.DB_URI, **kwargs)
+                return client.get_database("AnjaniBot")  # type: ignore
+
+            self.log.warning("pymongo has no asyncio client before 4.10, using the thread pool")
+
+        client = util.db.AsyncClient(self.config.DB_URI, **kwargs)
+        # One thread per pooled connection, so queries never wait on each other for a thread
+        util.async_helper.set_executor(
+            "db",
+            InstrumentedExecutor("db", client.dispatch.options.pool_options.max_pool_size),
+        )
+        return client.get_database("AnjaniBot")
@@ -0,0 +1,122 @@
+"""Anjani event context"""
+# Copyright (C) 2020 - 2023  UserbotIndo Team, <https://github.com/userbotindo.git>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import asyncio
+from contextvars import ContextVar
+from typing import Any, Iterable, List, Mapping, MutableMapping, Optional, Set, Tuple
+
+from anjani import util
+from anjani.listener import Prefetch
+
+from .metrics import EventPrefetchCount
+
+DocKey = Tuple[str, str, Any]
+
+current_context: ContextVar[Optional["EventContext"]] = ContextVar("current_context", default=None)
+
+
+class EventContext:
+    """Documents prefetched for the event being dispatched.
+
+    The documents are a snapshot taken before the first listener runs, a listener
+    that needs to see writes made earlier in the same dispatch should query the
+    collection directly.
+    """
+
+    db: util.db.AsyncDatabase
+
+    _docs: Mapping[DocKey, Optional[Mapping[str, Any]]]
+
+    def __init__(
+        self,
+        db: util.db.AsyncDatabase,
+        docs: Optional[Mapping[DocKey, Optional[Mapping[str, Any]]]] = None,
+    ) -> None:
+        self.db = db
+        self._docs = docs or {}
+
+    @classmethod
+    async def prefetch(
+        cls, db: util.db.AsyncDatabase, prefetches: Iterable[Prefetch], event: Any
+    ) -> "EventContext":
+        """Fetch every prefetch of the event with one `$in` query per collection key"""
+        lookups: MutableMapping[Tuple[str, str], Set[Any]] = {}
+        # Union of the fields read on each collection key, None for the whole document
+        fields: MutableMapping[Tuple[str, str], Optional[Set[str]]] = {}
+        for prefetch in prefetches:
+            value = prefetch.resolve(event)
+            if value is None:
+                continue
+
+            lookup = (prefetch.collection, prefetch.key)
+            lookups.setdefault(lookup, set()).add(value)
+            if not prefetch.fields:
+                fields[lookup] = None
+                continue
+
+            read = fields.setdefault(lookup, set())
+            if read is not None:
+                read.update(prefetch.fields)
+
+        if not lookups:
+            return cls(db)
+
+        async def fetch(collection: str, key: str, values: Set[Any]) -> List[Mapping[str, Any]]:
+            projection = fields[(collection, key)]
+            return (
+                await db.get_collection(collection)
+                .find(
+                    {key: {"$in": list(values)}},
+                    {key: 1, **dict.fromkeys(projection, 1)} if projection else None,
+                )
+                .to_list()
+            )
+
+        results = await asyncio.gather(
+            *(fetch(collection, key, values) for (collection, key), values in lookups.items())
+        )
+
+        docs: MutableMapping[DocKey, Optional[Mapping[str, Any]]] = {}
+        for ((collection, key), values), found in zip(lookups.items(), results):
+            # Known missing documents are cached too, so listeners don't query them again
+            for value in values:
+                docs[(collection, key, value)] = None
+            for doc in found:
+                docs[(collection, key, doc[key])] = doc
+
+        return cls(db, docs)
+
+    async def find_one(
+        self,
+        collection: str,
+        key: str,
+        value: Any,
+        projection: Optional[Mapping[str, Any]] = None,
+    ) -> Optional[Mapping[str, Any]]:
+        """Return a prefetched document, querying the collection if it wasn't prefetched.
+
+        A prefetched document holds the fields of every prefetch of its collection
+        key, it might have more than `projection`.
+        """
+        try:
+            doc = self._docs[(collection, key, value)]
+        except KeyError:
+            EventPrefetchCount.labels("miss").inc()
+            return await self.db.get_collection(collection).find_one({key: value}, projection)
+
+        EventPrefetchCount.labels("hit").inc()
+        return doc
@@ -19,8 +19,10 @@ import asyncio
 import bisect
 from datetime import datetime
 from hashlib import sha256
+from time import perf_counter
 from typing import TYPE_CHECKING, Any, MutableMapping, MutableSequence, Optional, Tuple
 
+from pymongo.errors import PyMongoError
 from pyrogram import raw
 from pyrogram.filters import Filter
 from pyrogram.raw import functions
@@ -28,11 +30,24 @@ from pyrogram.types import CallbackQuery, InlineQuery, Message
 
 from anjani import plugin, util
 from anjani.error import EventDispatchError
-from anjani.listener import Listener, ListenerFunc
+from anjani.listener import Listener, ListenerFunc, Prefetch
 from anjani.util.misc import StopPropagation
 
 from .anjani_mixin_base import MixinBase
-from .metrics import EventCount, EventLatencySecond, UnhandledError
+from .catch_up import CatchUpFeeder
+from .event_context import EventContext, current_context
+from .filter_cache import FilterCache
+from .lifecycle import LIFECYCLE_EVENTS, check_dependencies
+from .metrics import (
+    EventCount,
+    EventLatencySecond,
+    ListenerLatencySecond,
+    ListenerShedCount,
+    ListenerSkipCount,
+    UnhandledError,
+)
+from .profiler import ProfileSession
+from .query_monitor import current_plugin
 
 if TYPE_CHECKING:
     from .anjani_bot import Anjani
@@ -78,10 +93,15 @@ def _unpack_args(args: Tuple[Any, ...]) -> str:
 class EventDispatcher(MixinBase):
     # Initialized during instantiation
     listeners: MutableMapping[str, MutableSequence[Listener]]
+    prefetches: MutableMapping[str, Tuple[Prefetch, ...]]
+    profiler: Optional[ProfileSession]
 
     def __init__(self: "Anjani", **kwargs: Any) -> None:
         # Initialize listener map
         self.listeners = {}
+        self.prefetches = {}
+        # Only set while a profiling session is running
+        self.profiler = None
 
         # Propagate initialization to other mixins
         super().__init__(**kwargs)
@@ -94,10 +114,16 @@ class EventDispatcher(MixinBase):
         *,
         priority: int = 100,
         filters: Optional[Filter] = None,
+        prefetch: Tuple[Prefetch, ...] = (),
+        passive: bool = False,
+        sheddable: bool = False,
     ) -> None:
-        if event in {"load", "start", "started", "stop", "stopped"} and filters is not None:
+        if event in LIFECYCLE_EVENTS and filters is not None:
             self.log.warning("Built-in Listener can't be use with filters. Removing...")
             filters = None
+        if event in LIFECYCLE_EVENTS and prefetch:
+            self.log.warning("Built-in Listener can't be use with prefetch. Removing...")
+            prefetch = ()
 
         if getattr(func, "_cmd_filters", None):
             self.log.warning(
@@ -107,13 +133,14 @@ class EventDispatcher(MixinBase):
         if filters:
             self.log.debug("Registering filter '%s' into '%s'", type(filters).__name__, event)
 
-        listener = Listener(event, func, plug, priority, filters)
+        listener = Listener(event, func, plug, priority, filters, prefetch, passive, sheddable)
 
         if event in self.listeners:
             bisect.insort(self.listeners[event], listener)
         else:
             self.listeners[event] = [listener]
 
+        self.update_prefetches(event)
         self.update_plugin_events()
 
     def unregister_listener(self: "Anjani", listener: Listener) -> None:
@@ -122,8 +149,49 @@ class EventDispatcher(MixinBase):
         if not self.listeners[listener.event]:
             del self.listeners[listener.event]
 
+        self.update_prefetches(listener.event)
         self.update_plugin_events()
 
+    def update_prefetches(self: "Anjani", event: str) -> None:
+        # Deduplicate the prefetches of every listener of the event
+        prefetches = dict.fromkeys(
+            prefetch for lst in self.listeners.get(event, []) for prefetch in lst.prefetch
+        )
+        if prefetches:
+            self.prefetches[event] = tuple(prefetches)
+        else:
+            self.prefetches.pop(event, None)
+
+    @property
+    def event_context(self: "Anjani") -> EventContext:
+        """Documents prefetched for the event currently being dispatched"""
+        return current_context.get() or EventContext(self.db)
+
+    async def prefetch_event(self: "Anjani", event: str, args: Tuple[Any, ...]) -> EventContext:
+        prefetches = self.prefetches.get(event)
+        if not prefetches:
+            return EventContext(self.db)
+
+        for arg in args:
+            if isinstance(arg, EventType):
+                break
+        else:
+            return EventContext(self.db)
+
+        tasks = [EventContext.prefetch(self.db, prefetches, arg)]
+        if isinstance(arg, Message) and arg.chat:
+            # Warm the chat settings in the same round trip
+            tasks.append(self.chat_settings.load(arg.chat.id))
+
+        try:
+            context, *_ = await asyncio.gather(*tasks)
+        except PyMongoError as e:
+            # Listeners will fall back to query the documents themselves
+            self.log.warning("Failed to prefetch event '%s'", event, exc_info=e)
+            return EventContext(self.db)
+
+        return context
+
     def register_listeners(self: "Anjani", plug: plugin.Plugin) -> None:
         for event, func in util.misc.find_prefixed_funcs(plug, "on_"):
             done = True
@@ -134,6 +202,9 @@ class EventDispatcher(MixinBase):
                     func,
                     priority=getattr(func, "_listener_priority", 100),
                     filters=getattr(func, "_listener_filters", None),
+                    prefetch=getattr(func, "_listener_prefetch", ()),
+                    passive=getattr(func, "_listener_passive", False),
+                    sheddable=getattr(func, "_listener_sheddable", False),
                 )
                 done = True
             finally:
@@ -165,87 +236,198 @@ class EventDispatcher(MixinBase):
         self.log.debug("Dispatching event '%s' with data %s", event, args)
         EventCount.labels(event).inc()
         with EventLatencySecond.labels(event).time():
-            match = None
-            index = None
-            is_tg_event = False
-            for lst in listeners:
-                if lst.filters:
-                    for idx, arg in enumerate(args):
-                        is_tg_event = isinstance(arg, EventType)
-                        if is_tg_event:
-                            if not await lst.filters(self.client, arg):
-                                continue
-
-                            match = arg.matches
-                            index = idx
-                            break
-
-                        self.log.error(f"'{type(arg)}' can't be used with filters.")
-                    else:
+            token = current_context.set(await self.prefetch_event(event, args))
+            try:
+                # Filters are shared between listeners, evaluate them once per update
+                filter_caches: MutableMapping[int, FilterCache] = {}
+                passives = []
+                for lst in listeners:
+                    if lst.passive:
+                        passives.append(lst)
                         continue
 
-                if match and index is not None:
-                    args[index].matches = match
+                    try:
+                        result = await self._run_listener(lst, event, args, kwargs, filter_caches)
+                    except StopPropagation:
+                        break
 
-                result = None
-                try:
-                    result = await lst.func(*args, **kwargs)
-                except KeyError:
-                    continue
-                except StopPropagation:
-                    break
-                except Exception as err:  # skipcq: PYL-W0703
-                    UnhandledError.labels("command").inc()
-                    dispatcher_error = EventDispatchError(
-                        f"raised from {type(err).__name__}: {str(err)}"
-                    ).with_traceback(err.__traceback__)
-                    if is_tg_event and args[0] is not None:
-                        data = _get_event_data(args[0])
-                        self.log.error(
-                            "Error dispatching event '%s' on %s\n"
-                            "  Data:\n"
-                            "    • Chat    -> %s (%d)\n"
-                            "    • Invoker -> %s (%d)\n"
-                            "    • Input   -> %s",
-                            event,
-                            lst.func.__qualname__,
-                            data.get("chat_title", "Unknown"),
-                            data.get("chat_id", -1),
-                            data.get("user_name", "Unknown"),
-                            data.get("user_id", -1),
-                            data.get("input"),
-                            exc_info=dispatcher_error,
-                        )
-                        await self.dispatch_alert(
-                            f"Event __{event}__ on `{lst.func.__qualname__}`",
-                            dispatcher_error,
-                            data.get("chat_id"),
-                        )
-                    else:
-                        self.log.error(
-                            "Error dispatching event '%s' on %s with data\n%s",
-                            event,
-                            lst.func.__qualname__,
-                            _unpack_args(args),
-                            exc_info=dispatcher_error,
-                        )
-                        await self.dispatch_alert(
-                            f"Event __{event}__ on `{lst.func.__qualname__}`",
-                            dispatcher_error,
-                        )
-                    continue
-                finally:
                     if result:
                         results.append(result)
 
-                    match = None
-                    index = None
-                    result = None
+                # Only passive listeners that have a higher priority than the guard
+                # that stopped the propagation are collected
+                if passives:
+                    for result in await asyncio.gather(
+                        *(
+                            self._run_passive_listener(lst, event, args, kwargs, filter_caches)
+                            for lst in passives
+                        )
+                    ):
+                        if result:
+                            results.append(result)
+
+                return tuple(results)
+            finally:
+                current_context.reset(token)
+
+    async def dispatch_lifecycle(
+        self: "Anjani", event: str, *args: Any
+    ) -> MutableMapping[str, float]:
+        """Run the listeners of a built-in event concurrently.
+
+        A listener only starts once the listeners of the plugins declared in
+        its plugin `dependencies` are done. Returns the wall time of every plugin.
+        """
+        # Plugins may unload themselves from their listener, iterate on a copy
+        listeners = {lst.plugin.name: lst for lst in self.listeners.get(event, ())}
+        timings: MutableMapping[str, float] = {}
+        if not listeners:
+            return timings
+
+        check_dependencies({name: lst.plugin.dependencies for name, lst in listeners.items()})
 
-            return tuple(results)
+        self.log.debug("Dispatching lifecycle event '%s'", event)
+        EventCount.labels(event).inc()
+        tasks: MutableMapping[str, "asyncio.Task[None]"] = {}
+
+        async def run(name: str, lst: Listener) -> None:
+            dependencies = [tasks[dep] for dep in lst.plugin.dependencies if dep in tasks]
+            if dependencies:
+                await asyncio.wait(dependencies)
+
+            start = perf_counter()
+            try:
+                await self._run_listener(lst, event, args, {}, {})
+            except StopPropagation:
+                self.log.warning(
+                    "Listener %s can't stop propagation of event '%s'",
+                    lst.func.__qualname__,
+                    event,
+                )
+            finally:
+                timings[name] = perf_counter() - start
+
+        with EventLatencySecond.labels(event).time():
+            for name, lst in listeners.items():
+                tasks[name] = self.loop.create_task(run(name, lst))
+
+            await asyncio.gather(*tasks.values())
+
+        return timings
+
+    async def _run_passive_listener(
+        self: "Anjani",
+        lst: Listener,
+        event: str,
+        args: Tuple[Any, ...],
+        kwargs: MutableMapping[str, Any],
+        filter_caches: MutableMapping[int, FilterCache],
+    ) -> Any:
+        try:
+            return await self._run_listener(lst, event, args, kwargs, filter_caches)
+        except StopPropagation:
+            self.log.warning(
+                "Passive listener %s can't stop propagation of event '%s'",
+                lst.func.__qualname__,
+                event,
+            )
+            return None
+
+    async def _run_listener(
+        self: "Anjani",
+        lst: Listener,
+        event: str,
+        args: Tuple[Any, ...],
+        kwargs: MutableMapping[str, Any],
+        filter_caches: MutableMapping[int, FilterCache],
+    ) -> Any:
+        if lst.sheddable and self.admission.shedding:
+            ListenerShedCount.labels(lst.func.__qualname__).inc()
+            return None
+
+        match = None
+        index = None
+        if lst.filters:
+            for idx, arg in enumerate(args):
+                if isinstance(arg, EventType):
+                    try:
+                        filter_cache = filter_caches[idx]
+                    except KeyError:
+                        filter_cache = filter_caches[idx] = FilterCache(self.client, arg)
+
+                    if not await filter_cache(lst.filters):
+                        continue
+
+                    match = arg.matches
+                    index = idx
+                    break
+
+                self.log.error(f"'{type(arg)}' can't be used with filters.")
+            else:
+                ListenerSkipCount.labels(lst.func.__qualname__).inc()
+                return None
+
+        if match and index is not None:
+            args[index].matches = match
+
+        plugin_token = current_plugin.set(lst.plugin.name)
+        try:
+            with ListenerLatencySecond.labels(lst.func.__qualname__).time():
+                if self.profiler is None:
+                    return await lst.func(*args, **kwargs)
+
+                with self.profiler.track("listener", lst.func.__qualname__):
+                    return await lst.func(*args, **kwargs)
+        except KeyError:
+            return None
+        except StopPropagation:
+            raise
+        except Exception as err:  # skipcq: PYL-W0703
+            UnhandledError.labels("command").inc()
+            dispatcher_error = EventDispatchError(
+                f"raised from {type(err).__name__}: {str(err)}"
+            ).with_traceback(err.__traceback__)
+            if args and isinstance(args[0], EventType):
+                data = _get_event_data(args[0])
+                self.log.error(
+                    "Error dispatching event '%s' on %s\n"
+                    "  Data:\n"
+                    "    • Chat    -> %s (%d)\n"
+                    "    • Invoker -> %s (%d)\n"
+                    "    • Input   -> %s",
+                    event,
+                    lst.func.__qualname__,
+                    data.get("chat_title", "Unknown"),
+                    data.get("chat_id", -1),
+                    data.get("user_name", "Unknown"),
+                    data.get("user_id", -1),
+                    data.get("input"),
+                    exc_info=dispatcher_error,
+                )
+                await self.dispatch_alert(
+                    f"Event __{event}__ on `{lst.func.__qualname__}`",
+                    dispatcher_error,
+                    data.get("chat_id"),
+                )
+            else:
+                self.log.error(
+                    "Error dispatching event '%s' on %s with data\n%s",
+                    event,
+                    lst.func.__qualname__,
+                    _unpack_args(args),
+                    exc_info=dispatcher_error,
+                )
+                await self.dispatch_alert(
+                    f"Event __{event}__ on `{lst.func.__qualname__}`",
+                    dispatcher_error,
+                )
+            return None
+        finally:
+            current_plugin.reset(plugin_token)
 
     async def dispatch_missed_events(self: "Anjani") -> None:
-        if not self.loaded or self._TelegramBot__running:
+        # Runs in the background, the bot is already idling by the time it starts
+        if not self.loaded:
             return
 
         collection = self.db.get_collection("SESSION")
@@ -260,31 +442,23 @@ class EventDispatcher(MixinBase):
         if not pts or not date:
             return
 
-        async def send_missed_message(
-            messages: list[raw.base.message.Message],
-            users: MutableMapping[int, Any],
-            chats: MutableMapping[int, Any],
-        ) -> None:
-            for message in messages:
-                self.log.debug("Sending missed message with data '%s'", message)
-                await self.client.dispatcher.updates_queue.put(
-                    (
-                        raw.types.update_new_message.UpdateNewMessage(
-                            message=message, pts=0, pts_count=0
-                        ),
-                        users,
-                        chats,
-                    )
-                )
-
-        async def send_missed_update(
-            updates: list[raw.base.update.Update],
-            users: MutableMapping[int, Any],
-            chats: MutableMapping[int, Any],
-        ) -> None:
-            for update in updates:
-                self.log.debug("Sending missed update with data '%s'", update)
-                await self.client.dispatcher.updates_queue.put((update, users, chats))
+        try:
+            state = await self.client.invoke(functions.updates.get_state.GetState())
+            target_pts = state.pts
+        except Exception as e:  # skipcq: PYL-W0703
+            self.log.warning("Unable to get the current update state", exc_info=e)
+            target_pts = None
+
+        feeder = CatchUpFeeder(
+            self.client.dispatcher.updates_queue,
+            rate=self.config.CATCHUP_RATE,
+            high_watermark=self.config.CATCHUP_HIGH_WATERMARK,
+            service_max_age=self.config.CATCHUP_SERVICE_MAX_AGE * 60,
+            start_pts=pts,
+            target_pts=target_pts,
+            # Updates spilled on the shards are pending too
+            depth=self.admission.depth,
+        )
 
         try:
             while True:
@@ -310,18 +484,13 @@ class EventDispatcher(MixinBase):
                     users = {u.id: u for u in diff.users}  # type: ignore
                     chats = {c.id: c for c in diff.chats}  # type: ignore
 
-                    await asyncio.wait(
-                        (
-                            self.loop.create_task(
-                                send_missed_message(diff.new_messages, users, chats)
-                            ),
-                            self.loop.create_task(
-                                send_missed_update(diff.other_updates, users, chats)
-                            ),
-                        )
-                    )
+                    # Stream the slice, the feeder waits for the queue to drain
+                    await feeder.feed_messages(diff.new_messages, users, chats)
+                    await feeder.feed_updates(diff.other_updates, users, chats)
+                    feeder.progress(pts)
                 elif isinstance(diff, raw.types.updates.difference_empty.DifferenceEmpty):
                     self.log.info("Missed event exhausted, you are up to date.")
+                    feeder.finish()
                     date = diff.date
                     break
                 elif isinstance(diff, raw.types.updates.difference_too_long.DifferenceTooLong):
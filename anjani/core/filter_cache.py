@@ -0,0 +1,113 @@
+"""Anjani per update filter cache"""
+# Copyright (C) 2020 - 2023  UserbotIndo Team, <https://github.com/userbotindo.git>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import inspect
+from typing import Any, MutableMapping, Sequence, Tuple
+
+from pyrogram.client import Client
+from pyrogram.filters import AndFilter, Filter, InvertFilter, OrFilter
+
+from .metrics import FilterEvaluationSaved
+
+# Evaluation cost rank, lower is cheaper
+_CACHED = 0
+_SYNC = 1
+_BUILTIN = 2
+_CUSTOM = 3
+
+
+class FilterCache:
+    """Memoize filter results of a single update, keyed by filter identity.
+
+    Composed filters are walked here instead of through pyrogram so every node is
+    memoized, cheaper operands are evaluated first and synchronous filters run
+    inline instead of being offloaded to the client executor.
+    """
+
+    client: Client
+    update: Any
+
+    _results: MutableMapping[int, Tuple[bool, bool, Any]]
+
+    def __init__(self, client: Client, update: Any) -> None:
+        self.client = client
+        self.update = update
+
+        self._results = {}
+
+    async def __call__(self, flt: Filter) -> bool:
+        key = id(flt)
+        try:
+            result, touched, matches = self._results[key]
+        except KeyError:
+            pass
+        else:
+            FilterEvaluationSaved.inc()
+            # Replay the side effect of regex filters
+            if touched:
+                self.update.matches = matches
+
+            return result
+
+        before = getattr(self.update, "matches", None)
+        if isinstance(flt, AndFilter):
+            result = await self._all((flt.base, flt.other))
+        elif isinstance(flt, OrFilter):
+            result = await self._any((flt.base, flt.other))
+        elif isinstance(flt, InvertFilter):
+            result = not await self(flt.base)
+        elif inspect.iscoroutinefunction(flt.__call__):
+            result = bool(await flt(self.client, self.update))
+        else:
+            result = bool(flt(self.client, self.update))
+
+        after = getattr(self.update, "matches", None)
+        self._results[key] = (result, after is not before, after)
+        return result
+
+    def _cost(self, flt: Filter) -> int:
+        if id(flt) in self._results:
+            return _CACHED
+
+        if isinstance(flt, (AndFilter, OrFilter)):
+            return max(self._cost(flt.base), self._cost(flt.other))
+
+        if isinstance(flt, InvertFilter):
+            return self._cost(flt.base)
+
+        if not inspect.iscoroutinefunction(flt.__call__):
+            return _SYNC
+
+        # Pyrogram filters only inspect the update, custom ones may call the API
+        if type(flt).__module__ == "pyrogram.filters":
+            return _BUILTIN
+
+        return _CUSTOM
+
+    async def _all(self, filters: Sequence[Filter]) -> bool:
+        for flt in sorted(filters, key=self._cost):
+            if not await self(flt):
+                return False
+
+        return True
+
+    async def _any(self, filters: Sequence[Filter]) -> bool:
+        for flt in sorted(filters, key=self._cost):
+            if await self(flt):
+                return True
+
+        return False
@@ -0,0 +1,176 @@
+"""Anjani plugin indexes"""
+# Copyright (C) 2020 - 2023  UserbotIndo Team, <https://github.com/userbotindo.git>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Iterable, List, Mapping, MutableMapping, Optional, Tuple
+
+from pymongo import IndexModel
+from pymongo.errors import PyMongoError
+
+from anjani import plugin, util
+
+
+def to_index_model(spec: plugin.IndexSpec) -> IndexModel:
+    if isinstance(spec, IndexModel):
+        return spec
+
+    return IndexModel(spec if isinstance(spec, str) else list(spec))
+
+
+def _age(since: datetime) -> timedelta:
+    # The driver decodes naive UTC datetimes unless the client is tz aware
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+
+    return datetime.now(timezone.utc) - since
+
+
+class IndexReport:
+    """Declared indexes missing on the server, and indexes the server never used"""
+
+    missing: List[Tuple[str, str]]
+    unused: List[Tuple[str, str, Any]]
+
+    def __init__(self) -> None:
+        self.missing = []
+        self.unused = []
+
+
+class IndexManager:
+    """Ensures the indexes declared by the plugins exist.
+
+    Indexes are created in the background after the plugins are loaded, so a
+    long build never delays the startup. Creating an index that already exists
+    with the same options is a no-op on the server.
+
+    Missing indexes are reported once created, unused ones only after
+    `unused_after`, so their access counters have seen some traffic.
+    """
+
+    unused_after: timedelta = timedelta(days=1)
+
+    db: util.db.AsyncDatabase
+    log: logging.Logger
+
+    _task: Optional["asyncio.Task[None]"]
+
+    def __init__(self, db: util.db.AsyncDatabase) -> None:
+        self.db = db
+        self.log = logging.getLogger("indexes")
+
+        self._task = None
+
+    def collect(self, plugins: Iterable[plugin.Plugin]) -> Mapping[str, List[IndexModel]]:
+        """Merge the indexes declared by the plugins, keyed by collection"""
+        specs: MutableMapping[str, MutableMapping[str, Tuple[str, IndexModel]]] = {}
+        for plug in plugins:
+            for collection, indexes in type(plug).indexes.items():
+                declared = specs.setdefault(collection, {})
+                for spec in indexes:
+                    model = to_index_model(spec)
+                    name = model.document["name"]
+                    if name not in declared:
+                        declared[name] = (plug.name, model)
+                    elif declared[name][1].document != model.document:
+                        self.log.warning(
+                            "Plugin '%s' declares index '%s' of '%s' unlike '%s', ignoring",
+                            plug.name,
+                            name,
+                            collection,
+                            declared[name][0],
+                        )
+
+        return {
+            collection: [model for _, model in declared.values()]
+            for collection, declared in specs.items()
+        }
+
+    def start(self, plugins: Iterable[plugin.Plugin]) -> None:
+        specs = self.collect(plugins)
+        if specs:
+            self._task = asyncio.get_event_loop().create_task(self._ensure(specs))
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+        self._task = None
+
+    async def _ensure(self, specs: Mapping[str, List[IndexModel]]) -> None:
+        async def create(collection: str, models: List[IndexModel]) -> None:
+            try:
+                await self.db.get_collection(collection).create_indexes(models)
+            except PyMongoError as e:
+                self.log.error("Failed to create the indexes of '%s'", collection, exc_info=e)
+
+        await asyncio.gather(*(create(collection, models) for collection, models in specs.items()))
+
+        report = await self.report(specs)
+        for collection, name in report.missing:
+            self.log.warning("Index '%s' of '%s' is missing", name, collection)
+
+        await asyncio.sleep(self.unused_after.total_seconds())
+        report = await self.report(specs, unused_after=self.unused_after)
+        for collection, name, since in report.unused:
+            self.log.info("Index '%s' of '%s' is unused since %s", name, collection, since)
+
+    async def report(
+        self,
+        specs: Mapping[str, List[IndexModel]],
+        *,
+        unused_after: Optional[timedelta] = None,
+    ) -> IndexReport:
+        """Compare the declared indexes with the usage statistics of the server.
+
+        Access counters are reset when the server restarts or the index is built,
+        indexes counted for less than `unused_after` are not reported as unused.
+        Unused indexes are not reported at all without it.
+        """
+        report = IndexReport()
+        for collection, models in specs.items():
+            cursor = self.db.get_collection(collection).aggregate([{"$indexStats": {}}])
+            try:
+                stats = await cursor.to_list()
+            except PyMongoError as e:
+                self.log.debug("Can't read the index stats of '%s'", collection, exc_info=e)
+                continue
+
+            existing = {stat["name"] for stat in stats}
+            report.missing.extend(
+                (collection, model.document["name"])
+                for model in models
+                if model.document["name"] not in existing
+            )
+            if unused_after is None:
+                continue
+
+            report.unused.extend(
+                (collection, stat["name"], stat["accesses"]["since"])
+                for stat in stats
+                if stat["name"] != "_id_"
+                and not stat["accesses"]["ops"]
+                and _age(stat["accesses"]["since"]) >= unused_after
+            )
+
+        return report
@@ -0,0 +1,82 @@
+"""Anjani plugin lifecycle"""
+# Copyright (C) 2020 - 2023  UserbotIndo Team, <https://github.com/userbotindo.git>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Iterable, Iterator, List, Mapping, MutableMapping, Tuple
+
+from anjani.error import CircularDependencyError
+
+LIFECYCLE_EVENTS = frozenset({"load", "start", "started", "stop", "stopped"})
+
+
+def check_dependencies(dependencies: Mapping[str, Iterable[str]]) -> None:
+    """Raise :obj:`~CircularDependencyError` if the dependency graph has a cycle.
+
+    Dependencies on plugins that are not in the graph are ignored.
+    """
+    done = set()
+
+    def visit(name: str, path: Tuple[str, ...]) -> None:
+        if name in path:
+            raise CircularDependencyError((*path[path.index(name) :], name))
+        if name in done:
+            return
+
+        for dependency in dependencies[name]:
+            if dependency in dependencies:
+                visit(dependency, (*path, name))
+
+        done.add(name)
+
+    for name in dependencies:
+        visit(name, ())
+
+
+class StartupReport:
+    """Wall time of every startup phase and of every plugin lifecycle listener"""
+
+    phases: List[Tuple[str, float]]
+    plugins: MutableMapping[str, Mapping[str, float]]
+
+    def __init__(self) -> None:
+        self.phases = []
+        self.plugins = {}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, perf_counter() - start))
+
+    def format(self, slowest: int = 5) -> str:
+        total = sum(elapsed for _, elapsed in self.phases)
+        lines = [f"Startup took {total:.2f}s"]
+        for name, elapsed in self.phases:
+            lines.append(f"  {name:<20} {elapsed * 1000:>9.1f}ms")
+
+            timings = self.plugins.get(name)
+            if not timings:
+                continue
+
+            for plugin, plugin_elapsed in sorted(
+                timings.items(), key=lambda item: item[1], reverse=True
+            )[:slowest]:
+                lines.append(f"    {plugin:<18} {plugin_elapsed * 1000:>9.1f}ms")
+
+        return "\n".join(lines)
@@ -0,0 +1,163 @@
+"""Anjani event loop monitor"""
+# Copyright (C) 2020 - 2023  UserbotIndo Team, <https://github.com/userbotindo.git>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import asyncio
+import logging
+import sys
+import threading
+import traceback
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from time import monotonic, perf_counter
+from typing import Any, Callable, Optional
+
+from anjani import util
+
+from .metrics import (
+    EventLoopLagSecond,
+    ExecutorActiveThreads,
+    ExecutorQueueDepth,
+    ExecutorThreads,
+    RunSyncRunSecond,
+    RunSyncWaitSecond,
+)
+
+
+def _caller_name(func: Callable[..., Any]) -> str:
+    while isinstance(func, (partial, util.async_helper.ContextCall)):
+        func = func.func
+
+    return getattr(func, "__qualname__", None) or type(func).__qualname__
+
+
+class InstrumentedExecutor(ThreadPoolExecutor):
+    """Thread pool exporting its saturation and the time each call waits and runs"""
+
+    name: str
+
+    def __init__(self, name: str, max_workers: Optional[int] = None) -> None:
+        super().__init__(max_workers=max_workers, thread_name_prefix=f"anjani-{name}")
+        self.name = name
+
+        ExecutorQueueDepth.labels(name).set_function(self._work_queue.qsize)
+        ExecutorThreads.labels(name).set_function(lambda: len(self._threads))
+
+    def submit(self, fn: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Future:
+        caller = _caller_name(fn)
+        queued_at = perf_counter()
+
+        def run() -> Any:
+            started_at = perf_counter()
+            RunSyncWaitSecond.labels(self.name, caller).observe(started_at - queued_at)
+            ExecutorActiveThreads.labels(self.name).inc()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                ExecutorActiveThreads.labels(self.name).dec()
+                RunSyncRunSecond.labels(self.name, caller).observe(perf_counter() - started_at)
+
+        return super().submit(run)
+
+
+class LoopMonitor:
+    """Measure the event loop lag and report callbacks blocking the loop.
+
+    A ticker task measures how late the loop wakes it up. A watchdog thread logs
+    the stack of the loop thread whenever the ticker hasn't run for longer than
+    the block threshold.
+    """
+
+    log: logging.Logger
+    loop: asyncio.AbstractEventLoop
+    interval: float
+    block_threshold: float
+    lag: float
+
+    _beat: float
+    _loop_thread_id: Optional[int]
+    _task: Optional["asyncio.Task[None]"]
+    _watchdog: Optional[threading.Thread]
+    _stopped: threading.Event
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        *,
+        interval: float = 0.25,
+        block_threshold: float = 1.0,
+    ) -> None:
+        self.log = logging.getLogger("loop_monitor")
+        self.loop = loop
+        self.interval = interval
+        self.block_threshold = block_threshold
+        self.lag = 0
+
+        self._beat = monotonic()
+        self._loop_thread_id = None
+        self._task = None
+        self._watchdog = None
+        self._stopped = threading.Event()
+
+    def start(self) -> None:
+        self._loop_thread_id = threading.get_ident()
+        self._beat = monotonic()
+        self._stopped.clear()
+        self._task = self.loop.create_task(self._tick())
+
+        if self.block_threshold > 0:
+            self._watchdog = threading.Thread(
+                target=self._watch, name="anjani-loop-watchdog", daemon=True
+            )
+            self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+            self._task = None
+
+        self._watchdog = None
+
+    async def _tick(self) -> None:
+        while True:
+            expected = monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = monotonic()
+            self._beat = now
+            self.lag = max(0.0, now - expected)
+            EventLoopLagSecond.observe(self.lag)
+
+    def _watch(self) -> None:
+        reported = None
+        while not self._stopped.wait(self.block_threshold / 2):
+            beat = self._beat
+            blocked = monotonic() - beat - self.interval
+            # Report each stall once
+            if blocked < self.block_threshold or beat == reported:
+                continue
+
+            reported = beat
+            frame = sys._current_frames().get(self._loop_thread_id)  # skipcq: PYL-W0212
+            stack = "".join(traceback.format_stack(frame)) if frame else "  (unavailable)\n"
+            self.log.warning(
+                "Event loop blocked for more than %.2fs, loop thread stack:\n%s", blocked, stack
+            )
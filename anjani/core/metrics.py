@@ -1,4 +1,9 @@
-from prometheus_client import Counter, Gauge
+from typing import Iterator, MutableMapping, Tuple
+
+from prometheus_client import REGISTRY, Counter, Enum, Gauge, Histogram
+from prometheus_client.core import CounterMetricFamily
+
+from anjani import util
 
 EventCount = Counter(
     "anjani_event_count",
@@ -17,16 +22,165 @@ MessageStat = Counter(
 )
 CommandCount = Counter("anjani_command_stats", "Number of coomand", labelnames=["name"])
 UnhandledError = Counter("anjani_unhandled_error", "Number of unhandled error", labelnames=["type"])
+ChatSettingsCacheCount = Counter(
+    "anjani_chat_settings_cache",
+    "Number of chat settings cache lookup",
+    labelnames=["result"],
+)
+EventPrefetchCount = Counter(
+    "anjani_event_prefetch",
+    "Number of listener document lookup served by the event prefetch",
+    labelnames=["result"],
+)
+FilterEvaluationSaved = Counter(
+    "anjani_filter_evaluation_saved",
+    "Number of filter evaluation saved by the per update filter cache",
+)
+DispatchOverflowCount = Counter(
+    "anjani_dispatch_overflow",
+    "Number of update that found its dispatch shard full",
+    labelnames=["policy"],
+)
+
+# Most handlers finish within a few database round trips, the long tail waits on the Bot API
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
 
-EventLatencySecond = Gauge(
+EventLatencySecond = Histogram(
     "anjani_event_latency",
     "Latency of event processed",
     labelnames=["type"],
     unit="second",
+    buckets=LATENCY_BUCKETS,
 )
-CommandLatencySecond = Gauge(
+CommandLatencySecond = Histogram(
     "anjani_command_latency",
     "Latency of command processed",
     labelnames=["name"],
     unit="second",
+    buckets=LATENCY_BUCKETS,
+)
+ListenerLatencySecond = Histogram(
+    "anjani_listener_latency",
+    "Latency of listener processed",
+    labelnames=["listener"],
+    unit="second",
+    buckets=LATENCY_BUCKETS,
+)
+ListenerSkipCount = Counter(
+    "anjani_listener_skip",
+    "Number of listener skipped by its filters",
+    labelnames=["listener"],
+)
+DispatchQueueDepth = Gauge(
+    "anjani_dispatch_queue_depth",
+    "Number of update waiting on a dispatch shard",
+    labelnames=["shard"],
+)
+DispatchQueueWaitSecond = Histogram(
+    "anjani_dispatch_queue_wait",
+    "Time an update spent waiting on a dispatch shard",
+    labelnames=["shard"],
+    unit="second",
+)
+EventLoopLagSecond = Histogram(
+    "anjani_event_loop_lag",
+    "Delay of the event loop to run a scheduled callback",
+    unit="second",
+    buckets=LATENCY_BUCKETS,
+)
+ExecutorQueueDepth = Gauge(
+    "anjani_executor_queue_depth",
+    "Number of call waiting for an executor thread",
+    labelnames=["executor"],
+)
+ExecutorThreads = Gauge(
+    "anjani_executor_threads",
+    "Number of thread spawned by an executor",
+    labelnames=["executor"],
+)
+ExecutorActiveThreads = Gauge(
+    "anjani_executor_active_threads",
+    "Number of executor thread running a call",
+    labelnames=["executor"],
+)
+RunSyncWaitSecond = Histogram(
+    "anjani_run_sync_wait",
+    "Time a sync call waited for an executor thread",
+    labelnames=["executor", "caller"],
+    unit="second",
+    buckets=LATENCY_BUCKETS,
 )
+RunSyncRunSecond = Histogram(
+    "anjani_run_sync_run",
+    "Time a sync call ran on an executor thread",
+    labelnames=["executor", "caller"],
+    unit="second",
+    buckets=LATENCY_BUCKETS,
+)
+AdmissionMode = Enum(
+    "anjani_admission_mode",
+    "Whether low priority listeners are being shed",
+    states=["normal", "shedding"],
+)
+ListenerShedCount = Counter(
+    "anjani_listener_shed",
+    "Number of listener skipped while shedding load",
+    labelnames=["listener"],
+)
+CatchUpProgress = Gauge(
+    "anjani_catch_up_progress",
+    "Fraction of the missed updates fed to the dispatcher",
+)
+CatchUpEtaSecond = Gauge(
+    "anjani_catch_up_eta",
+    "Estimated time left to feed the missed updates",
+    unit="second",
+)
+CatchUpUpdateCount = Counter(
+    "anjani_catch_up_update",
+    "Number of missed updates fed or dropped while catching up",
+    labelnames=["result"],
+)
+ChangeStreamEventCount = Counter(
+    "anjani_change_stream_events",
+    "Number of change stream events received",
+    labelnames=["collection", "operation"],
+)
+DatabaseCommandLatencySecond = Histogram(
+    "anjani_db_command_latency",
+    "Time the database server took to answer a command",
+    labelnames=["collection", "operation", "plugin"],
+    unit="second",
+    buckets=LATENCY_BUCKETS,
+)
+DatabaseCommandWaitSecond = Histogram(
+    "anjani_db_command_wait",
+    "Time a database command waited for a db thread and a connection before it was sent",
+    labelnames=["collection", "operation", "plugin"],
+    unit="second",
+    buckets=LATENCY_BUCKETS,
+)
+
+
+class DocumentCacheCollector:
+    """Exports the lookups of every :obj:`~util.db.CachedCollection`, they count them"""
+
+    def collect(self) -> Iterator[CounterMetricFamily]:
+        family = CounterMetricFamily(
+            "anjani_document_cache",
+            "Number of cached find_one lookup",
+            labels=["collection", "result"],
+        )
+        totals: MutableMapping[Tuple[str, str], int] = {}
+        for cache in util.db.cached.caches():
+            for result, value in (("hit", cache.hits), ("miss", cache.misses)):
+                key = (cache.name, result)
+                totals[key] = totals.get(key, 0) + value
+
+        for labels, value in totals.items():
+            family.add_metric(labels, value)
+
+        yield family
+
+
+REGISTRY.register(DocumentCacheCollector())
@@ -0,0 +1,112 @@
+"""Anjani profiler"""
+# Copyright (C) 2020 - 2023  UserbotIndo Team, <https://github.com/userbotindo.git>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import cProfile
+import io
+import pstats
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Iterator, List, MutableMapping, Tuple
+
+
+class ProfileSession:
+    """Time bounded profiling of the event loop thread.
+
+    Besides the cProfile call graph, listeners and commands report their wall
+    time so they can be ranked per plugin.
+    """
+
+    call_graph: bool
+    profile: cProfile.Profile
+    timings: MutableMapping[Tuple[str, str], List[float]]
+
+    _started_at: float
+    _stopped_at: float
+
+    def __init__(self, *, call_graph: bool = True) -> None:
+        self.call_graph = call_graph
+        self.profile = cProfile.Profile()
+        self.timings = {}
+
+        self._started_at = 0
+        self._stopped_at = 0
+
+    def start(self) -> None:
+        self._started_at = perf_counter()
+        if self.call_graph:
+            self.profile.enable()
+
+    def stop(self) -> None:
+        if self.call_graph:
+            self.profile.disable()
+        self._stopped_at = perf_counter()
+
+    @contextmanager
+    def track(self, kind: str, name: str) -> Iterator[None]:
+        """Account the wall time of the block to a listener or a command"""
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = perf_counter() - start
+            try:
+                timing = self.timings[(kind, name)]
+            except KeyError:
+                timing = self.timings[(kind, name)] = [0, 0.0, 0.0]
+
+            timing[0] += 1
+            timing[1] += elapsed
+            timing[2] = max(timing[2], elapsed)
+
+    def _format_timings(self, kind: str) -> str:
+        rows = sorted(
+            ((name, *timing) for (k, name), timing in self.timings.items() if k == kind),
+            key=lambda row: row[2],
+            reverse=True,
+        )
+        if not rows:
+            return "  (none)\n"
+
+        width = max(len(row[0]) for row in rows)
+        lines = [f"  {'name':<{width}}  {'calls':>7}  {'total':>9}  {'mean':>9}  {'max':>9}"]
+        for name, calls, total, longest in rows:
+            lines.append(
+                f"  {name:<{width}}  {int(calls):>7}  {total:>8.3f}s  "
+                f"{total / calls * 1000:>7.2f}ms  {longest * 1000:>7.2f}ms"
+            )
+
+        return "\n".join(lines) + "\n"
+
+    def report(self, limit: int = 30) -> str:
+        """Return the ranked report of the session"""
+        out = io.StringIO()
+        out.write(f"Profiled for {self._stopped_at - self._started_at:.1f}s\n\n")
+        out.write("Listeners by cumulative wall time\n")
+        out.write(self._format_timings("listener"))
+        out.write("\nCommands by cumulative wall time\n")
+        out.write(self._format_timings("command"))
+        if not self.call_graph:
+            return out.getvalue()
+
+        stats = pstats.Stats(self.profile, stream=out)
+        stats.strip_dirs()
+        out.write("\nTop call sites by own time\n")
+        stats.sort_stats(pstats.SortKey.TIME).print_stats(limit)
+        out.write("\nTop call sites by cumulative time\n")
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(limit)
+
+        return out.getvalue()
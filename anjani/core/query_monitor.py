@@ -0,0 +1,196 @@
+"""Anjani database command monitoring"""
+# Copyright (C) 2020 - 2023  UserbotIndo Team, <https://github.com/userbotindo.git>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import json
+import logging
+import re
+import threading
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Any, List, Mapping, MutableMapping, Optional, Tuple
+
+from pymongo.monitoring import (
+    CommandFailedEvent,
+    CommandListener,
+    CommandStartedEvent,
+    CommandSucceededEvent,
+)
+
+from anjani import util
+
+from .metrics import DatabaseCommandLatencySecond, DatabaseCommandWaitSecond
+
+# Name of the plugin whose listener or command is running, "core" for everything else
+current_plugin: ContextVar[str] = ContextVar("current_plugin", default="core")
+
+# Numeric path components are ids (eg: "banned.12345"), they would make every shape unique
+_ID_COMPONENT = re.compile(r"(?<=\.)-?\d+(?=\.|$)")
+
+ShapeKey = Tuple[str, str, str]
+
+
+def redact(value: Any) -> Any:
+    """Replace every value of a query with "?", keeping the fields and operators"""
+    if isinstance(value, Mapping):
+        return {_ID_COMPONENT.sub("?", str(key)): redact(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)) and value and all(isinstance(v, Mapping) for v in value):
+        # $and, $or and pipelines
+        return [redact(item) for item in value]
+
+    return "?"
+
+
+def command_shape(name: str, command: Mapping[str, Any]) -> str:
+    """Redacted filter, or pipeline, of a command"""
+    if name in {"update", "delete"}:
+        statements = command.get(f"{name}s") or [{}]
+        query = statements[0].get("q", {})
+    elif name == "find":
+        query = command.get("filter", {})
+    elif name == "aggregate":
+        query = command.get("pipeline", [])
+    elif name in {"count", "distinct", "findAndModify"}:
+        query = command.get("query", {})
+    else:
+        return ""
+
+    return json.dumps(redact(query), separators=(",", ":"))
+
+
+class ShapeStats:
+    """Timing of the commands sharing a shape"""
+
+    __slots__ = ("count", "total", "max", "plugin")
+
+    count: int
+    total: float
+    max: float
+    plugin: str
+
+    def __init__(self, plugin: str) -> None:
+        self.count = 0
+        self.total = 0
+        self.max = 0
+        self.plugin = plugin
+
+
+class QueryMonitor(CommandListener):
+    """Times every database command by collection, operation and calling plugin.
+
+    The driver calls the listener on the thread running the command, the calling
+    plugin comes from the context copied by `util.run_sync_in`. Server time and the
+    time spent waiting for a db thread and a connection are exported separately,
+    commands slower than `slow_threshold` are logged with their redacted shape.
+    """
+
+    log: logging.Logger
+    slow_threshold: float
+    max_shapes: int
+
+    _lock: threading.Lock
+    _pending: MutableMapping[Tuple[Any, int], Tuple[str, str, str, str, float]]
+    _shapes: MutableMapping[ShapeKey, ShapeStats]
+
+    def __init__(self, *, slow_threshold: float = 0.1, max_shapes: int = 1000) -> None:
+        self.log = logging.getLogger("query_monitor")
+        self.slow_threshold = slow_threshold
+        self.max_shapes = max_shapes
+
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._shapes = {}
+
+    def started(self, event: CommandStartedEvent) -> None:
+        name = event.command_name
+        collection = event.command.get("collection" if name == "getMore" else name)
+        if not isinstance(collection, str) or collection.startswith("$cmd"):
+            # Handshakes, heartbeats and other commands not bound to a collection
+            return
+        if name == "getMore" and "maxTimeMS" in event.command:
+            # Change streams and tailable cursors wait on the server for new data on purpose
+            return
+
+        submitted_at = util.async_helper.submitted_at.get()
+        wait = perf_counter() - submitted_at if submitted_at is not None else 0
+        self._pending[(event.connection_id, event.request_id)] = (
+            collection,
+            name,
+            current_plugin.get(),
+            command_shape(name, event.command),
+            wait,
+        )
+
+    def succeeded(self, event: CommandSucceededEvent) -> None:
+        self._finish(event)
+
+    def failed(self, event: CommandFailedEvent) -> None:
+        self._finish(event)
+
+    def _finish(self, event: Any) -> None:
+        try:
+            collection, name, plugin, shape, wait = self._pending.pop(
+                (event.connection_id, event.request_id)
+            )
+        except KeyError:
+            return
+
+        duration = event.duration_micros / 1000000
+        DatabaseCommandLatencySecond.labels(collection, name, plugin).observe(duration)
+        DatabaseCommandWaitSecond.labels(collection, name, plugin).observe(wait)
+
+        with self._lock:
+            key = (collection, name, shape)
+            stats = self._shapes.get(key)
+            if stats is None and len(self._shapes) < self.max_shapes:
+                stats = self._shapes[key] = ShapeStats(plugin)
+
+            if stats is not None:
+                stats.count += 1
+                stats.total += duration
+                stats.max = max(stats.max, duration)
+
+        if self.slow_threshold and duration + wait >= self.slow_threshold:
+            self.log.warning(
+                "Slow %s on '%s' from %s took %.1fms (%.1fms waiting): %s",
+                name,
+                collection,
+                plugin,
+                duration * 1000,
+                wait * 1000,
+                shape or "-",
+            )
+
+    def slowest(self, count: int = 10) -> List[Tuple[ShapeKey, ShapeStats]]:
+        """Shapes with the slowest single command since startup"""
+        with self._lock:
+            shapes = list(self._shapes.items())
+
+        return sorted(shapes, key=lambda item: item[1].max, reverse=True)[:count]
+
+    def format(self, count: int = 10) -> Optional[str]:
+        slowest = self.slowest(count)
+        if not slowest:
+            return None
+
+        lines = []
+        for (collection, name, shape), stats in slowest:
+            lines.append(
+                f"{collection}.{name} from {stats.plugin}: max {stats.max * 1000:.1f}ms, "
+                f"avg {stats.total / stats.count * 1000:.1f}ms over {stats.count}\n"
+                f"  {shape or '-'}"
+            )
+
+        return "\n".join(lines)
@@ -0,0 +1,166 @@
+"""Anjani sharded update dispatcher"""
+# Copyright (C) 2020 - 2023  UserbotIndo Team, <https://github.com/userbotindo.git>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import asyncio
+import logging
+from collections import deque
+from time import monotonic
+from typing import Any, Awaitable, Callable, Deque, List, Optional, Tuple
+
+from pyrogram.types import CallbackQuery, ChatMemberUpdated, InlineQuery, Message
+
+from .metrics import DispatchOverflowCount, DispatchQueueDepth, DispatchQueueWaitSecond
+
+OVERFLOW_POLICIES = {"block", "drop", "spill"}
+
+Job = Tuple[float, Callable[..., Awaitable[Any]], Tuple[Any, ...]]
+
+
+def get_shard_key(update: Any) -> Optional[int]:
+    """Return the id updates are sharded by, the chat id when there is one"""
+    if isinstance(update, (Message, ChatMemberUpdated)):
+        return update.chat.id if update.chat else None
+    if isinstance(update, CallbackQuery):
+        if update.message and update.message.chat:
+            return update.message.chat.id
+        return update.from_user.id
+    if isinstance(update, InlineQuery):
+        return update.from_user.id
+    return None
+
+
+class _Shard:
+    index: str
+    queue: "asyncio.Queue[Job]"
+    spill: Deque[Job]
+
+    def __init__(self, index: int, maxsize: int) -> None:
+        self.index = str(index)
+        self.queue = asyncio.Queue(maxsize)
+        self.spill = deque()
+
+    @property
+    def depth(self) -> int:
+        return self.queue.qsize() + len(self.spill)
+
+
+class ShardedDispatcher:
+    """Dispatch updates onto ordered queues sharded by chat.
+
+    Updates of the same chat are handled one at a time in arrival order while
+    different chats are handled in parallel, so a slow chat only stalls its own
+    shard. When a shard queue is full the overflow policy decides what happens:
+
+    - `block`: wait for room, pushing back on the pyrogram workers.
+    - `drop`: discard the update.
+    - `spill`: keep the update in an unbounded overflow of the shard, in order.
+    """
+
+    log: logging.Logger
+    overflow: str
+
+    _shards: List[_Shard]
+    _workers: List["asyncio.Task[None]"]
+
+    def __init__(self, shards: int, *, maxsize: int = 100, overflow: str = "block") -> None:
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Invalid overflow policy '{overflow}'")
+
+        self.log = logging.getLogger("dispatcher")
+        self.overflow = overflow
+
+        self._shards = [_Shard(index, maxsize) for index in range(shards)]
+        self._workers = []
+
+    def __len__(self) -> int:
+        return len(self._shards)
+
+    @property
+    def depth(self) -> int:
+        """Number of update waiting on every shard"""
+        return sum(shard.depth for shard in self._shards)
+
+    def start(self) -> None:
+        loop = asyncio.get_event_loop()
+        self._workers = [loop.create_task(self._work(shard)) for shard in self._shards]
+
+    async def stop(self, timeout: float = 0) -> None:
+        """Stop the workers, after handling the queued updates for up to `timeout` seconds"""
+        if self._workers and timeout > 0:
+            try:
+                await asyncio.wait_for(self.join(), timeout)
+            except asyncio.TimeoutError:
+                self.log.warning("Dropping %d queued updates after %.1fs", self.depth, timeout)
+
+        for worker in self._workers:
+            worker.cancel()
+
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers.clear()
+
+    async def join(self) -> None:
+        """Wait until every submitted update has been handled"""
+        await asyncio.gather(*(shard.queue.join() for shard in self._shards))
+
+    async def submit(self, update: Any, func: Callable[..., Awaitable[Any]], *args: Any) -> None:
+        """Queue `func(*args)` on the shard of the update"""
+        if not self._workers:
+            # Sharding is disabled, run in the caller worker
+            await func(*args)
+            return
+
+        key = get_shard_key(update)
+        shard = self._shards[hash(key) % len(self._shards)]
+        job = (monotonic(), func, args)
+
+        if self.overflow == "spill":
+            # Once spilling, later updates must queue behind the spilled ones
+            if shard.spill or shard.queue.full():
+                DispatchOverflowCount.labels(self.overflow).inc()
+                shard.spill.append(job)
+            else:
+                shard.queue.put_nowait(job)
+        elif self.overflow == "drop":
+            try:
+                shard.queue.put_nowait(job)
+            except asyncio.QueueFull:
+                DispatchOverflowCount.labels(self.overflow).inc()
+                self.log.debug("Shard %s is full, dropping update from %s", shard.index, key)
+                return
+        else:
+            if shard.queue.full():
+                DispatchOverflowCount.labels(self.overflow).inc()
+            await shard.queue.put(job)
+
+        DispatchQueueDepth.labels(shard.index).set(shard.depth)
+
+    async def _work(self, shard: _Shard) -> None:
+        while True:
+            enqueued_at, func, args = await shard.queue.get()
+            while shard.spill and not shard.queue.full():
+                shard.queue.put_nowait(shard.spill.popleft())
+
+            DispatchQueueWaitSecond.labels(shard.index).observe(monotonic() - enqueued_at)
+            DispatchQueueDepth.labels(shard.index).set(shard.depth)
+            try:
+                await func(*args)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:  # skipcq: PYL-W0703
+                self.log.error("Unhandled error on shard %s", shard.index, exc_info=e)
+            finally:
+                shard.queue.task_done()
@@ -20,11 +20,13 @@ import signal
 import sys
 from functools import partial
 from hashlib import sha256
+from time import monotonic
 from typing import TYPE_CHECKING, Any, MutableMapping, Optional, Set, Tuple, Type, Union
 
 import pyrogram.filters as flt
 from aiocache import cached
 from aiopath import AsyncPath
+from pyrogram import ContinuePropagation
 from pyrogram.client import Client
 from pyrogram.enums.parse_mode import ParseMode
 from pyrogram.filters import Filter
@@ -32,6 +34,7 @@ from pyrogram.handlers.callback_query_handler import CallbackQueryHandler
 from pyrogram.handlers.chat_member_updated_handler import ChatMemberUpdatedHandler
 from pyrogram.handlers.inline_query_handler import InlineQueryHandler
 from pyrogram.handlers.message_handler import MessageHandler
+from pyrogram.raw.types import User as RawUser
 from pyrogram.types import (
     CallbackQuery,
     Chat,
@@ -41,14 +44,17 @@ from pyrogram.types import (
     Message,
     User,
 )
-from yaml import full_load
 
 from anjani import util
-from anjani.language import get_lang_file
-from anjani.util.cache_limiter import CacheLimiter
+from anjani.language import Language, get_lang_file, load_language
+from anjani.util.rate_limiter import RateLimiter, TokenBucketScope
 
+from .admission import AdmissionController
 from .anjani_mixin_base import MixinBase
+from .lifecycle import StartupReport
+from .sharded_dispatcher import ShardedDispatcher
 from .sqlite_storage import SQLiteStorage
+from .update_recorder import RecordingQueue, UpdateRecorder
 
 if TYPE_CHECKING:
     from .anjani_bot import Anjani
@@ -62,14 +68,18 @@ TgEventHandler = Union[
 class TelegramBot(MixinBase):
     # Initialized during instantiation
     __running: bool
-    _limiter: CacheLimiter
+    _limiter: RateLimiter
     _plugin_event_handlers: MutableMapping[str, Tuple[TgEventHandler, int]]
 
+    update_shards: ShardedDispatcher
+    update_recorder: Optional[UpdateRecorder]
+    catch_up_task: Optional["asyncio.Task[None]"]
+    admission: AdmissionController
     loaded: bool
     staff: Set[int]
     devs: Set[int]
     chats_languages: MutableMapping[int, str]
-    languages: MutableMapping[str, MutableMapping[str, str]]
+    languages: MutableMapping[str, Language]
 
     # Initialized during startup
     client: Client
@@ -80,9 +90,17 @@ class TelegramBot(MixinBase):
 
     def __init__(self: "Anjani", **kwargs: Any) -> None:
         self.__running = False
-        self._limiter = CacheLimiter(ttl=10, max_value=10)
+        self._limiter = RateLimiter(
+            # 10 commands burst, then one every second
+            user=TokenBucketScope(1, 10),
+            # Shared by the members of a chat, well above a single user
+            chat=TokenBucketScope(5, 60),
+            all=TokenBucketScope(200, 400, maxsize=1),
+        )
         self._plugin_event_handlers = {}
 
+        self.update_recorder = None
+        self.catch_up_task = None
         self.loaded = False
         self.staff = set()
         self.devs = set()
@@ -125,25 +143,60 @@ class TelegramBot(MixinBase):
             storage=SQLiteStorage("anjani"),
         )
 
+        if self.config.UPDATE_RECORD_PATH:
+            self.update_recorder = UpdateRecorder(self.config.UPDATE_RECORD_PATH)
+            self.client.dispatcher.updates_queue = RecordingQueue(self.update_recorder)
+            self.update_recorder.start()
+
     async def start(self: "Anjani") -> None:
         if self.__running:
             raise RuntimeError("This bot instance is already running")
 
         self.log.info("Starting")
-        await self.init_client()
+        report = StartupReport()
+        with report.phase("client"):
+            await self.init_client()
+
+        self.update_shards = ShardedDispatcher(
+            self.config.DISPATCH_SHARDS,
+            maxsize=self.config.DISPATCH_QUEUE_SIZE,
+            overflow=self.config.DISPATCH_OVERFLOW,
+        )
+        self.update_shards.start()
+
+        self.admission = AdmissionController(
+            lambda: self.client.dispatcher.updates_queue.qsize() + self.update_shards.depth,
+            lambda: self.loop_monitor.lag,
+            depth_high=self.config.ADMISSION_BACKLOG_HIGH,
+            lag_high=self.config.ADMISSION_LAG_HIGH,
+        )
+        self.admission.start()
+
+        async def command_handler(client: Client, message: Message) -> None:
+            await self.update_shards.submit(message, self.on_command, client, message)
+            # Continue processing handler of on_message, queued behind the command
+            raise ContinuePropagation
 
         # Register core command handler
-        self.client.add_handler(MessageHandler(self.on_command, self.command_predicate()), -1)
+        self.client.add_handler(MessageHandler(command_handler, self.command_predicate()), -1)
 
         # Load plugin
-        self.load_all_plugins()
-        await self.dispatch_event("load")
+        with report.phase("plugins"):
+            self.load_all_plugins()
+        with report.phase("load"):
+            report.plugins["load"] = await self.dispatch_lifecycle("load")
         self.loaded = True
+        self.indexes.start(self.plugins.values())
+
+        # Plugins have registered their settings collection and subscriptions on load
+        self.chat_settings.start()
+        await self.change_streams.start()
 
         async with asyncio.Lock():
             # Start Telegram client
             try:
-                await self.client.start()
+                with report.phase("connect"):
+                    await self.client.start()
             except AttributeError:
                 self.log.error(
                     "Unable to get input for authorization! Make sure all configuration are done before running the bot."
@@ -158,42 +211,78 @@ class TelegramBot(MixinBase):
             # noinspection PyTypeChecker
             self.uid = user.id
 
+            if self.update_recorder is not None:
+                # Replays need the bot identity to match commands and mentions
+                self.update_recorder.record_self(
+                    RawUser(
+                        id=user.id,
+                        is_self=True,
+                        bot=True,
+                        first_name=user.first_name,
+                        username=user.username,
+                    )
+                )
+
         self.staff.add(self.owner)
         self.devs.add(self.owner)
 
-        # Update staff from db
-        async for doc in self.db.get_collection("STAFF").find():
-            if doc["rank"] == "dev":
-                self.devs.add(doc["_id"])
-
-            self.staff.add(doc["_id"])
+        # Staff, chat languages and language files don't depend on each other
+        with report.phase("staff and languages"):
+            await asyncio.gather(
+                self._load_staff(), self._load_chats_languages(), self._load_languages()
+            )
 
         # Update global staff variable
         util.tg.STAFF.update(self.staff)
 
-        # Update Language setting chat from db
-        async for data in self.db.get_collection("LANGUAGE").find({}, {"_id": False}):
-            self.chats_languages[data["chat_id"]] = data["language"]
-
-        # Load text from language file
-        async for language_file in get_lang_file():
-            self.languages[language_file.stem] = await util.run_sync(
-                full_load, await language_file.read_text()
-            )
-
         # Record start time and dispatch start event
         self.start_time_us = util.time.usec()
-        await self.dispatch_event("start", self.start_time_us)
+        with report.phase("start"):
+            report.plugins["start"] = await self.dispatch_lifecycle("start", self.start_time_us)
 
         self.log.info("Bot is ready")
 
         if not self.config.is_flag_active("disable_catchup"):
-            self.log.info("Catching up on missed events")
-            await self.dispatch_missed_events()
-            self.log.info("Finished catching up")
+            # A throttled catch up can take a while, don't hold the startup on it
+            self.catch_up_task = self.loop.create_task(self._catch_up())
 
         # Dispatch final late start event
-        await self.dispatch_event("started")
+        with report.phase("started"):
+            report.plugins["started"] = await self.dispatch_lifecycle("started")
+
+        self.log.info(report.format())
+
+    async def _catch_up(self: "Anjani") -> None:
+        self.log.info("Catching up on missed events")
+        start = monotonic()
+        try:
+            await self.dispatch_missed_events()
+        except Exception as e:  # skipcq: PYL-W0703
+            self.log.error("Failed to catch up on missed events", exc_info=e)
+        else:
+            self.log.info("Finished catching up in %.1fs", monotonic() - start)
+
+    async def _load_staff(self: "Anjani") -> None:
+        async for doc in self.db.get_collection("STAFF").find():
+            if doc["rank"] == "dev":
+                self.devs.add(doc["_id"])
+
+            self.staff.add(doc["_id"])
+
+    async def _load_chats_languages(self: "Anjani") -> None:
+        async for data in self.db.get_collection("LANGUAGE").find({}, {"_id": False}):
+            self.chats_languages[data["chat_id"]] = data["language"]
+
+    async def _load_languages(self: "Anjani") -> None:
+        async def load(language_file: AsyncPath) -> Language:
+            return await util.run_sync_in("cpu", load_language, str(language_file))
+
+        files = [language_file async for language_file in get_lang_file()]
+        # Parse concurrently but keep the languages in directory order
+        for language_file, language in zip(
+            files, await asyncio.gather(*(load(language_file) for language_file in files))
+        ):
+            self.languages[language_file.stem] = language
 
     async def idle(self: "Anjani") -> None:
         if self.__running:
@@ -283,7 +372,8 @@ class TelegramBot(MixinBase):
                 async def event_handler(
                     client: Client, event: EventType  # skipcq: PYL-W0613
                 ) -> None:
-                    await self.dispatch_event(name, event)
+                    # Commands and events share the shards, so a chat keeps its order
+                    await self.update_shards.submit(event, self.dispatch_event, name, event)
 
                 if filters is not None:
                     handler_info = (event_type(event_handler, filters), group)
@@ -0,0 +1,191 @@
+"""Anjani update recorder"""
+# Copyright (C) 2020 - 2023  UserbotIndo Team, <https://github.com/userbotindo.git>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+import gzip
+import logging
+import struct
+from io import BytesIO
+from time import time
+from typing import IO, Any, List, Mapping, NamedTuple, Optional, Tuple
+
+from pyrogram import raw
+from pyrogram.raw.core import Int, TLObject
+
+from anjani import util
+
+MAGIC = b"ANJANI-UPDATES\x01"
+# Kind of the frame, wall time and size of the payload
+FRAME = struct.Struct("<BdI")
+FRAME_SELF = 0
+FRAME_UPDATE = 1
+
+
+class RecordedUpdate(NamedTuple):
+    timestamp: float
+    update: TLObject
+    users: Mapping[int, TLObject]
+    chats: Mapping[int, TLObject]
+
+
+def _write_object(obj: TLObject) -> bytes:
+    # Some types write optional vectors their flags don't announce, so every
+    # object is sized rather than trusting the reader to stop at the right byte
+    data = obj.write()
+    return Int(len(data)) + data
+
+
+def _read_object(data: BytesIO) -> TLObject:
+    return TLObject.read(BytesIO(data.read(Int.read(data))))
+
+
+def _write_peers(peers: Mapping[int, TLObject]) -> bytes:
+    return Int(len(peers)) + b"".join(_write_object(peer) for peer in peers.values())
+
+
+def _read_peers(data: BytesIO) -> Mapping[int, TLObject]:
+    peers = (_read_object(data) for _ in range(Int.read(data)))
+    return {peer.id: peer for peer in peers}  # type: ignore
+
+
+def read_recording(path: str) -> Tuple[Optional[raw.types.User], List[RecordedUpdate]]:
+    """Read back a recording, returns the bot user and the updates in arrival order"""
+    with gzip.open(path, "rb") as file:
+        data = BytesIO(file.read())
+
+    if data.read(len(MAGIC)) != MAGIC:
+        raise ValueError(f"'{path}' is not an update recording")
+
+    me = None
+    updates = []
+    while True:
+        header = data.read(FRAME.size)
+        if len(header) < FRAME.size:
+            # A truncated frame means the bot was killed while writing
+            break
+
+        kind, timestamp, size = FRAME.unpack(header)
+        payload = BytesIO(data.read(size))
+        if kind == FRAME_SELF:
+            me = _read_object(payload)
+        elif kind == FRAME_UPDATE:
+            update = _read_object(payload)
+            users = _read_peers(payload)
+            chats = _read_peers(payload)
+            updates.append(RecordedUpdate(timestamp, update, users, chats))
+
+    return me, updates
+
+
+class UpdateRecorder:
+    """Record the raw updates entering the dispatcher into a compressed file.
+
+    Frames are serialized with the Telegram schema on the event loop and
+    written to disk in batches from the io executor.
+    """
+
+    log: logging.Logger
+    path: str
+    interval: float
+
+    _buffer: List[bytes]
+    _file: Optional[IO[bytes]]
+    _lock: asyncio.Lock
+    _task: Optional["asyncio.Task[None]"]
+
+    def __init__(self, path: str, *, interval: float = 1) -> None:
+        self.log = logging.getLogger("recorder")
+        self.path = path
+        self.interval = interval
+
+        self._buffer = [MAGIC]
+        self._file = None
+        self._lock = asyncio.Lock()
+        self._task = None
+
+    def _append(self, kind: int, payload: bytes) -> None:
+        self._buffer.append(FRAME.pack(kind, time(), len(payload)) + payload)
+
+    def record(
+        self, update: TLObject, users: Mapping[int, TLObject], chats: Mapping[int, TLObject]
+    ) -> None:
+        self._append(
+            FRAME_UPDATE, _write_object(update) + _write_peers(users) + _write_peers(chats)
+        )
+
+    def record_self(self, user: raw.types.User) -> None:
+        self._append(FRAME_SELF, _write_object(user))
+
+    def _write(self, data: bytes) -> None:
+        if self._file is None:
+            self._file = gzip.open(self.path, "wb")
+
+        self._file.write(data)
+        self._file.flush()
+
+    async def flush(self) -> None:
+        async with self._lock:
+            if not self._buffer:
+                return
+
+            data = b"".join(self._buffer)
+            self._buffer.clear()
+            await util.run_sync_in("io", self._write, data)
+
+    def start(self) -> None:
+        self.log.info("Recording updates to '%s'", self.path)
+        self._task = asyncio.get_event_loop().create_task(self._flush_periodically())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+            self._task = None
+
+        await self.flush()
+        if self._file is not None:
+            await util.run_sync_in("io", self._file.close)
+            self._file = None
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush()
+            except OSError as e:
+                self.log.error("Failed to write the update recording", exc_info=e)
+
+
+class RecordingQueue(asyncio.Queue):
+    """Updates queue of the pyrogram dispatcher that records every update put in"""
+
+    recorder: UpdateRecorder
+
+    def __init__(self, recorder: UpdateRecorder) -> None:
+        super().__init__()
+
+        self.recorder = recorder
+
+    def put_nowait(self, item: Any) -> None:
+        # None is the stop signal of the dispatcher workers
+        if item is not None:
+            self.recorder.record(*item)
+
+        super().put_nowait(item)
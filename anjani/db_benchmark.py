@@ -0,0 +1,166 @@
+"""Anjani database backend benchmark"""
+# Copyright (C) 2020 - 2023  UserbotIndo Team, <https://github.com/userbotindo.git>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import argparse
+import asyncio
+import random
+from time import perf_counter
+from typing import Any, List, Optional
+
+from . import util
+from .core.loop_monitor import InstrumentedExecutor
+from .util.db.memory import MemoryDatabase
+
+BACKENDS = ("thread", "native", "memory")
+
+
+def _open(backend: str, uri: str, database: str) -> Any:
+    if backend == "memory":
+        return MemoryDatabase()
+    if backend == "native":
+        return util.db.NativeClient(uri, connect=False).get_database(database)
+
+    client = util.db.AsyncClient(uri, connect=False)
+    util.async_helper.set_executor(
+        "db", InstrumentedExecutor("db", client.dispatch.options.pool_options.max_pool_size)
+    )
+    return client.get_database(database)
+
+
+def _percentile(samples: List[float], percent: float) -> float:
+    return samples[min(len(samples) - 1, int(len(samples) * percent / 100))]
+
+
+async def benchmark(
+    backend: str,
+    uri: str,
+    *,
+    database: str = "AnjaniBenchmark",
+    concurrency: int = 64,
+    ops: int = 20000,
+    write_ratio: float = 0.2,
+    documents: int = 1000,
+) -> str:
+    """Run the bot's typical point reads and updates and return the report line.
+
+    Parameters:
+        backend (`str`):
+            One of "thread", "native" or "memory".
+        uri (`str`):
+            MongoDB connection string, ignored by the memory backend.
+        concurrency (`int`, *Optional*):
+            Number of operations in flight.
+        ops (`int`, *Optional*):
+            Total number of operations.
+        write_ratio (`float`, *Optional*):
+            Share of the operations that are `update_one`, the rest are `find_one`.
+        documents (`int`, *Optional*):
+            Size of the scratch collection.
+    """
+    db = _open(backend, uri, database)
+    collection = db.get_collection("BENCHMARK")
+    try:
+        await collection.delete_many({})
+        await collection.insert_many(
+            [{"chat_id": chat_id, "counter": 0} for chat_id in range(documents)]
+        )
+        # Connections are opened lazily, don't count them
+        await collection.find_one({"chat_id": 0})
+
+        latencies: List[float] = []
+        remaining = ops
+
+        async def worker() -> None:
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                chat_id = random.randrange(documents)
+                start = perf_counter()
+                if random.random() < write_ratio:
+                    await collection.update_one({"chat_id": chat_id}, {"$inc": {"counter": 1}})
+                else:
+                    await collection.find_one({"chat_id": chat_id})
+                latencies.append(perf_counter() - start)
+
+        start = perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = perf_counter() - start
+    finally:
+        try:
+            await collection.drop()
+        finally:
+            await db.close()
+
+    latencies.sort()
+    return (
+        f"{backend:<8} {len(latencies) / elapsed:>10.1f} ops/s  "
+        f"p50 {_percentile(latencies, 50) * 1000:>7.2f}ms  "
+        f"p99 {_percentile(latencies, 99) * 1000:>7.2f}ms"
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m anjani.db_benchmark",
+        description="Compare the throughput and latency of the database backends",
+    )
+    parser.add_argument("--uri", default="mongodb://localhost:27017", help="MongoDB URI")
+    parser.add_argument(
+        "--database",
+        default="AnjaniBenchmark",
+        help="scratch database, its BENCHMARK collection is dropped afterwards",
+    )
+    parser.add_argument(
+        "--backend",
+        default="thread",
+        help=f"comma separated backends to run, out of {', '.join(BACKENDS)}",
+    )
+    parser.add_argument("--concurrency", type=int, default=64, help="operations in flight")
+    parser.add_argument("--ops", type=int, default=20000, help="operations per backend")
+    parser.add_argument(
+        "--write-ratio", type=float, default=0.2, help="share of updates, defaults to 0.2"
+    )
+    args = parser.parse_args(argv)
+
+    backends = [backend.strip() for backend in args.backend.split(",") if backend.strip()]
+    for backend in backends:
+        if backend not in BACKENDS:
+            parser.error(f"unknown backend '{backend}'")
+        if backend == "native" and not util.db.native.available():
+            parser.error("the native backend needs pymongo 4.10 or newer")
+
+    for backend in backends:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            report = loop.run_until_complete(
+                benchmark(
+                    backend,
+                    args.uri,
+                    database=args.database,
+                    concurrency=args.concurrency,
+                    ops=args.ops,
+                    write_ratio=args.write_ratio,
+                )
+            )
+        finally:
+            loop.close()
+
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
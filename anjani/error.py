@@ -14,7 +14,7 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-from typing import TYPE_CHECKING, Any, Optional, Type
+from typing import TYPE_CHECKING, Any, Optional, Tuple, Type
 
 if TYPE_CHECKING:
     from .command import Command
@@ -27,6 +27,7 @@ __all__ = [
     "BadArgument",
     "BadBoolArgument",
     "BadResult",
+    "CircularDependencyError",
     "CommandHandlerError",
     "CommandInvokeError",
     "ConversionError",
@@ -132,3 +133,15 @@ class ExistingPluginError(PluginLoadError):
         self.old_plugin = old_plugin
         self.new_plugin = new_plugin
         super().__init__(f"Plugin '{old_plugin.name}' ({old_plugin.__name__}) already exists")
+
+
+class CircularDependencyError(PluginLoadError):
+    """Exception that raised when plugins depend on each other.
+
+    Attributes:
+        cycle (`Tuple[str, ...]`): Name of the plugins in the cycle, the first one is repeated last.
+    """
+
+    def __init__(self, cycle: Tuple[str, ...]) -> None:
+        self.cycle = cycle
+        super().__init__(f"Circular plugin dependencies: {' -> '.join(cycle)}")
@@ -20,7 +20,10 @@ from pyrogram.client import Client
 from pyrogram.enums.chat_member_status import ChatMemberStatus
 from pyrogram.enums.chat_type import ChatType
 from pyrogram.filters import (  # skipcq: PY-W2000
+    AndFilter,
     Filter,
+    InvertFilter,
+    OrFilter,
     animation,
     audio,
     bot,
@@ -161,6 +164,18 @@ def create(func: FilterFunc, name: Optional[str] = None, **kwargs: Any) -> Custo
     )()
 
 
+def is_privileged(flt: Optional[Filter]) -> bool:
+    """Whether the filter only lets admins, staff or the owner through"""
+    if isinstance(flt, AndFilter):
+        return is_privileged(flt.base) or is_privileged(flt.other)
+    if isinstance(flt, OrFilter):
+        return is_privileged(flt.base) and is_privileged(flt.other)
+    if isinstance(flt, InvertFilter) or flt is None:
+        return False
+
+    return type(flt).__name__ in PRIVILEGED
+
+
 # { permission
 def _create_filter_permission(name: str, *, include_bot: bool = True) -> Filter:
     async def func(flt: CustomFilter, client: Client, message: Message) -> bool:
@@ -198,6 +213,22 @@ can_restrict = _create_filter_permission("can_restrict_members")
 can_manage_topic = _create_filter_permission("can_manage_topics")
 # }
 
+# Names of the filters requiring an admin, staff or the owner
+PRIVILEGED = frozenset(
+    {
+        "admin_only",
+        "staff_only",
+        "owner_only",
+        "can_change_info",
+        "can_delete_messages",
+        "can_invite_users",
+        "can_pin_messages",
+        "can_promote_members",
+        "can_restrict_members",
+        "can_manage_topics",
+    }
+)
+
 
 # { staff_only
 def _staff_only(include_bot: bool = True, *, rank: Optional[str] = None) -> CustomFilter:
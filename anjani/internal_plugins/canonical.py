@@ -18,12 +18,11 @@
 import asyncio
 import logging
 from base64 import b64encode
-from typing import Any, ClassVar, MutableMapping
+from typing import Any, ClassVar, Mapping, MutableMapping
 
 from aiohttp import web
 from aiopath import AsyncPath
 from prometheus_client import REGISTRY, generate_latest
-from pymongo.errors import PyMongoError
 from pyrogram.enums.chat_member_status import ChatMemberStatus
 from pyrogram.enums.chat_members_filter import ChatMembersFilter
 from pyrogram.enums.message_media_type import MessageMediaType
@@ -36,6 +35,7 @@ from pyrogram.types import (
 )
 
 from anjani import command, filters, listener, plugin
+from anjani.core.change_streams import Subscription
 from anjani.core.metrics import MessageStat
 
 # metrics endpoint filter
@@ -54,6 +54,7 @@ class Canonical(plugin.Plugin):
     """
 
     name: ClassVar[str] = "Canonical"
+    indexes: ClassVar[plugin.Indexes] = {"CHATS": ["chat_id"]}
 
     # Private
     _web_runner: web.AppRunner
@@ -62,7 +63,7 @@ class Canonical(plugin.Plugin):
     _internal_api_url: str
 
     __web_task: asyncio.Task[None]
-    __task: asyncio.Task[None]
+    __subscription: Subscription
     _mt: MutableMapping[MessageMediaType, str] = {
         MessageMediaType.STICKER: "sticker",
         MessageMediaType.PHOTO: "photo",
@@ -97,8 +98,10 @@ class Canonical(plugin.Plugin):
             await self._web_runner.cleanup()
 
     async def on_start(self, _: int) -> None:
-        self.log.debug("Starting watch streams")
-        self.__task = self.bot.loop.create_task(self.watch_streams())
+        self.log.debug("Subscribing to change streams")
+        self.__subscription = self.bot.change_streams.subscribe(
+            "TEST", self.on_db_change, operations=("insert",)
+        )
         self.__web_task = self.bot.loop.create_task(self._setup_web_app())
 
         async def _web_shutdown(task: asyncio.Task[None]) -> None:
@@ -111,8 +114,8 @@ class Canonical(plugin.Plugin):
         self.__web_task.add_done_callback(shutdown_wrapper)
 
     async def on_stop(self) -> None:
-        self.log.debug("Stopping watch streams")
-        self.__task.cancel()
+        self.log.debug("Unsubscribing from change streams")
+        self.bot.change_streams.unsubscribe(self.__subscription)
         self.log.debug("Shutting down web app")
         self.__web_task.cancel()
 
@@ -148,6 +151,8 @@ class Canonical(plugin.Plugin):
         await ctx.respond("Done", delete_after=5)
 
     @listener.priority(65)
+    @listener.passive()
+    @listener.sheddable()
     async def on_message(self, message: Message) -> None:
         """Message metric analytics"""
         if message.outgoing:
@@ -195,13 +200,8 @@ class Canonical(plugin.Plugin):
                 upsert=True,
             )
 
-    async def watch_streams(self) -> None:
-        try:
-            async with self.db.watch([{"$match": {"operationType": "insert"}}]) as stream:
-                async for change in stream:
-                    await self.dispatch_change(change["fullDocument"])
-        except PyMongoError as e:
-            self.log.error("Error", exc_info=e)
+    async def on_db_change(self, change: Mapping[str, Any]) -> None:
+        await self.dispatch_change(change["fullDocument"])
 
     async def dispatch_change(self, doc: MutableMapping[str, Any]) -> None:
         chat_id = int(doc["_id"])
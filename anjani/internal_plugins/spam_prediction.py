@@ -80,9 +80,11 @@ class SpamDetectionResponse(BaseModel):
 class SpamPrediction(plugin.Plugin):
     name: ClassVar[str] = "SpamPredict"
     helpable: ClassVar[bool] = True
+    indexes: ClassVar[plugin.Indexes] = {"SPAM_PREDICT_SETTING": ["chat_id"]}
 
     db: util.db.AsyncCollection
     user_db: util.db.AsyncCollection
+    samples_writer: util.db.BulkWriter
     setting_db: util.db.AsyncCollection
 
     _api_key: str
@@ -101,7 +103,9 @@ class SpamPrediction(plugin.Plugin):
 
         self.db = self.bot.db.get_collection("SPAM_DUMP")
         self.user_db = self.bot.db.get_collection("USERS")
+        self.samples_writer = self.user_db.buffered()
         self.setting_db = self.bot.db.get_collection("SPAM_PREDICT_SETTING")
+        self.bot.chat_settings.register("SPAM_PREDICT_SETTING", fields=("setting",))
 
     async def on_chat_migrate(self, message: Message) -> None:
         await self.db.update_one(
@@ -132,7 +136,7 @@ class SpamPrediction(plugin.Plugin):
         if not uid or uid == self.bot.uid:
             return
         if randint(1, 2) == 2:  # 50% chance to collect a sample
-            await self.user_db.update_one(
+            await self.samples_writer.update_one(
                 {"_id": uid},
                 {
                     "$push": {
@@ -583,10 +587,14 @@ class SpamPrediction(plugin.Plugin):
         await self.setting_db.update_one(
             {"chat_id": chat_id}, {"$set": {"setting": setting}}, upsert=True
         )
+        self.bot.chat_settings.invalidate(chat_id)
 
     async def is_active(self, chat_id: int) -> bool:
         """Return SpamShield setting"""
-        data = await self.setting_db.find_one({"chat_id": chat_id})
+        snapshot = self.bot.chat_settings.peek(chat_id)
+        if snapshot is None:
+            snapshot = await self.bot.chat_settings.load(chat_id)
+        data = snapshot.get("SPAM_PREDICT_SETTING")
         return data.get("setting", True) if data else True
 
     @command.filters(filters.admin_only, aliases=["spampredict", "spam_predict"])
@@ -14,9 +14,81 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-from typing import AsyncIterator
+import codecs
+import marshal
+import os
+from string import Formatter
+from typing import AsyncIterator, Mapping, NamedTuple, Optional
 
 from aiopath import AsyncPath
+from yaml import full_load
+
+# Bump when the compiled format changes to invalidate old caches
+CACHE_VERSION = 2
+
+
+class LanguageString(NamedTuple):
+    """A language string compiled at load time"""
+
+    text: str
+    # Final text when the string has no placeholder, None otherwise
+    literal: Optional[str]
+
+
+Language = Mapping[str, LanguageString]
+
+
+def compile_string(text: str) -> LanguageString:
+    text = codecs.decode(codecs.encode(text, "latin-1", "backslashreplace"), "unicode-escape")
+    try:
+        parsed = list(Formatter().parse(text))
+    except ValueError:
+        # Malformed, let str.format raise when it's used
+        return LanguageString(text, None)
+
+    if any(field is not None for _, field, _, _ in parsed):
+        return LanguageString(text, None)
+
+    # Still unescape the doubled braces like str.format does
+    return LanguageString(text, "".join(literal for literal, _, _, _ in parsed))
+
+
+def compile_language(strings: Mapping[str, str]) -> Language:
+    return {name: compile_string(str(text)) for name, text in strings.items()}
+
+
+def load_language(path: str) -> Language:
+    """Load a language file, reusing the compiled cache while the file is unchanged.
+
+    The cache lives in the __pycache__ directory next to the file and is keyed by
+    the modification time and size of the YAML file. It holds plain tuples, an
+    unreadable or outdated cache is only a miss.
+    """
+    stat = os.stat(path)
+    key = (CACHE_VERSION, stat.st_mtime_ns, stat.st_size)
+    directory, filename = os.path.split(path)
+    cache_path = os.path.join(directory, "__pycache__", os.path.splitext(filename)[0] + ".lang")
+
+    try:
+        with open(cache_path, "rb") as file:
+            cache_key, strings = marshal.load(file)
+        if cache_key == key:
+            return {name: LanguageString._make(string) for name, string in strings.items()}
+    except (OSError, EOFError, ValueError, TypeError, AttributeError):
+        pass
+
+    with open(path, "r", encoding="utf-8") as file:
+        language = compile_language(full_load(file))
+
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(cache_path, "wb") as file:
+            marshal.dump((key, {name: tuple(string) for name, string in language.items()}), file)
+    except OSError:
+        # Read-only install, we just parse the file every time
+        pass
+
+    return language
 
 
 async def get_lang_file() -> AsyncIterator[AsyncPath]:
@@ -14,13 +14,54 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-from typing import Any, Callable, Optional, Union
+import re
+from typing import Any, Callable, NamedTuple, Optional, Tuple, Union
 
 from pyrogram.filters import Filter
 
 ListenerFunc = Callable[..., Any]
 Decorator = Callable[[ListenerFunc], ListenerFunc]
 
+_PREFETCH_PATTERN = re.compile(
+    r"^(?P<collection>\w+):(?P<key>\w+)=\{(?P<path>\w+(?:\.\w+)*)\}"
+    r"(?:\[(?P<fields>\w+(?:,\w+)*)\])?$"
+)
+
+
+class Prefetch(NamedTuple):
+    """A document a listener reads, resolved before the listener runs"""
+
+    collection: str
+    key: str
+    path: Tuple[str, ...]
+    # Fields the listener reads, empty for the whole document
+    fields: Tuple[str, ...] = ()
+
+    @classmethod
+    def parse(cls, spec: str) -> "Prefetch":
+        match = _PREFETCH_PATTERN.match(spec)
+        if not match:
+            raise ValueError(
+                f"Invalid prefetch spec '{spec}', expected 'COLLECTION:key={{path}}[field,...]'"
+            )
+
+        return cls(
+            match["collection"],
+            match["key"],
+            tuple(match["path"].split(".")),
+            tuple(match["fields"].split(",")) if match["fields"] else (),
+        )
+
+    def resolve(self, event: Any) -> Any:
+        """Return the lookup value from the event, None if the path doesn't exist"""
+        value = event
+        for attr in self.path:
+            value = getattr(value, attr, None)
+            if value is None:
+                return None
+
+        return value
+
 
 def priority(_prio: int) -> Decorator:
     """Sets priority on the given listener function."""
@@ -42,12 +83,62 @@ def filters(_filters: Filter) -> Decorator:
     return filters_decorator
 
 
+def prefetch(*_specs: str) -> Decorator:
+    """Declares the documents the given listener reads.
+
+    Each spec is formatted as `COLLECTION:key={attribute.path}`, where the
+    attribute path is resolved against the event, e.g. `USERS:_id={from_user.id}`.
+    A trailing `[field,...]` limits the fields fetched, e.g. `USERS:_id={from_user.id}[spam]`.
+    The documents are fetched together before any listener runs and are
+    available through `bot.event_context`.
+    """
+    prefetches = tuple(Prefetch.parse(spec) for spec in _specs)
+
+    def prefetch_decorator(func: ListenerFunc) -> ListenerFunc:
+        setattr(func, "_listener_prefetch", prefetches)
+        return func
+
+    return prefetch_decorator
+
+
+def passive() -> Decorator:
+    """Marks the given listener as passive.
+
+    Passive listeners never stop the propagation of an event. They run
+    concurrently once all the guarding listeners are done, so they must not rely
+    on other listeners side effects nor on the event `matches` attribute.
+    """
+
+    def passive_decorator(func: ListenerFunc) -> ListenerFunc:
+        setattr(func, "_listener_passive", True)
+        return func
+
+    return passive_decorator
+
+
+def sheddable() -> Decorator:
+    """Marks the given listener as low priority.
+
+    Sheddable listeners are skipped while the bot is overloaded, only use it for
+    bookkeeping that can afford to miss some events.
+    """
+
+    def sheddable_decorator(func: ListenerFunc) -> ListenerFunc:
+        setattr(func, "_listener_sheddable", True)
+        return func
+
+    return sheddable_decorator
+
+
 class Listener:
     event: str
     func: Union[ListenerFunc, ListenerFunc]
     plugin: Any
     priority: int
     filters: Optional[Filter]
+    prefetch: Tuple[Prefetch, ...]
+    passive: bool
+    sheddable: bool
 
     def __init__(
         self,
@@ -56,12 +147,18 @@ class Listener:
         plugin: Any,
         prio: int,
         listener_filter: Optional[Filter] = None,
+        prefetch: Tuple[Prefetch, ...] = (),
+        passive: bool = False,
+        sheddable: bool = False,
     ) -> None:
         self.event = event
         self.func = func
         self.plugin = plugin
         self.priority = prio
         self.filters = listener_filter
+        self.prefetch = prefetch
+        self.passive = passive
+        self.sheddable = sheddable
 
     def __lt__(self, other: "Listener") -> bool:
         return self.priority < other.priority
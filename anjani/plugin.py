@@ -17,8 +17,19 @@
 import inspect
 import logging
 import os.path
-from typing import TYPE_CHECKING, Any, ClassVar, Coroutine, Optional
-
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    ClassVar,
+    Coroutine,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from pymongo import IndexModel
 from typing_extensions import final
 
 from anjani.util.tg import get_text
@@ -26,12 +37,20 @@ from anjani.util.tg import get_text
 if TYPE_CHECKING:
     from .core import Anjani
 
+# A field name, a list of (field, direction) or an IndexModel for anything else
+IndexSpec = Union[str, Sequence[Tuple[str, Any]], IndexModel]
+Indexes = Mapping[str, Sequence[IndexSpec]]
+
 
 class Plugin:
     # Class variables
     name: ClassVar[str] = "Unnamed"
     disabled: ClassVar[bool] = False
     helpable: ClassVar[bool] = False
+    # Name of the plugins whose load/start/stop listeners must run before ours
+    dependencies: ClassVar[Tuple[str, ...]] = ()
+    # Indexes our queries need, by collection name. Created in the background on load
+    indexes: ClassVar[Indexes] = {}
 
     # Instance variables
     bot: "Anjani"
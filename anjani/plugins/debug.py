@@ -14,6 +14,7 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import asyncio
 import inspect
 import io
 import os
@@ -30,6 +31,7 @@ from meval import meval
 from pyrogram.enums.chat_action import ChatAction
 
 from anjani import command, filters, plugin, util
+from anjani.core.profiler import ProfileSession
 
 
 class Debug(plugin.Plugin):
@@ -157,3 +159,60 @@ Time: {el_str}"""
             respond_text,
             parse_mode=pyrogram.enums.parse_mode.ParseMode.HTML,
         )
+
+    @command.filters(filters.dev_only)
+    async def cmd_profile(self, ctx: command.Context, duration: int = 30) -> Optional[str]:
+        """Profile the bot for the given seconds and send back the report"""
+        if self.bot.profiler is not None:
+            return "A profiling session is already running."
+
+        duration = min(max(duration, 1), 300)
+        session = ProfileSession()
+        try:
+            session.start()
+        except ValueError as e:
+            # Another profiler is already attached to the interpreter
+            return f"Unable to start profiling: {e}"
+
+        self.bot.profiler = session
+
+        # Don't hold the dispatch of this chat while profiling
+        self.bot.loop.create_task(self._finish_profile(ctx, session, duration))
+        return f"Profiling for {duration} seconds..."
+
+    @command.filters(filters.dev_only)
+    async def cmd_slowqueries(self, ctx: command.Context, count: int = 10) -> Optional[str]:
+        """Send the database query shapes with the slowest commands since startup"""
+        report = self.bot.query_monitor.format(min(max(count, 1), 100))
+        if report is None:
+            return "No database command recorded yet."
+
+        async with ctx.action(ChatAction.UPLOAD_DOCUMENT):
+            with io.BytesIO(str.encode(report)) as out_file:
+                out_file.name = "slow_queries.txt"
+                await ctx.msg.reply_document(
+                    document=out_file,
+                    caption=f"Top {count} slowest query shapes",
+                    disable_notification=True,
+                )
+
+        return None
+
+    async def _finish_profile(
+        self, ctx: command.Context, session: ProfileSession, duration: int
+    ) -> None:
+        try:
+            await asyncio.sleep(duration)
+        finally:
+            session.stop()
+            self.bot.profiler = None
+
+        report = await util.run_sync_in("cpu", session.report)
+        async with ctx.action(ChatAction.UPLOAD_DOCUMENT):
+            with io.BytesIO(str.encode(report)) as out_file:
+                out_file.name = "profile.txt"
+                await ctx.msg.reply_document(
+                    document=out_file,
+                    caption=f"Profile report of {duration} seconds",
+                    disable_notification=True,
+                )
@@ -55,15 +55,20 @@ from anjani import command, filters, listener, plugin, util
 class Federation(plugin.Plugin):
     name = "Federations"
     helpable = True
+    indexes = {
+        "FEDERATIONS": ["chats", "owner", "admins", "subscribers"],
+        "CHATS": ["chat_id"],
+    }
 
-    db: util.db.AsyncCollection
+    db: util.db.CachedCollection
     chat_db: util.db.AsyncCollection
 
     __fban_delay: float = 0.5
 
     async def on_load(self) -> None:
-        self.db = self.bot.db.get_collection("FEDERATIONS")
+        self.db = self.bot.db.get_collection("FEDERATIONS").cached(streams=self.bot.change_streams)
         self.chat_db = self.bot.db.get_collection("CHATS")
+        self.bot.chat_settings.register("CHATS", fields=("action_topic",))
 
     async def on_chat_migrate(self, message: Message) -> None:
         new_chat = message.chat.id
@@ -172,7 +177,10 @@ class Federation(plugin.Plugin):
             await self.fban_handler(chat, target, banned)
 
     async def get_action_topic(self, chat_id: int) -> Optional[int]:
-        data = await self.chat_db.find_one({"chat_id": chat_id}, {"action_topic": 1})
+        snapshot = self.bot.chat_settings.peek(chat_id)
+        if snapshot is None:
+            snapshot = await self.bot.chat_settings.load(chat_id)
+        data = snapshot.get("CHATS")
         return data.get("action_topic") if data else None
 
     @staticmethod
@@ -286,7 +294,12 @@ class Federation(plugin.Plugin):
                 channel_data["type"] = "chat"
                 return channel_data
 
-        data = await self.db.find_one(
+        # Most chats aren't in a federation, the cached lookup answers them
+        if not await self.get_fed_bychat(chat):
+            return None
+
+        # Looked up for every member, caching each of them would only churn the cache
+        data = await self.db.collection.find_one(
             {
                 "chats": chat,
                 "$or": [
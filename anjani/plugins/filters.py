@@ -38,13 +38,14 @@ from anjani.util.tg import Types, build_button, get_message_info
 class Filters(plugin.Plugin):
     name: ClassVar[str] = "Filters"
     helpable: ClassVar[bool] = True
+    indexes: ClassVar[plugin.Indexes] = {"FILTERS": ["chat_id"]}
 
-    db: util.db.AsyncCollection
+    db: util.db.CachedCollection
     trigger: MutableMapping[int, Set[str]] = {}
     SEND: MutableMapping[int, Callable[..., Coroutine[Any, Any, Optional[Message]]]]
 
     async def on_load(self) -> None:
-        self.db = self.bot.db.get_collection("FILTERS")
+        self.db = self.bot.db.get_collection("FILTERS").cached(streams=self.bot.change_streams)
         self.SEND = {
             Types.TEXT.value: self.bot.client.send_message,
             Types.BUTTON_TEXT.value: self.bot.client.send_message,
@@ -59,8 +60,9 @@ class Filters(plugin.Plugin):
         }
 
     async def on_start(self, _: int) -> None:
-        async for chat in self.db.find({}):
-            self.trigger[chat["chat_id"]] = set(chat["trigger"].keys())
+        async for batch in self.db.find({}, {"chat_id": True, "trigger": True}).batches():
+            for chat in batch:
+                self.trigger[chat["chat_id"]] = set(chat["trigger"].keys())
 
     async def on_plugin_backup(self, chat_id: int) -> MutableMapping[str, Any]:
         data = await self.db.find_one({"chat_id": chat_id}, {"_id": False})
@@ -15,10 +15,8 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import asyncio
-from functools import partial
-from typing import Any, ClassVar, MutableMapping, Optional
+from typing import Any, ClassVar, Mapping, MutableMapping, Optional
 
-from pymongo.errors import PyMongoError
 from pyrogram import emoji
 from pyrogram.enums.chat_type import ChatType
 from pyrogram.errors import MessageNotModified
@@ -42,44 +40,23 @@ class Language(plugin.Plugin):
 
     name: ClassVar[str] = "Language"
     helpable: ClassVar[bool] = True
+    indexes: ClassVar[plugin.Indexes] = {"LANGUAGE": ["chat_id"]}
 
     db: util.db.AsyncCollection
-    _db_stream: asyncio.Task[None]
 
-    def _start_db_stream(self) -> None:
-        # Cancel previous task if exists and it's not done
-        try:
-            if not self._db_stream.done():
-                self._db_stream.cancel()
-        except AttributeError:
-            pass
-
-        self._db_stream = self.bot.loop.create_task(self.db_stream())
-        self._db_stream.add_done_callback(
-            partial(self.bot.loop.call_soon_threadsafe, self._db_stream_callback)
-        )
-
-    def _db_stream_callback(self, future: asyncio.Future) -> None:
-        try:
-            future.result()
-        except asyncio.CancelledError:
-            pass
-        except PyMongoError as e:
-            self.log.error("MongoDB error:", exc_info=e)
-            self._start_db_stream()
-
-    async def db_stream(self) -> None:
-        async with self.db.watch(full_document="updateLookup") as cursor:
-            async for change in cursor:
-                document = change["fullDocument"]
-                self.bot.chats_languages[document["chat_id"]] = document["language"]
+    def _on_change(self, change: Mapping[str, Any]) -> None:
+        document = change.get("fullDocument")
+        if document:
+            self.bot.chats_languages[document["chat_id"]] = document["language"]
 
     async def on_load(self) -> None:
         self.db = self.bot.db.get_collection("LANGUAGE")
-        self._start_db_stream()
-
-    async def on_stop(self) -> None:
-        self._db_stream.cancel()
+        self.bot.change_streams.subscribe(
+            "LANGUAGE",
+            self._on_change,
+            operations=("insert", "replace", "update"),
+            full_document=True,
+        )
 
     async def on_chat_migrate(self, message: Message) -> None:
         new_chat = message.chat.id
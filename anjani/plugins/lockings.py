@@ -106,12 +106,14 @@ LOCK_TYPES = OrderedDict(
 class Lockings(plugin.Plugin):
     name: ClassVar[str] = "Lockings"
     helpable: ClassVar[bool] = True
+    indexes: ClassVar[plugin.Indexes] = {"LOCKINGS": ["chat_id"]}
 
     db: util.db.AsyncCollection
     restrictions: MutableMapping[str, MutableMapping[str, MutableMapping[str, bool]]]
 
     async def on_load(self) -> None:
         self.db = self.bot.db.get_collection("LOCKINGS")
+        self.bot.chat_settings.register("LOCKINGS")
         self.restrictions = {
             "lock": self.get_restrictions("lock"),
             "unlock": self.get_restrictions("unlock"),
@@ -274,8 +276,11 @@ class Lockings(plugin.Plugin):
         )
 
     async def get_chat_restrictions(self, chat_id: int) -> List[str]:
-        data = await self.db.find_one({"chat_id": chat_id}, {"type": 1})
-        return data["type"] if data else []
+        snapshot = self.bot.chat_settings.peek(chat_id)
+        if snapshot is None:
+            snapshot = await self.bot.chat_settings.load(chat_id)
+        data = snapshot.get("LOCKINGS")
+        return data.get("type", []) if data else []
 
     def unpack_permissions(
         self, permissions: MutableMapping[str, bool], mode: str, lock_type: str
@@ -297,6 +302,7 @@ class Lockings(plugin.Plugin):
             raise ValueError("Invalid mode")
 
         await self.db.update_one({"chat_id": chat_id}, {aggregation: {"type": types}}, upsert=True)
+        self.bot.chat_settings.invalidate(chat_id)
 
     @command.filters(filters.admin_only, aliases={"listlocks", "locks", "locked", "locklist"})
     async def cmd_list_locks(self, ctx: command.Context) -> str:
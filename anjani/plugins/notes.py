@@ -29,13 +29,14 @@ from anjani.util.tg import Types, build_button, get_message_info, revert_button
 class Notes(plugin.Plugin):
     name: ClassVar[str] = "Notes"
     helpable: ClassVar[bool] = True
+    indexes: ClassVar[plugin.Indexes] = {"NOTES": ["chat_id"]}
 
-    db: util.db.AsyncCollection
+    db: util.db.CachedCollection
     ACTION: MutableMapping[int, ChatAction]
     SEND: MutableMapping[int, Callable[..., Coroutine[Any, Any, Optional[Message]]]]
 
     async def on_load(self):
-        self.db = self.bot.db.get_collection("NOTES")
+        self.db = self.bot.db.get_collection("NOTES").cached(streams=self.bot.change_streams)
         self.ACTION = {
             Types.TEXT.value: ChatAction.TYPING,
             Types.BUTTON_TEXT.value: ChatAction.TYPING,
@@ -29,6 +29,7 @@ from anjani import command, filters, listener, plugin, util
 class Reporting(plugin.Plugin):
     name = "Reporting"
     helpable = True
+    indexes = {"CHAT_REPORTING": ["chat_id"]}
 
     db: util.db.AsyncCollection
     user_db: util.db.AsyncCollection
@@ -36,6 +37,7 @@ class Reporting(plugin.Plugin):
     async def on_load(self) -> None:
         self.db = self.bot.db.get_collection("CHAT_REPORTING")
         self.user_db = self.bot.db.get_collection("USER_REPORTING")
+        self.bot.chat_settings.register("CHAT_REPORTING", fields=("setting",))
 
     async def on_chat_migrate(self, message: Message) -> None:
         new_chat = message.chat.id
@@ -116,13 +118,17 @@ class Reporting(plugin.Plugin):
             return
 
         await self.db.update_one({"chat_id": chat_id}, {"$set": {"setting": setting}}, upsert=True)
+        self.bot.chat_settings.invalidate(chat_id)
 
     async def is_active(self, uid: int, is_private: bool) -> bool:
         """Get current setting default to True"""
         if is_private:
             data = await self.user_db.find_one({"_id": uid})
         else:
-            data = await self.db.find_one({"chat_id": uid})
+            snapshot = self.bot.chat_settings.peek(uid)
+            if snapshot is None:
+                snapshot = await self.bot.chat_settings.load(uid)
+            data = snapshot.get("CHAT_REPORTING")
         if not data:
             return True
 
@@ -35,6 +35,7 @@ from anjani import command, filters, listener, plugin, util
 class Restrictions(plugin.Plugin):
     name: ClassVar[str] = "Restriction"
     helpable: ClassVar[bool] = True
+    indexes: ClassVar[plugin.Indexes] = {"CHATS": ["chat_id"]}
 
     db: util.db.AsyncCollection
 
@@ -26,11 +26,12 @@ from anjani import command, filters, plugin, util
 class Rules(plugin.Plugin):
     name = "Rules"
     helpable = True
+    indexes = {"RULES": ["chat_id"]}
 
-    db: util.db.AsyncCollection
+    db: util.db.CachedCollection
 
     async def on_load(self) -> None:
-        self.db = self.bot.db.get_collection("RULES")
+        self.db = self.bot.db.get_collection("RULES").cached(streams=self.bot.change_streams)
 
     async def on_chat_migrate(self, message: Message) -> None:
         new_chat = message.chat.id
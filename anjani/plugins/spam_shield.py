@@ -17,7 +17,7 @@
 import asyncio
 from datetime import datetime
 from json import JSONDecodeError
-from typing import Any, ClassVar, List, MutableMapping, Optional
+from typing import Any, ClassVar, List, MutableMapping, Optional, Tuple
 
 from aiohttp import (
     ClientConnectorError,
@@ -45,7 +45,10 @@ from anjani.util.misc import StopPropagation
 
 class SpamShield(plugin.Plugin):
     name: ClassVar[str] = "SpamShield"
+    # SpamPredict unloads itself when it is not configured
+    dependencies: ClassVar[Tuple[str, ...]] = ("SpamPredict",)
     helpable: ClassVar[bool] = True
+    indexes: ClassVar[plugin.Indexes] = {"GBAN_SETTINGS": ["chat_id"]}
 
     db: util.db.AsyncCollection
     federation_db: util.db.AsyncCollection
@@ -61,6 +64,7 @@ class SpamShield(plugin.Plugin):
         self.federation_db = self.bot.db.get_collection("FEDERATIONS")
         self.user_db = self.bot.db.get_collection("USERS")
         self.spam_protection = "SpamPredict" in self.bot.plugins
+        self.bot.chat_settings.register("GBAN_SETTINGS", fields=("setting",))
 
     async def on_chat_migrate(self, message: Message) -> None:
         new_chat = message.chat.id
@@ -103,6 +107,7 @@ class SpamShield(plugin.Plugin):
 
     @listener.priority(65)
     @listener.filters(filters.group & ~filters.outgoing)
+    @listener.prefetch("USERS:_id={from_user.id}[pred_sample,spam]")
     async def on_message(self, message: Message) -> None:
         """Checker service for message"""
         chat = message.chat
@@ -116,7 +121,9 @@ class SpamShield(plugin.Plugin):
             return
 
         if self.spam_protection:
-            sample = await self.user_db.find_one({"_id": user.id}, {"pred_sample": 1, "spam": 1})
+            sample = await self.bot.event_context.find_one(
+                "USERS", "_id", user.id, {"pred_sample": 1, "spam": 1}
+            )
             if sample and not sample.get("spam", False):
                 trust = get_trust(sample.get("pred_sample", []))
                 if trust and trust < 5.0:
@@ -231,7 +238,10 @@ class SpamShield(plugin.Plugin):
 
     async def is_active(self, chat_id: int) -> bool:
         """Return SpamShield setting"""
-        data = await self.db.find_one({"chat_id": chat_id})
+        snapshot = self.bot.chat_settings.peek(chat_id)
+        if snapshot is None:
+            snapshot = await self.bot.chat_settings.load(chat_id)
+        data = snapshot.get("GBAN_SETTINGS")
         return data["setting"] if data else True
 
     async def ban(self, chat: Chat, user: User, reason: str) -> None:
@@ -259,6 +269,8 @@ class SpamShield(plugin.Plugin):
         else:
             await self.db.delete_one({"chat_id": chat_id})
 
+        self.bot.chat_settings.invalidate(chat_id)
+
     async def check(self, user: User, chat: Chat, message: Message) -> bool:
         """Shield checker action."""
         cas, sw, spam = await asyncio.gather(
@@ -89,16 +89,20 @@ class Staff(plugin.Plugin):
     @command.filters(filters.staff_only)
     async def cmd_chatlist(self, ctx: command.Context, get_all: Optional[bool] = False) -> None:
         """Send file of chat's I'm in"""
-        chatfile = "List of chats.\n"
-        async for chat in self.db.find({}, {"chat_id": 1, "chat_name": 1, "type": 1}):
-            if not get_all and chat.get("type") == "channel":
-                continue
+        lines = ["List of chats."]
+        cursor = self.db.find({}, {"chat_id": 1, "chat_name": 1, "type": 1})
+        async for batch in cursor.batches():
+            for chat in batch:
+                if not get_all and chat.get("type") == "channel":
+                    continue
+
+                name = chat.get("chat_name")
+                if not name:
+                    name = "[NO CHAT NAME]"
 
-            name = chat.get("chat_name")
-            if not name:
-                name = "[NO CHAT NAME]"
+                lines.append(f"{name} | ({chat['chat_id']})")
 
-            chatfile += f"{name} | ({chat['chat_id']})\n"
+        chatfile = "\n".join(lines) + "\n"
 
         with BytesIO(str.encode(chatfile)) as output:
             output.name = "chatlist.txt"
@@ -15,12 +15,13 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import asyncio
-from typing import Any, ClassVar, List, Mapping, Optional
+from collections import Counter
+from typing import Any, ClassVar, List, Mapping, MutableMapping, Optional
 
 from pyrogram.enums.parse_mode import ParseMode
 from pyrogram.types import Message
 
-from anjani import command, filters, plugin, util
+from anjani import command, filters, listener, plugin, util
 
 USEC_PER_HOUR = 60 * 60 * 1000000
 USEC_PER_DAY = USEC_PER_HOUR * 24
@@ -45,51 +46,102 @@ def _calc_pd(stat: int, uptime: int) -> str:
 
 class PluginStats(plugin.Plugin):
     name: ClassVar[str] = "Stats"
+    flush_interval: ClassVar[float] = 5
 
     db: util.db.AsyncCollection
+    writer: util.db.BulkWriter
+    counters: "Counter[str]"
+    start_time_usec: Optional[int]
+
+    _flush_task: Optional["asyncio.Task[None]"]
 
     async def on_load(self) -> None:
         self.db = self.bot.db.get_collection("STATS")
+        self.writer = self.db.buffered()
+        # Increments waiting for the next flush, written as a single $inc
+        self.counters = Counter()
+        self._flush_task = None
         self.chats_db = self.bot.db.get_collection("CHATS")
         self.users_db = self.bot.db.get_collection("USERS")
         self.feds_db = self.bot.db.get_collection("FEDERATIONS")
 
-        if await self.get("stop_time_usec") or await self.get("uptime"):
-            self.log.info("Migrating stats timekeeping format")
+        # Read the stats once and migrate them in a single write
+        stats = await self.db.find_one({"_id": 1}) or {}
+        self.start_time_usec = stats.get("start_time_usec")
+
+        last_time = stats.get("stop_time_usec")
+        uptime = stats.get("uptime")
+        if not last_time and not uptime:
+            return
 
-        last_time = await self.get("stop_time_usec")
+        self.log.info("Migrating stats timekeeping format")
         if last_time:
-            await self.inc("uptime", util.time.usec() - last_time)
-            await self.delete("stop_time_usec")
+            uptime = (uptime or 0) + util.time.usec() - last_time
 
-        uptime = await self.get("uptime")
+        update: MutableMapping[str, Any] = {"$unset": {"stop_time_usec": "", "uptime": ""}}
         if uptime:
-            await self.put("start_time_usec", self.bot.start_time_us - uptime)
-            await self.delete("uptime")
+            self.start_time_usec = util.time.usec() - uptime
+            update["$set"] = {"start_time_usec": self.start_time_usec}
+
+        await self.db.update_one({"_id": 1}, update)
 
     async def on_start(self, time_us: int) -> None:
         # Initialize start_time_usec for new instances
-        if not await self.get("start_time_usec"):
+        if not self.start_time_usec:
+            self.start_time_usec = time_us
             await self.put("start_time_usec", time_us)
 
+        if self._flush_task is None:
+            self._flush_task = self.bot.loop.create_task(self._flush_periodically())
+
+    async def on_stop(self) -> None:
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+
+        # The buffered writer is flushed once the updates stopped coming in
+        await self.flush_counters()
+
     async def on_stat_listen(self, key: str, value: int) -> None:
         await self.inc(key, value)
 
+    @listener.passive()
+    @listener.sheddable()
     async def on_message(self, message: Message) -> None:
-        stat = "sent" if message.outgoing else "received"
-        await self.bot.log_stat(stat)
+        # Counted here directly, this runs for every message
+        await self.inc("sent" if message.outgoing else "received", 1)
 
     async def on_command(
         self, ctx: command.Context, cmd: command.Command  # skipcq: PYL-W0613
     ) -> None:
-        await self.bot.log_stat("processed")
+        await self.inc("processed", 1)
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush_counters()
+
+    async def flush_counters(self) -> None:
+        """Hand the pending increments to the buffered writer as one $inc"""
+        if not self.counters:
+            return
+
+        counters, self.counters = self.counters, Counter()
+        await self.writer.update_one({"_id": 1}, {"$inc": dict(counters)}, upsert=True)
 
     async def get(self, key: str) -> Optional[Any]:
         collection = await self.db.find_one({"_id": 1})
         return collection.get(key) if collection else None
 
     async def inc(self, key: str, value: int) -> None:
-        await self.db.update_one({"_id": 1}, {"$inc": {key: value}}, upsert=True)
+        self.counters[key] += value
+        if self._flush_task is None:
+            # Stopping, nothing flushes the counters anymore
+            await self.flush_counters()
 
     async def delete(self, key: str) -> None:
         await self.db.update_one({"_id": 1}, {"$unset": {key: ""}})
@@ -99,45 +151,41 @@ class PluginStats(plugin.Plugin):
 
     @command.filters(filters.dev_only & filters.private)
     async def cmd_stats(self, ctx: command.Context) -> None:
+        await self.flush_counters()
+        await self.writer.flush()
         if ctx.input == "reset":
             await self.db.delete_many({})
-            await self.on_load()
+            self.start_time_usec = None
             await self.on_start(util.time.usec())
             self.bot.loop.create_task(util.tg.reply_and_delete(ctx.msg, "Stats reset", 5))
             return None
 
-        start_time: Optional[int] = await self.get("start_time_usec")
+        # The collection sizes come from the metadata the server maintains, no scan
+        stats, total_users, total_chats = await asyncio.gather(
+            self.db.find_one({"_id": 1}),
+            self.users_db.estimated_document_count(),
+            self.chats_db.estimated_document_count(),
+        )
+        stats = stats or {}
+
+        start_time: Optional[int] = stats.get("start_time_usec")
         if start_time is None:
             start_time = util.time.usec()
             await self.put("start_time_usec", start_time)
 
         uptime = util.time.usec() - start_time
-        resp = await asyncio.gather(
-            self.get("downtime"),
-            self.get("received"),
-            self.get("processed"),
-            self.get("predicted"),
-            self.get("spam_detected"),
-            self.get("spam_deleted"),
-            self.get("banned"),
-            self.users_db.count_documents({}),
-            self.chats_db.count_documents({}),
+        downtime, recv, processed, predicted, spam_detected, spam_deleted, banned = (
+            stats.get(key) or 0
+            for key in (
+                "downtime",
+                "received",
+                "processed",
+                "predicted",
+                "spam_detected",
+                "spam_deleted",
+                "banned",
+            )
         )
-        for index, stat in enumerate(resp):
-            if stat is None:
-                resp[index] = 0
-
-        (
-            downtime,
-            recv,
-            processed,
-            predicted,
-            spam_detected,
-            spam_deleted,
-            banned,
-            total_users,
-            total_chats,
-        ) = resp
         total_federations = 0
         total_fbanned = 0
         total_chat_fbanned = 0
@@ -24,6 +24,7 @@ from anjani import command, filters, listener, plugin, util
 class Topics(plugin.Plugin):
     name: ClassVar[str] = "Topic"
     helpable: ClassVar[bool] = True
+    indexes: ClassVar[plugin.Indexes] = {"CHATS": ["chat_id"]}
 
     db: util.db.AsyncCollection
 
@@ -58,6 +59,7 @@ class Topics(plugin.Plugin):
             {"$set": {"action_topic": ctx.msg.message_thread_id}},
             upsert=True,
         )
+        self.bot.chat_settings.invalidate(ctx.chat.id)
         return await self.text(ctx.chat.id, "topic-set")
 
     @command.filters(filters.can_manage_topic)
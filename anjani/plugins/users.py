@@ -19,7 +19,7 @@ import re
 from hashlib import md5
 from html import escape
 from time import time
-from typing import Any, ClassVar, List, Mapping, MutableMapping, Optional, Union
+from typing import Any, ClassVar, List, Mapping, MutableMapping, Optional, Tuple, Union
 
 from pyrogram.enums.chat_action import ChatAction
 from pyrogram.enums.chat_type import ChatType
@@ -37,14 +37,22 @@ except ImportError:
 
 class Users(plugin.Plugin):
     name: ClassVar[str] = "Users"
+    # SpamPredict unloads itself when it is not configured
+    dependencies: ClassVar[Tuple[str, ...]] = ("SpamPredict",)
+    indexes: ClassVar[plugin.Indexes] = {"CHATS": ["chat_id", "hash"], "USERS": ["hash", "chats"]}
 
     chats_db: util.db.AsyncCollection
     users_db: util.db.AsyncCollection
+    # Every message updates its chat and sender, these are merged and written in bulk
+    chats_writer: util.db.BulkWriter
+    users_writer: util.db.BulkWriter
     predict_loaded: bool
 
     async def on_load(self) -> None:
         self.chats_db = self.bot.db.get_collection("CHATS")
         self.users_db = self.bot.db.get_collection("USERS")
+        self.chats_writer = self.chats_db.buffered()
+        self.users_writer = self.users_db.buffered()
         self.predict_loaded = "SpamPredict" in self.bot.plugins
 
     def hash_id(self, id: int) -> str:
@@ -120,6 +128,9 @@ class Users(plugin.Plugin):
         await self.users_db.update_one({"_id": user.id}, {"$set": set_content})
 
     @listener.priority(50)
+    @listener.passive()
+    @listener.sheddable()
+    @listener.prefetch("USERS:_id={from_user.id}[hash]", "CHATS:chat_id={chat.id}[hash]")
     async def on_message(self, message: Message) -> None:
         """Incoming message handler."""
         if message.outgoing:
@@ -137,7 +148,7 @@ class Users(plugin.Plugin):
             "name": user.first_name,
             "last_seen": int(time()),
         }
-        user_data = await self.users_db.find_one({"_id": user.id})
+        user_data = await self.bot.event_context.find_one("USERS", "_id", user.id, {"hash": 1})
 
         if chat.type == ChatType.PRIVATE:
             if self.predict_loaded:
@@ -149,11 +160,11 @@ class Users(plugin.Plugin):
                     tasks.append(await self.build_user_task(usr))
 
             await asyncio.gather(
-                self.users_db.update_one({"_id": user.id}, {"$set": set_content}), *tasks
+                self.users_writer.update_one({"_id": user.id}, {"$set": set_content}), *tasks
             )
             return
 
-        chat_data = await self.chats_db.find_one({"chat_id": chat.id})
+        chat_data = await self.bot.event_context.find_one("CHATS", "chat_id", chat.id, {"hash": 1})
         chat_update = {
             "$set": {
                 "chat_name": chat.title,
@@ -180,8 +191,8 @@ class Users(plugin.Plugin):
             update = {"$set": set_content, "$addToSet": {"chats": chat.id}}
 
         await asyncio.gather(
-            self.users_db.update_one({"_id": user.id}, update, upsert=True),
-            self.chats_db.update_one({"chat_id": chat.id}, chat_update, upsert=True),
+            self.users_writer.update_one({"_id": user.id}, update, upsert=True),
+            self.chats_writer.update_one({"chat_id": chat.id}, chat_update, upsert=True),
             *tasks,
         )
 
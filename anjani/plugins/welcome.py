@@ -54,14 +54,19 @@ from anjani.util.tg import (
 class Greeting(plugin.Plugin):
     name: ClassVar[str] = "Greetings"
     helpable: ClassVar[bool] = True
+    indexes: ClassVar[plugin.Indexes] = {"WELCOME": ["chat_id"]}
 
-    db: util.db.AsyncCollection
+    db: util.db.CachedCollection
     chat_db: util.db.AsyncCollection
     SEND: MutableMapping[int, Callable[..., Coroutine[Any, Any, Optional[Message]]]]
 
     async def on_load(self) -> None:
-        self.db = self.bot.db.get_collection("WELCOME")
+        self.db = self.bot.db.get_collection("WELCOME").cached(streams=self.bot.change_streams)
         self.chat_db = self.bot.db.get_collection("CHATS")
+        self.bot.chat_settings.register(
+            "WELCOME", fields=("clean_service", "should_goodbye", "should_welcome")
+        )
+        self.bot.chat_settings.register("CHATS", fields=("action_topic",))
 
         self.SEND = {
             Types.TEXT.value: self.bot.client.send_message,
@@ -251,17 +256,26 @@ class Greeting(plugin.Plugin):
     async def get_action_topic(self, chat: Chat) -> Optional[int]:
         if not chat.is_forum:
             return None
-        data = await self.chat_db.find_one({"chat_id": chat.id}, {"action_topic": True})
+        snapshot = self.bot.chat_settings.peek(chat.id)
+        if snapshot is None:
+            snapshot = await self.bot.chat_settings.load(chat.id)
+        data = snapshot.get("CHATS")
         return data.get("action_topic") if data else None
 
     async def is_welcome(self, chat_id: int) -> bool:
         """Get chat welcome setting"""
-        active = await self.db.find_one({"chat_id": chat_id}, {"should_welcome": 1})
+        snapshot = self.bot.chat_settings.peek(chat_id)
+        if snapshot is None:
+            snapshot = await self.bot.chat_settings.load(chat_id)
+        active = snapshot.get("WELCOME")
         return active.get("should_welcome", True) if active else True
 
     async def is_goodbye(self, chat_id: int) -> bool:
         """Get chat welcome setting"""
-        active = await self.db.find_one({"chat_id": chat_id}, {"should_goodbye": 1})
+        snapshot = self.bot.chat_settings.peek(chat_id)
+        if snapshot is None:
+            snapshot = await self.bot.chat_settings.load(chat_id)
+        active = snapshot.get("WELCOME")
         return active.get("should_goodbye", True) if active else True
 
     async def welc_message(
@@ -307,7 +321,10 @@ class Greeting(plugin.Plugin):
 
     async def clean_service(self, chat_id: int) -> bool:
         """Fetch clean service setting"""
-        clean = await self.db.find_one({"chat_id": chat_id}, {"clean_service": 1})
+        snapshot = self.bot.chat_settings.peek(chat_id)
+        if snapshot is None:
+            snapshot = await self.bot.chat_settings.load(chat_id)
+        clean = snapshot.get("WELCOME")
         if clean:
             return clean.get("clean_service", True)
 
@@ -365,6 +382,8 @@ class Greeting(plugin.Plugin):
         else:
             await self.db.update_one({"chat_id": chat_id}, {"$unset": {key: ""}}, upsert=True)
 
+        self.bot.chat_settings.invalidate(chat_id)
+
     async def previous_welcome(
         self, chat_id: int, msg_id: int, is_bulk: bool = False
     ) -> Union[int, List[int], None]:
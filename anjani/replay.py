@@ -0,0 +1,347 @@
+"""Anjani update replay"""
+# Copyright (C) 2020 - 2023  UserbotIndo Team, <https://github.com/userbotindo.git>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import argparse
+import asyncio
+import logging
+import os
+from collections import Counter
+from time import perf_counter, time
+from typing import Any, List, MutableMapping, Optional
+
+from pyrogram import raw, types
+from pyrogram.client import Client
+from pyrogram.enums.parse_mode import ParseMode
+from pyrogram.raw.core import TLObject
+
+from . import util
+from .core import Anjani
+from .core.profiler import ProfileSession
+from .core.update_recorder import RecordedUpdate, read_recording
+from .util.config import Config
+from .util.db.memory import MemoryDatabase
+from .util.db.sqlite import SQLiteDatabase
+
+
+class ReplayClient(Client):
+    """Pyrogram client that never touches the network.
+
+    Every API call is counted and answered after an optional simulated round
+    trip. Members are regular members, sent messages succeed and anything else
+    gets an empty result.
+    """
+
+    api_calls: "Counter[str]"
+    api_latency: float
+
+    _chats: MutableMapping[int, raw.types.Channel]
+    _message_id: int
+    _raw_me: raw.types.User
+    _users: MutableMapping[int, raw.types.User]
+
+    def __init__(self, me: raw.types.User, *, workers: int, api_latency: float = 0) -> None:
+        super().__init__(
+            name="replay",
+            api_id=0,
+            api_hash="replay",
+            in_memory=True,
+            workers=workers,
+            parse_mode=ParseMode.MARKDOWN,
+        )
+
+        self.api_calls = Counter()
+        self.api_latency = api_latency
+        self.me = types.User._parse(self, me)
+
+        self._chats = {}
+        self._message_id = 0
+        self._raw_me = me
+        self._users = {}
+
+    async def start(self) -> "ReplayClient":  # type: ignore
+        await self.storage.open()
+        self.is_connected = True
+        self.is_initialized = True
+        await self.dispatcher.start()
+        return self
+
+    async def stop(self, block: bool = True) -> "ReplayClient":  # type: ignore
+        await self.dispatcher.stop()
+        self.is_initialized = False
+        self.is_connected = False
+        await self.storage.close()
+        return self
+
+    async def get_me(self) -> types.User:  # type: ignore
+        return self.me
+
+    async def fetch_peers(self, peers: List[Any]) -> bool:
+        for peer in peers:
+            if isinstance(peer, raw.types.User):
+                self._users[peer.id] = peer
+            elif isinstance(peer, raw.types.Channel):
+                self._chats[peer.id] = peer
+
+        return await super().fetch_peers(peers)
+
+    async def invoke(self, query: TLObject, *args: Any, **kwargs: Any) -> Any:  # type: ignore
+        self.api_calls[query.QUALNAME] += 1
+        if self.api_latency:
+            await asyncio.sleep(self.api_latency)
+
+        if isinstance(query, raw.functions.messages.SendMessage):
+            return self._sent_message(query)
+        if isinstance(query, raw.functions.channels.GetParticipant):
+            user_id = getattr(query.participant, "user_id", 0)
+            return raw.types.channels.ChannelParticipant(
+                participant=raw.types.ChannelParticipant(user_id=user_id, date=0),
+                chats=[],
+                users=[self._users[user_id]] if user_id in self._users else [],
+            )
+
+        return raw.types.Updates(updates=[], users=[], chats=[], date=int(time()), seq=0)
+
+    def _sent_message(self, query: raw.functions.messages.SendMessage) -> TLObject:
+        self._message_id += 1
+        channel_id = getattr(query.peer, "channel_id", None)
+        if channel_id is None:
+            return raw.types.UpdateShortSentMessage(
+                id=self._message_id, pts=0, pts_count=0, date=int(time())
+            )
+
+        # Channels get the whole message back, like Telegram does
+        message = raw.types.Message(
+            id=self._message_id,
+            peer_id=raw.types.PeerChannel(channel_id=channel_id),
+            date=int(time()),
+            message=query.message,
+            out=True,
+            from_id=raw.types.PeerUser(user_id=self._raw_me.id),
+            entities=query.entities or [],
+        )
+        return raw.types.Updates(
+            updates=[raw.types.UpdateNewChannelMessage(message=message, pts=0, pts_count=0)],
+            users=[self._raw_me],
+            chats=[self._chats[channel_id]] if channel_id in self._chats else [],
+            date=int(time()),
+            seq=0,
+        )
+
+
+class ReplayBot(Anjani):
+    """Bot wired to a :obj:`~ReplayClient` and an in-memory or SQLite database"""
+
+    me: raw.types.User
+    api_latency: float
+    sqlite_path: Optional[str]
+
+    def __init__(
+        self,
+        config: Config,
+        me: raw.types.User,
+        *,
+        api_latency: float = 0,
+        sqlite_path: Optional[str] = None,
+    ) -> None:
+        self.me = me
+        self.api_latency = api_latency
+        self.sqlite_path = sqlite_path
+
+        super().__init__(config)
+
+    def init_database(self) -> MemoryDatabase:  # type: ignore
+        if self.sqlite_path is not None:
+            return SQLiteDatabase(self.sqlite_path)
+
+        return MemoryDatabase()
+
+    async def init_client(self) -> None:
+        self.owner = int(self.config.OWNER_ID)
+        self.client = ReplayClient(
+            self.me, workers=self.config.WORKERS, api_latency=self.api_latency
+        )
+
+
+def _replay_config() -> Config:
+    # Only the values the bot can't start without, the rest comes from the environment
+    for key, value in {"API_ID": "1", "API_HASH": "replay", "BOT_TOKEN": "replay"}.items():
+        os.environ.setdefault(key, value)
+    os.environ.setdefault("DB_URI", "mongodb://replay")
+
+    config = Config()
+    # Nothing may leave the process
+    config.LOG_CHANNEL = None
+    config.ALERT_LOG = None
+    config.SW_API = None
+    config.HEALTH_CHECK_WEBHOOK_URL = None
+    config.UPDATE_RECORD_PATH = None
+    config.FEATURE_FLAG.append("disable_catchup")
+    return config
+
+
+async def replay(
+    path: str,
+    *,
+    speed: float = 0,
+    window: int = 100,
+    api_latency: float = 0,
+    call_graph: bool = False,
+    sqlite_path: Optional[str] = None,
+) -> str:
+    """Feed a recording through the bot and return the report.
+
+    Parameters:
+        path (`str`):
+            Recording written by the :obj:`~UpdateRecorder`.
+        speed (`float`, *Optional*):
+            Playback speed relative to the recorded timing, 0 feeds as fast as
+            the bot keeps up.
+        window (`int`, *Optional*):
+            Maximum number of updates waiting on the pyrogram dispatcher.
+        api_latency (`float`, *Optional*):
+            Simulated round trip of every Telegram API call, in seconds.
+        call_graph (`bool`, *Optional*):
+            Include the cProfile call sites in the report.
+        sqlite_path (`str`, *Optional*):
+            Run on a :obj:`~SQLiteDatabase` stored at this path instead of in memory.
+    """
+    me, updates = read_recording(path)
+    if me is None:
+        me = raw.types.User(id=1, is_self=True, bot=True, first_name="Anjani", username="anjani")
+
+    bot = ReplayBot(_replay_config(), me, api_latency=api_latency, sqlite_path=sqlite_path)
+    try:
+        await bot.start()
+        client: ReplayClient = bot.client  # type: ignore
+        db: MemoryDatabase = bot.db  # type: ignore
+
+        # Only count what the traffic costs, not the startup
+        client.api_calls.clear()
+        db.op_counts.clear()
+        bot.profiler = ProfileSession(call_graph=call_graph)
+        bot.profiler.start()
+
+        elapsed = await _feed(client, bot, updates, speed=speed, window=window)
+        # Count the buffered writes the traffic left behind
+        await util.db.bulk_writer.flush_all()
+
+        bot.profiler.stop()
+        report = bot.profiler.report()
+        bot.profiler = None
+    finally:
+        await bot.stop()
+
+    lines = [
+        f"Replayed {len(updates)} updates in {elapsed:.2f}s "
+        f"({len(updates) / elapsed if elapsed else 0:.1f} updates/s)",
+        "",
+        report.rstrip("\n"),
+        "",
+        "Database operations",
+        *(f"  {coll}.{op}: {count}" for (coll, op), count in db.op_counts.most_common()),
+        "",
+        "Telegram API calls",
+        *(f"  {name}: {count}" for name, count in client.api_calls.most_common()),
+    ]
+    return "\n".join(lines) + "\n"
+
+
+async def _feed(
+    client: ReplayClient,
+    bot: ReplayBot,
+    updates: List[RecordedUpdate],
+    *,
+    speed: float,
+    window: int,
+) -> float:
+    queue = client.dispatcher.updates_queue
+    first = updates[0].timestamp if updates else 0
+    start = perf_counter()
+
+    for update in updates:
+        if speed > 0:
+            delay = (update.timestamp - first) / speed - (perf_counter() - start)
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+        while queue.qsize() >= window:
+            await asyncio.sleep(0.001)
+
+        # The real client stores the peers before dispatching
+        await client.fetch_peers([*update.users.values(), *update.chats.values()])
+        queue.put_nowait((update.update, update.users, update.chats))
+
+    # Stopping the dispatcher waits for the workers to drain the queue
+    await client.dispatcher.stop()
+    await bot.update_shards.join()
+    return perf_counter() - start
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m anjani.replay",
+        description="Replay recorded updates against an offline bot and report the throughput",
+    )
+    parser.add_argument("path", help="update recording, see UPDATE_RECORD_PATH")
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=0,
+        help="playback speed relative to the recording, defaults to 0 (as fast as possible)",
+    )
+    parser.add_argument(
+        "--window", type=int, default=100, help="maximum updates waiting to be dispatched"
+    )
+    parser.add_argument(
+        "--api-latency",
+        type=float,
+        default=0,
+        help="simulated Telegram round trip in milliseconds",
+    )
+    parser.add_argument("--call-graph", action="store_true", help="include cProfile call sites")
+    parser.add_argument(
+        "--sqlite",
+        metavar="PATH",
+        help="run on a SQLite database file (or :memory:) instead of the in-memory one",
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.WARNING, format="  %(levelname)-8s  |  %(name)-15s  |  %(message)s"
+    )
+    logging.getLogger("pyrogram").setLevel(logging.ERROR)
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        report = loop.run_until_complete(
+            replay(
+                args.path,
+                speed=args.speed,
+                window=args.window,
+                api_latency=args.api_latency / 1000,
+                call_graph=args.call_graph,
+                sqlite_path=args.sqlite,
+            )
+        )
+    finally:
+        loop.close()
+
+    print(report, end="")
+
+
+if __name__ == "__main__":
+    main()
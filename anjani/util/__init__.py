@@ -16,12 +16,12 @@
 
 from . import (  # skipcq: PY-W2000
     async_helper,
-    cache_limiter,
     config,
     converter,
     db,
     error,
     misc,
+    rate_limiter,
     system,
     tg,
     time,
@@ -29,3 +29,4 @@ from . import (  # skipcq: PY-W2000
 )
 
 run_sync = async_helper.run_sync
+run_sync_in = async_helper.run_sync_in
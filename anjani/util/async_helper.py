@@ -15,14 +15,73 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import asyncio
+import contextvars
 import functools
-from typing import Any, Callable, TypeVar
+from concurrent.futures import Executor
+from time import perf_counter
+from typing import Any, Callable, Generic, MutableMapping, Optional, TypeVar
 
 Result = TypeVar("Result")
 
+_executors: MutableMapping[str, Executor] = {}
+
+# When the sync call running in this context was handed to its executor
+submitted_at: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar(
+    "submitted_at", default=None
+)
+
+
+class ContextCall(Generic[Result]):
+    """Sync call running in a copy of the caller context, like `asyncio.to_thread`"""
+
+    __slots__ = ("context", "func")
+
+    context: contextvars.Context
+    func: Callable[[], Result]
+
+    def __init__(self, func: Callable[[], Result]) -> None:
+        self.context = contextvars.copy_context()
+        self.context.run(submitted_at.set, perf_counter())
+        self.func = func
+
+    def __call__(self) -> Result:
+        return self.context.run(self.func)
+
+
+def set_executor(name: str, executor: Executor) -> None:
+    """Register a named executor to be used by `run_sync_in`"""
+    _executors[name] = executor
+
+
+def get_executor(name: str) -> Optional[Executor]:
+    """Return a named executor, None (the loop default executor) if it's not registered"""
+    return _executors.get(name)
+
+
+def shutdown_executors(wait: bool = True) -> None:
+    """Shutdown every named executor, later calls fall back to the default executor"""
+    while _executors:
+        _, executor = _executors.popitem()
+        executor.shutdown(wait=wait)
+
 
 async def run_sync(func: Callable[..., Result], *args: Any, **kwargs: Any) -> Result:
     """Runs the given sync function (optionally with arguments) on a separate thread."""
 
     loop = asyncio.get_event_loop()
-    return await loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
+    return await loop.run_in_executor(None, ContextCall(functools.partial(func, *args, **kwargs)))
+
+
+async def run_sync_in(
+    executor: str, func: Callable[..., Result], *args: Any, **kwargs: Any
+) -> Result:
+    """Runs the given sync function (optionally with arguments) on a named executor.
+
+    Known executors are `db` for database calls, `cpu` for parsing and formatting,
+    and `io` for blocking file work.
+    """
+
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(
+        _executors.get(executor), ContextCall(functools.partial(func, *args, **kwargs))
+    )
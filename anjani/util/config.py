@@ -13,9 +13,23 @@ class Config:
     BOT_TOKEN: str
     OWNER_ID: int
     WORKERS: int
+    DISPATCH_SHARDS: int
+    DISPATCH_QUEUE_SIZE: int
+    DISPATCH_OVERFLOW: str
+    DISPATCH_DRAIN_TIMEOUT: float
+    LOOP_BLOCK_THRESHOLD: float
+    ADMISSION_BACKLOG_HIGH: int
+    ADMISSION_LAG_HIGH: float
+    CATCHUP_RATE: float
+    CATCHUP_HIGH_WATERMARK: int
+    CATCHUP_SERVICE_MAX_AGE: float
+    UPDATE_RECORD_PATH: Optional[str]
     DOWNLOAD_PATH: Optional[str]
 
     DB_URI: str
+    DB_BATCH_SIZE: int
+    DB_SLOW_QUERY_THRESHOLD: float
+    DB_BACKEND: str
 
     SW_API: Optional[str]
     LOG_CHANNEL: Optional[str]
@@ -43,9 +57,23 @@ class Config:
         self.BOT_TOKEN = getenv("BOT_TOKEN", "")
         self.OWNER_ID = int(getenv("OWNER_ID", 0))
         self.WORKERS = int(getenv("WORKERS", min(32, (cpu_count() or 0) + 4)))
+        self.DISPATCH_SHARDS = int(getenv("DISPATCH_SHARDS", self.WORKERS))
+        self.DISPATCH_QUEUE_SIZE = int(getenv("DISPATCH_QUEUE_SIZE", 100))
+        self.DISPATCH_OVERFLOW = getenv("DISPATCH_OVERFLOW", "spill").lower()
+        self.DISPATCH_DRAIN_TIMEOUT = float(getenv("DISPATCH_DRAIN_TIMEOUT", 10))
+        self.LOOP_BLOCK_THRESHOLD = float(getenv("LOOP_BLOCK_THRESHOLD", 1.0))
+        self.ADMISSION_BACKLOG_HIGH = int(getenv("ADMISSION_BACKLOG_HIGH", 1000))
+        self.ADMISSION_LAG_HIGH = float(getenv("ADMISSION_LAG_HIGH", 0.5))
+        self.CATCHUP_RATE = float(getenv("CATCHUP_RATE", 50))
+        self.CATCHUP_HIGH_WATERMARK = int(getenv("CATCHUP_HIGH_WATERMARK", 100))
+        self.CATCHUP_SERVICE_MAX_AGE = float(getenv("CATCHUP_SERVICE_MAX_AGE", 10))
+        self.UPDATE_RECORD_PATH = getenv("UPDATE_RECORD_PATH")
         self.DOWNLOAD_PATH = getenv("DOWNLOAD_PATH", "./downloads")
 
         self.DB_URI = getenv("DB_URI", "")
+        self.DB_BATCH_SIZE = int(getenv("DB_BATCH_SIZE", 0))
+        self.DB_SLOW_QUERY_THRESHOLD = float(getenv("DB_SLOW_QUERY_THRESHOLD", 0.1))
+        self.DB_BACKEND = getenv("DB_BACKEND", "thread").lower()
 
         self.LOG_CHANNEL = getenv("LOG_CHANNEL")
         self.ALERT_LOG = getenv("ALERT_LOG")
@@ -17,7 +17,19 @@
 import inspect
 from functools import partial
 from types import FunctionType
-from typing import Any, Dict, List, MutableMapping, Optional, Tuple, Type, Union
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    MutableMapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+)
 
 from pyrogram import types
 from pyrogram.client import Client
@@ -31,6 +43,7 @@ __all__ = [
     "UserConverter",
     "ChatConverter",
     "ChatMemberConverter",
+    "InvocationPlan",
     "parse_arguments",
 ]
 
@@ -164,11 +177,19 @@ def _get_default(param: inspect.Parameter, default: Any = None) -> Union[Any, No
     return param.default if param.default is not param.empty else default
 
 
-async def transform(ctx: Context, param: inspect.Parameter, arg: str) -> Any:
+ConverterFunc = Callable[[Context, str], Awaitable[Any]]
+
+
+def compile_converter(param: inspect.Parameter) -> ConverterFunc:
+    """Resolve the converter of a parameter once, returning the conversion coroutine"""
     converter = param.annotation
 
     if converter is param.empty:
-        return arg
+
+        async def convert_str(_: Context, arg: str) -> str:
+            return arg
+
+        return convert_str
 
     # Check if the annotation was an `Optional` or `Union` type.
     # This type hinting make a parsing ambiguities.
@@ -181,10 +202,18 @@ async def transform(ctx: Context, param: inspect.Parameter, arg: str) -> Any:
             converter = converter.__args__[0]
 
     if isinstance(converter, (FunctionType, partial)):
-        if inspect.iscoroutinefunction(converter):
-            return await converter(arg)
+        func = converter
+        if inspect.iscoroutinefunction(func):
 
-        return converter(arg)
+            async def convert_coro(_: Context, arg: str) -> Any:
+                return await func(arg)
+
+            return convert_coro
+
+        async def convert_func(_: Context, arg: str) -> Any:
+            return func(arg)
+
+        return convert_func
 
     try:
         module = converter.__module__
@@ -195,49 +224,111 @@ async def transform(ctx: Context, param: inspect.Parameter, arg: str) -> Any:
             converter = CONVERTER_MAP.get(converter, converter)
 
     if inspect.isclass(converter) and issubclass(converter, Converter):
-        try:
-            return await converter()(ctx, arg)
-        except ConversionError as err:
-            return _get_default(param, err)
+        instance = converter()
+
+        async def convert_custom(ctx: Context, arg: str) -> Any:
+            try:
+                return await instance(ctx, arg)
+            except ConversionError as err:
+                return _get_default(param, err)
+
+        return convert_custom
 
     if converter is bool:
+
+        async def convert_bool(_: Context, arg: str) -> Any:
+            try:
+                return _bool_converter(arg)
+            except BadBoolArgument as err:
+                return _get_default(param, err)
+
+        return convert_bool
+
+    cls = converter
+
+    async def convert_type(_: Context, arg: str) -> Any:
         try:
-            return _bool_converter(arg)
-        except BadBoolArgument as err:
+            return cls(arg)
+        except ValueError as err:
             return _get_default(param, err)
 
-    try:
-        return converter(arg)
-    except ValueError as err:
-        return _get_default(param, err)
+    return convert_type
 
 
-async def parse_arguments(
-    sig: inspect.Signature, ctx: Context, func: CommandFunc
-) -> Tuple[List[Any], Dict[Any, Any]]:
-    to_convert = ctx.args
-    args = []  # type: List[Any]
-    kwargs = {}  # type: Dict[Any, Any]
-    idx = 0
-    items = iter(sig.parameters.items())
-
-    # skip Context argument
-    next(items)  # skipcq: PTC-W0063
-    for name, param in items:
-        if param.kind in (param.POSITIONAL_OR_KEYWORD, param.POSITIONAL_ONLY):
+async def transform(ctx: Context, param: inspect.Parameter, arg: str) -> Any:
+    return await compile_converter(param)(ctx, arg)
+
+
+class InvocationPlan:
+    """Arguments conversion of a command function, compiled once on registration.
+
+    Parameters:
+        sig (`inspect.Signature`): Signature of the command function.
+        func (`CommandFunc`): The command function.
+    """
+
+    positionals: Sequence[Tuple[inspect.Parameter, ConverterFunc]]
+    rest: Optional[str]
+    error: Optional[str]
+
+    def __init__(self, sig: inspect.Signature, func: CommandFunc) -> None:
+        positionals = []
+        self.rest = None
+        self.error = None
+
+        items = iter(sig.parameters.items())
+        # skip Context argument
+        next(items, None)
+        for name, param in items:
+            if param.kind in (param.POSITIONAL_OR_KEYWORD, param.POSITIONAL_ONLY):
+                positionals.append((param, compile_converter(param)))
+            elif param.kind == param.KEYWORD_ONLY:
+                # Consume remaining text to the kwargs
+                self.rest = name
+                break
+            elif param.kind in {param.VAR_POSITIONAL, param.VAR_KEYWORD}:
+                # Raised on invocation, after the preceding arguments are converted
+                self.error = (
+                    f"Unsuported {param.kind} parameter conversion "
+                    f"Found '*{name}' on '{func.__name__}'"
+                )
+                break
+
+        self.positionals = tuple(positionals)
+
+    @classmethod
+    def compile(cls, func: CommandFunc) -> "InvocationPlan":
+        return cls(inspect.signature(func), func)
+
+    @property
+    def empty(self) -> bool:
+        return not self.positionals and self.rest is None and self.error is None
+
+    async def __call__(self, ctx: Context) -> Tuple[List[Any], Dict[Any, Any]]:
+        args = []  # type: List[Any]
+        kwargs = {}  # type: Dict[Any, Any]
+        if self.empty:
+            return args, kwargs
+
+        to_convert = ctx.args
+        for idx, (param, convert) in enumerate(self.positionals):
             try:
-                result = await transform(ctx, param, to_convert[idx])
+                result = await convert(ctx, to_convert[idx])
             except IndexError:
                 result = _get_default(param)
             args.append(result)
-            idx += 1
-        elif param.kind == param.KEYWORD_ONLY:
-            # Consume remaining text to the kwargs
-            kwargs[name] = " ".join(to_convert[idx:]).strip()
-            break
-        elif param.kind in {param.VAR_POSITIONAL, param.VAR_KEYWORD}:
-            raise BadArgument(
-                f"Unsuported {param.kind} parameter conversion "
-                f"Found '*{name}' on '{func.__name__}'"
-            )
-    return args, kwargs
+
+        if self.error is not None:
+            # A fresh exception each time, a shared one would pile up tracebacks
+            raise BadArgument(self.error)
+
+        if self.rest is not None:
+            kwargs[self.rest] = " ".join(to_convert[len(self.positionals) :]).strip()
+
+        return args, kwargs
+
+
+async def parse_arguments(
+    sig: inspect.Signature, ctx: Context, func: CommandFunc
+) -> Tuple[List[Any], Dict[Any, Any]]:
+    return await InvocationPlan(sig, func)(ctx)
@@ -14,9 +14,20 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+from .bulk_writer import BulkWriter  # skipcq: PY-W2000
+from .cached import CachedCollection  # skipcq: PY-W2000
 from .client import AsyncClient  # skipcq: PY-W2000
 from .collection import AsyncCollection  # skipcq: PY-W2000
 from .cursor import AsyncCursor  # skipcq: PY-W2000
 from .db import AsyncDatabase  # skipcq: PY-W2000
+from .native import NativeClient  # skipcq: PY-W2000
 
-__all__ = ["AsyncClient", "AsyncCollection", "AsyncCursor", "AsyncDatabase"]
+__all__ = [
+    "AsyncClient",
+    "AsyncCollection",
+    "AsyncCursor",
+    "AsyncDatabase",
+    "BulkWriter",
+    "CachedCollection",
+    "NativeClient",
+]
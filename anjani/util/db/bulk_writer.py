@@ -0,0 +1,241 @@
+"""Anjani database write-behind"""
+# Copyright (C) 2020 - 2023  UserbotIndo Team, <https://github.com/userbotindo.git>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+import logging
+from copy import deepcopy
+from typing import (
+    Any,
+    Hashable,
+    Iterable,
+    List,
+    Mapping,
+    MutableMapping,
+    Optional,
+    Set,
+    Tuple,
+)
+from weakref import WeakSet
+
+from pymongo.errors import PyMongoError
+from pymongo.operations import UpdateOne
+
+Update = MutableMapping[str, MutableMapping[str, Any]]
+
+# Writers with pending updates are kept alive by their flush timer
+_writers: "WeakSet[BulkWriter]" = WeakSet()
+
+
+def _key(value: Any) -> Hashable:
+    if isinstance(value, Mapping):
+        return tuple((k, _key(v)) for k, v in value.items())
+    if isinstance(value, list):
+        return tuple(_key(v) for v in value)
+
+    return value
+
+
+def _conflicts(a: Iterable[str], b: Iterable[str]) -> bool:
+    # Same path, or one is the parent of the other
+    return any(x == y or x.startswith(y + ".") or y.startswith(x + ".") for x in a for y in b)
+
+
+def _each(value: Any) -> Tuple[List[Any], Optional[int]]:
+    """Split a $push or $addToSet argument into the values and the $slice"""
+    if isinstance(value, Mapping) and "$each" in value:
+        if set(value) - {"$each", "$slice"}:
+            raise ValueError("Unsupported modifier")
+
+        return list(value["$each"]), value.get("$slice")
+
+    return [value], None
+
+
+def merge_update(pending: Update, update: Mapping[str, Mapping[str, Any]]) -> bool:
+    """Merge `update` into `pending` in place.
+
+    Returns False, leaving `pending` untouched, when the result would differ
+    from applying both updates one after the other.
+    """
+    merged = deepcopy(pending)
+    for op, fields in update.items():
+        others = [path for other, spec in merged.items() if other != op for path in spec]
+        if _conflicts(fields, others):
+            return False
+
+        target = merged.setdefault(op, {})
+        # A parent and a child path of the same operator conflict as well
+        if _conflicts([path for path in fields if path not in target], target):
+            return False
+
+        for path, value in fields.items():
+            if path not in target:
+                target[path] = deepcopy(value)
+            elif op == "$set":
+                target[path] = deepcopy(value)
+            elif op == "$setOnInsert":
+                # Only the first one applies, the document exists afterwards
+                pass
+            elif op == "$unset":
+                pass
+            elif op == "$inc":
+                target[path] += value
+            elif op in {"$addToSet", "$push"}:
+                try:
+                    old, old_slice = _each(target[path])
+                    new, new_slice = _each(value)
+                except ValueError:
+                    return False
+                if old_slice != new_slice:
+                    return False
+
+                if op == "$addToSet":
+                    values = old + [item for item in new if item not in old]
+                else:
+                    values = old + new
+
+                target[path] = {"$each": deepcopy(values)}
+                if old_slice is not None:
+                    target[path]["$slice"] = old_slice
+            else:
+                return False
+
+    pending.clear()
+    pending.update(merged)
+    return True
+
+
+class BulkWriter:
+    """Write-behind buffer of the updates of a collection.
+
+    Updates to the same document are merged while they wait, and everything
+    pending is sent as a single unordered bulk write every `interval` seconds,
+    or as soon as `max_ops` documents are pending. Updates that can't be merged
+    flush the buffer first, so the writes of a document keep their order.
+
+    Writes are fire and forget: errors are logged, not raised to the caller.
+    Keep the writer around, it is meant to be created once per collection.
+    """
+
+    collection: Any
+    log: logging.Logger
+    interval: float
+    max_ops: int
+    round_trips: int
+    writes: int
+
+    _pending: MutableMapping[Hashable, Tuple[Mapping[str, Any], Update, bool]]
+    _lock: asyncio.Lock
+    _timer: Optional[asyncio.TimerHandle]
+    _tasks: Set["asyncio.Task[None]"]
+
+    def __init__(self, collection: Any, *, interval: float = 0.5, max_ops: int = 1000) -> None:
+        self.collection = collection
+        self.log = logging.getLogger("bulk_writer")
+        self.interval = interval
+        self.max_ops = max_ops
+        self.round_trips = 0
+        self.writes = 0
+
+        self._pending = {}
+        self._lock = asyncio.Lock()
+        self._timer = None
+        self._tasks = set()
+
+        _writers.add(self)
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    async def update_one(
+        self,
+        filter: Mapping[str, Any],  # skipcq: PYL-W0622
+        update: Mapping[str, Mapping[str, Any]],
+        *,
+        upsert: bool = False,
+    ) -> None:
+        """Queue an update of the document matching `filter`.
+
+        Returns once queued, or once the earlier writes are flushed when this
+        update can't be merged into them.
+        """
+        self.writes += 1
+        key = _key(filter)
+        while key in self._pending:
+            _, pending, pending_upsert = self._pending[key]
+            if pending_upsert == upsert and merge_update(pending, update):
+                return
+
+            # Others may queue the same document while we wait
+            await self.flush()
+
+        self._pending[key] = (
+            filter,
+            {op: deepcopy(dict(spec)) for op, spec in update.items()},
+            upsert,
+        )
+        if len(self._pending) >= self.max_ops:
+            self._flush_later(0)
+        elif self._timer is None:
+            self._flush_later(self.interval)
+
+    def _flush_later(self, delay: float) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+
+        loop = asyncio.get_event_loop()
+        self._timer = loop.call_later(delay, self._start_flush)
+
+    def _start_flush(self) -> None:
+        self._timer = None
+        task = asyncio.get_event_loop().create_task(self.flush())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def flush(self) -> None:
+        """Write everything pending now"""
+        async with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+            if not self._pending:
+                return
+
+            pending, self._pending = self._pending, {}
+            requests = [
+                UpdateOne(filter, update, upsert=upsert)
+                for filter, update, upsert in pending.values()
+            ]
+            self.round_trips += 1
+            try:
+                await self.collection.bulk_write(requests, ordered=False)
+            except PyMongoError as e:
+                self.log.error(
+                    "Failed to write %d buffered updates to '%s'",
+                    len(requests),
+                    self.collection.name,
+                    exc_info=e,
+                )
+
+    async def close(self) -> None:
+        await self.flush()
+        _writers.discard(self)
+
+
+async def flush_all() -> None:
+    """Flush every buffered writer, used on shutdown"""
+    await asyncio.gather(*(writer.flush() for writer in list(_writers)))
@@ -0,0 +1,297 @@
+"""Anjani database read-through cache"""
+# Copyright (C) 2020 - 2023  UserbotIndo Team, <https://github.com/userbotindo.git>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+from collections import OrderedDict
+from time import monotonic
+from typing import (
+    Any,
+    Callable,
+    Hashable,
+    List,
+    Mapping,
+    MutableMapping,
+    Optional,
+    Set,
+    Tuple,
+)
+from weakref import WeakSet
+
+from .bulk_writer import _key
+from .memory import match
+
+Document = Mapping[str, Any]
+
+_caches: "WeakSet[CachedCollection]" = WeakSet()
+
+
+def caches() -> List["CachedCollection"]:
+    """Every live cache, for the metrics"""
+    return list(_caches)
+
+
+def cache_key(
+    filter: Optional[Mapping[str, Any]],  # skipcq: PYL-W0622
+    projection: Optional[Any],
+) -> Hashable:
+    """Key of a query, the order of the top level fields doesn't change its result"""
+    if isinstance(projection, (list, tuple)):
+        projection = {field: True for field in projection}
+    if isinstance(projection, Mapping):
+        projection = {
+            field: bool(value) if isinstance(value, int) and value in {0, 1} else value
+            for field, value in projection.items()
+        }
+
+    return tuple(
+        tuple(sorted(((str(k), _key(v)) for k, v in (query or {}).items()), key=lambda kv: kv[0]))
+        for query in (filter, projection)
+    )
+
+
+def _matches(doc: Document, query: Mapping[str, Any]) -> bool:
+    try:
+        return match(doc, query)
+    except Exception:  # skipcq: PYL-W0703
+        # Unsupported operator, assume the write may touch it
+        return True
+
+
+class CachedCollection:
+    """Collection view caching the result of `find_one`.
+
+    Concurrent lookups of the same query share a single request, and results
+    are kept for `ttl` seconds. Writes made through the view drop the entries
+    they may affect, changes of other processes are picked up from the change
+    stream when one is given. Everything else is forwarded to the collection.
+
+    Cached documents are shared between callers, don't modify them.
+    """
+
+    collection: Any
+    ttl: float
+    maxsize: int
+    hits: int
+    misses: int
+
+    _entries: "OrderedDict[Hashable, Tuple[float, Optional[Document], bool]]"
+    _pending: MutableMapping[Hashable, "asyncio.Task[Optional[Document]]"]
+    _stale: Set[Hashable]
+    _streams: Optional[Any]
+    _subscription: Any
+
+    def __init__(
+        self,
+        collection: Any,
+        *,
+        ttl: float = 60,
+        maxsize: int = 1024,
+        streams: Optional[Any] = None,
+    ) -> None:
+        self.collection = collection
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+
+        self._entries = OrderedDict()
+        self._pending = {}
+        self._stale = set()
+        self._streams = streams
+        self._subscription = None
+        if streams is not None:
+            self._subscription = streams.subscribe(
+                collection.name, self._on_change, reset=self.clear
+            )
+
+        _caches.add(self)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.collection, name)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def find_one(
+        self,
+        filter: Optional[Mapping[str, Any]] = None,  # skipcq: PYL-W0622
+        projection: Optional[Any] = None,
+        *args: Any,
+        **kwargs: Any,
+    ) -> Optional[Document]:
+        if args or kwargs:
+            # Sorts, sessions and the like aren't part of the key
+            return await self.collection.find_one(filter, projection, *args, **kwargs)
+
+        key = cache_key(filter, projection)
+        try:
+            timestamp, doc, _ = self._entries[key]
+        except KeyError:
+            pass
+        else:
+            if monotonic() - timestamp <= self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return doc
+
+            del self._entries[key]
+
+        self.misses += 1
+        # Coalesce concurrent misses of the same query into one request
+        try:
+            task = self._pending[key]
+        except KeyError:
+            task = asyncio.get_event_loop().create_task(self._fetch(key, filter, projection))
+            self._pending[key] = task
+
+        return await asyncio.shield(task)
+
+    async def _fetch(
+        self,
+        key: Hashable,
+        filter: Optional[Mapping[str, Any]],  # skipcq: PYL-W0622
+        projection: Optional[Any],
+    ) -> Optional[Document]:
+        try:
+            doc = await self.collection.find_one(filter, projection)
+            if key in self._stale:
+                # Written while we were reading, don't keep a possibly outdated copy
+                self._stale.discard(key)
+            else:
+                self._entries[key] = (monotonic(), doc, projection is not None)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+
+            return doc
+        finally:
+            del self._pending[key]
+
+    def clear(self) -> None:
+        self._stale.update(self._pending)
+        self._entries.clear()
+
+    def close(self) -> None:
+        """Stop following the change stream"""
+        if self._subscription is not None:
+            self._streams.unsubscribe(self._subscription)  # type: ignore
+            self._subscription = None
+
+    def _drop(self, predicate: Callable[[Document], bool]) -> None:
+        # Pending reads may have been answered before the write
+        self._stale.update(self._pending)
+        for key in [
+            key
+            for key, (_, doc, projected) in self._entries.items()
+            # A projected copy may lack the fields telling whether it's affected
+            if doc is None or projected or predicate(doc)
+        ]:
+            del self._entries[key]
+
+    def invalidate(self, filter: Optional[Mapping[str, Any]] = None) -> None:  # skipcq: PYL-W0622
+        """Drop the entries a write to the documents matching `filter` may affect"""
+        if filter is None:
+            self.clear()
+        else:
+            self._drop(lambda doc: _matches(doc, filter))
+
+    def _on_change(self, change: Mapping[str, Any]) -> None:
+        if change["operationType"] in {"drop", "rename"}:
+            self.clear()
+            return
+
+        doc_id = change.get("documentKey", {}).get("_id")
+        self._drop(lambda doc: doc.get("_id", doc_id) == doc_id)
+
+    # Writes, they go through and drop what they may have changed
+
+    async def insert_one(self, document: Document, *args: Any, **kwargs: Any) -> Any:
+        try:
+            return await self.collection.insert_one(document, *args, **kwargs)
+        finally:
+            # Only queries that found nothing can see a new document
+            self._drop(lambda doc: False)
+
+    async def insert_many(self, documents: List[Document], *args: Any, **kwargs: Any) -> Any:
+        try:
+            return await self.collection.insert_many(documents, *args, **kwargs)
+        finally:
+            self._drop(lambda doc: False)
+
+    async def update_one(self, filter: Mapping[str, Any], *args: Any, **kwargs: Any) -> Any:
+        try:
+            return await self.collection.update_one(filter, *args, **kwargs)
+        finally:
+            self.invalidate(filter)
+
+    async def update_many(self, filter: Mapping[str, Any], *args: Any, **kwargs: Any) -> Any:
+        try:
+            return await self.collection.update_many(filter, *args, **kwargs)
+        finally:
+            self.invalidate(filter)
+
+    async def replace_one(self, filter: Mapping[str, Any], *args: Any, **kwargs: Any) -> Any:
+        try:
+            return await self.collection.replace_one(filter, *args, **kwargs)
+        finally:
+            self.invalidate(filter)
+
+    async def delete_one(self, filter: Mapping[str, Any], *args: Any, **kwargs: Any) -> Any:
+        try:
+            return await self.collection.delete_one(filter, *args, **kwargs)
+        finally:
+            self.invalidate(filter)
+
+    async def delete_many(self, filter: Mapping[str, Any], *args: Any, **kwargs: Any) -> Any:
+        try:
+            return await self.collection.delete_many(filter, *args, **kwargs)
+        finally:
+            self.invalidate(filter)
+
+    async def find_one_and_update(
+        self, filter: Mapping[str, Any], *args: Any, **kwargs: Any
+    ) -> Any:
+        try:
+            return await self.collection.find_one_and_update(filter, *args, **kwargs)
+        finally:
+            self.invalidate(filter)
+
+    async def find_one_and_replace(
+        self, filter: Mapping[str, Any], *args: Any, **kwargs: Any
+    ) -> Any:
+        try:
+            return await self.collection.find_one_and_replace(filter, *args, **kwargs)
+        finally:
+            self.invalidate(filter)
+
+    async def find_one_and_delete(
+        self, filter: Mapping[str, Any], *args: Any, **kwargs: Any
+    ) -> Any:
+        try:
+            return await self.collection.find_one_and_delete(filter, *args, **kwargs)
+        finally:
+            self.invalidate(filter)
+
+    async def bulk_write(self, requests: List[Any], *args: Any, **kwargs: Any) -> Any:
+        try:
+            return await self.collection.bulk_write(requests, *args, **kwargs)
+        finally:
+            self.clear()
+
+    async def drop(self, *args: Any, **kwargs: Any) -> None:
+        try:
+            await self.collection.drop(*args, **kwargs)
+        finally:
+            self.clear()
@@ -97,13 +97,15 @@ class AsyncChangeStream(AsyncBase):
 
     async def _init(self) -> ChangeStream:
         if not self.dispatch:
-            self.dispatch = await util.run_sync(self._target.dispatch.watch, **self._options)
+            self.dispatch = await util.run_sync_in(
+                "db", self._target.dispatch.watch, **self._options
+            )
 
         return self.dispatch
 
     async def close(self):
         if self.dispatch:
-            await util.run_sync(self.dispatch.close)
+            await util.run_sync_in("db", self.dispatch.close)
 
     async def next(self) -> Mapping[str, Any]:
         while self.alive:
@@ -115,7 +117,7 @@ class AsyncChangeStream(AsyncBase):
 
     async def try_next(self) -> Optional[Mapping[str, Any]]:
         self.dispatch = await self._init()
-        return await util.run_sync(self.dispatch.try_next)
+        return await util.run_sync_in("db", self.dispatch.try_next)
 
     @property
     def alive(self) -> bool:
@@ -75,7 +75,7 @@ class AsyncClient(AsyncBaseProperty):
         return hash(self.address)
 
     async def close(self) -> None:
-        await util.run_sync(self.dispatch.close)
+        await util.run_sync_in("db", self.dispatch.close)
 
     async def drop_database(
         self,
@@ -85,7 +85,8 @@ class AsyncClient(AsyncBaseProperty):
         if isinstance(name_or_database, AsyncDatabase):
             name_or_database = name_or_database.name
 
-        return await util.run_sync(
+        return await util.run_sync_in(
+            "db",
             self.dispatch.drop_database,
             name_or_database,
             session=session.dispatch if session else session,
@@ -132,8 +133,10 @@ class AsyncClient(AsyncBaseProperty):
         )
 
     async def list_database_names(self, session: Optional[AsyncClientSession] = None) -> List[str]:
-        return await util.run_sync(
-            self.dispatch.list_database_names, session=session.dispatch if session else session
+        return await util.run_sync_in(
+            "db",
+            self.dispatch.list_database_names,
+            session=session.dispatch if session else session,
         )
 
     async def list_databases(
@@ -147,7 +150,8 @@ class AsyncClient(AsyncBaseProperty):
             read_preference=ReadPreference.PRIMARY,
             write_concern=DEFAULT_WRITE_CONCERN,
         )
-        res: Mapping[str, Any] = await util.run_sync(
+        res: Mapping[str, Any] = await util.run_sync_in(
+            "db",
             database.dispatch._retryable_read_command,  # skipcq: PYL-W0212
             cmd,
             session=session.dispatch if session else session,
@@ -160,8 +164,8 @@ class AsyncClient(AsyncBaseProperty):
         return AsyncCommandCursor(CommandCursor(database["$cmd"], cursor, None))
 
     async def server_info(self, session: Optional[AsyncClientSession] = None) -> Mapping[str, Any]:
-        return await util.run_sync(
-            self.dispatch.server_info, session=session.dispatch if session else session
+        return await util.run_sync_in(
+            "db", self.dispatch.server_info, session=session.dispatch if session else session
         )
 
     # Don't need await when entering the context manager,
@@ -174,7 +178,8 @@ class AsyncClient(AsyncBaseProperty):
         default_transaction_options: Optional[TransactionOptions] = None,
         snapshot: bool = False,
     ) -> AsyncGenerator[AsyncClientSession, None]:
-        session = await util.run_sync(
+        session = await util.run_sync_in(
+            "db",
             self.dispatch.start_session,
             causal_consistency=causal_consistency,
             default_transaction_options=default_transaction_options,
@@ -46,10 +46,13 @@ from pymongo.write_concern import WriteConcern
 from anjani import util
 
 from .base import AsyncBaseProperty
+from .bulk_writer import BulkWriter
+from .cached import CachedCollection
 from .change_stream import AsyncChangeStream
 from .client_session import AsyncClientSession
 from .command_cursor import AsyncLatentCommandCursor
 from .cursor import AsyncCursor, AsyncRawBatchCursor, Cursor
+from .cursor_base import get_default_batch_size
 from .typings import ReadPreferences, Request
 
 if TYPE_CHECKING:
@@ -118,6 +121,11 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
         session: Optional[AsyncClientSession] = None,
         **kwargs: Any,
     ) -> AsyncLatentCommandCursor:
+        # A zero batchSize means an empty first batch for aggregate, not the server default
+        batch_size = get_default_batch_size()
+        if batch_size and "batchSize" not in kwargs:
+            kwargs["batchSize"] = batch_size
+
         return AsyncLatentCommandCursor(
             self,
             self.dispatch.aggregate,
@@ -150,7 +158,8 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
         bypass_document_validation: bool = False,
         session: Optional[AsyncClientSession] = None,
     ) -> BulkWriteResult:
-        return await util.run_sync(
+        return await util.run_sync_in(
+            "db",
             self.dispatch.bulk_write,
             request,
             ordered=ordered,
@@ -158,6 +167,34 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
             session=session.dispatch if session else session,
         )
 
+    def buffered(self, *, interval: float = 0.5, max_ops: int = 1000) -> BulkWriter:
+        """Return a write-behind buffer for the updates of this collection.
+
+        Parameters:
+            interval (`float`, *Optional*):
+                Seconds an update may wait before it is written. Defaults to 0.5.
+            max_ops (`int`, *Optional*):
+                Number of pending documents that triggers a write right away.
+                Defaults to 1000.
+        """
+        return BulkWriter(self, interval=interval, max_ops=max_ops)
+
+    def cached(
+        self, *, ttl: float = 60, maxsize: int = 1024, streams: Optional[Any] = None
+    ) -> CachedCollection:
+        """Return a view of this collection caching the result of `find_one`.
+
+        Parameters:
+            ttl (`float`, *Optional*):
+                Seconds a result is kept. Defaults to 60.
+            maxsize (`int`, *Optional*):
+                Number of queries kept, the least recently used go first. Defaults to 1024.
+            streams (:obj:`~ChangeStreamService`, *Optional*):
+                Drop the results changed by other processes as the changes arrive.
+                Without it only the writes made through the view are seen.
+        """
+        return CachedCollection(self, ttl=ttl, maxsize=maxsize, streams=streams)
+
     async def count_documents(
         self,
         query: Mapping[str, Any],
@@ -165,7 +202,8 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
         session: Optional[AsyncClientSession] = None,
         **kwargs: Any,
     ) -> int:
-        return await util.run_sync(
+        return await util.run_sync_in(
+            "db",
             self.dispatch.count_documents,
             query,
             session=session.dispatch if session else session,
@@ -173,7 +211,7 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
         )
 
     async def create_index(self, keys: Union[str, List[Tuple[str, Any]]], **kwargs: Any) -> str:
-        return await util.run_sync(self.dispatch.create_index, keys, **kwargs)
+        return await util.run_sync_in("db", self.dispatch.create_index, keys, **kwargs)
 
     async def create_indexes(
         self,
@@ -182,7 +220,8 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
         session: Optional[AsyncClientSession] = None,
         **kwargs: Any,
     ) -> List[str]:
-        return await util.run_sync(
+        return await util.run_sync_in(
+            "db",
             self.dispatch.create_indexes,
             indexes,
             session=session.dispatch if session else session,
@@ -197,7 +236,8 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
         hint: Optional[Union[IndexModel, List[Tuple[str, Any]]]] = None,
         session: Optional[AsyncClientSession] = None,
     ) -> DeleteResult:
-        return await util.run_sync(
+        return await util.run_sync_in(
+            "db",
             self.dispatch.delete_many,
             query,
             collation=collation,
@@ -213,7 +253,8 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
         hint: Optional[Union[IndexModel, List[Tuple[str, Any]]]] = None,
         session: Optional[AsyncClientSession] = None,
     ) -> DeleteResult:
-        return await util.run_sync(
+        return await util.run_sync_in(
+            "db",
             self.dispatch.delete_one,
             query,
             collation=collation,
@@ -229,7 +270,8 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
         session: Optional[AsyncClientSession] = None,
         **kwargs: Any,
     ) -> List[str]:
-        return await util.run_sync(
+        return await util.run_sync_in(
+            "db",
             self.dispatch.distinct,
             key,
             filter=query,
@@ -238,7 +280,9 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
         )
 
     async def drop(self, session: Optional[AsyncClientSession] = None) -> None:
-        await util.run_sync(self.dispatch.drop, session=session.dispatch if session else session)
+        await util.run_sync_in(
+            "db", self.dispatch.drop, session=session.dispatch if session else session
+        )
 
     async def drop_index(
         self,
@@ -247,7 +291,8 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
         session: Optional[AsyncClientSession] = None,
         **kwargs: Any,
     ) -> None:
-        await util.run_sync(
+        await util.run_sync_in(
+            "db",
             self.dispatch.drop_index,
             index_or_name,
             session=session.dispatch if session else session,
@@ -255,20 +300,26 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
         )
 
     async def drop_indexes(self, session: Optional[AsyncClientSession] = None, **kwargs) -> None:
-        await util.run_sync(
-            self.dispatch.drop_indexes, session=session.dispatch if session else session, **kwargs
+        await util.run_sync_in(
+            "db",
+            self.dispatch.drop_indexes,
+            session=session.dispatch if session else session,
+            **kwargs,
         )
 
     async def estimated_document_count(self, **kwargs: Any) -> int:
-        return await util.run_sync(self.dispatch.estimated_document_count, **kwargs)
+        return await util.run_sync_in("db", self.dispatch.estimated_document_count, **kwargs)
 
     def find(self, *args: Any, **kwargs: Any) -> AsyncCursor:
+        if "batch_size" not in kwargs:
+            kwargs["batch_size"] = get_default_batch_size()
+
         return AsyncCursor(Cursor(self, *args, **kwargs), self)
 
     async def find_one(
         self, query: Optional[Mapping[str, Any]], *args: Any, **kwargs: Any
     ) -> Optional[Mapping[str, Any]]:
-        return await util.run_sync(self.dispatch.find_one, query, *args, **kwargs)
+        return await util.run_sync_in("db", self.dispatch.find_one, query, *args, **kwargs)
 
     async def find_one_and_delete(
         self,
@@ -280,7 +331,8 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
         session: Optional[AsyncClientSession] = None,
         **kwargs: Any,
     ) -> Mapping[str, Any]:
-        return await util.run_sync(
+        return await util.run_sync_in(
+            "db",
             self.dispatch.find_one_and_delete,
             query,
             projection=projection,
@@ -303,7 +355,8 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
         session: Optional[AsyncClientSession] = None,
         **kwargs: Any,
     ) -> Mapping[str, Any]:
-        return await util.run_sync(
+        return await util.run_sync_in(
+            "db",
             self.dispatch.find_one_and_replace,
             query,
             replacement,
@@ -330,7 +383,8 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
         session: Optional[AsyncClientSession] = None,
         **kwargs: Any,
     ) -> Mapping[str, Any]:
-        return await util.run_sync(
+        return await util.run_sync_in(
+            "db",
             self.dispatch.find_one_and_update,
             query,
             update,
@@ -356,8 +410,8 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
     async def index_information(
         self, session: Optional[AsyncClientSession] = None
     ) -> Mapping[str, Any]:
-        return await util.run_sync(
-            self.dispatch.index_information, session=session.dispatch if session else session
+        return await util.run_sync_in(
+            "db", self.dispatch.index_information, session=session.dispatch if session else session
         )
 
     async def insert_many(
@@ -368,7 +422,8 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
         bypass_document_validation: bool = False,
         session: Optional[AsyncClientSession] = None,
     ) -> InsertManyResult:
-        return await util.run_sync(
+        return await util.run_sync_in(
+            "db",
             self.dispatch.insert_many,
             documents,
             ordered=ordered,
@@ -383,7 +438,8 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
         bypass_document_validation: bool = False,
         session: Optional[AsyncClientSession] = None,
     ) -> InsertOneResult:
-        return await util.run_sync(
+        return await util.run_sync_in(
+            "db",
             self.dispatch.insert_one,
             document,
             bypass_document_validation=bypass_document_validation,
@@ -402,14 +458,15 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
         )
 
     async def options(self, session: Optional[AsyncClientSession] = None) -> Mapping[str, Any]:
-        return await util.run_sync(
-            self.dispatch.options, session=session.dispatch if session else session
+        return await util.run_sync_in(
+            "db", self.dispatch.options, session=session.dispatch if session else session
         )
 
     async def rename(
         self, new_name: str, *, session: Optional[AsyncClientSession] = None, **kwargs: Any
     ) -> Mapping[str, Any]:
-        return await util.run_sync(
+        return await util.run_sync_in(
+            "db",
             self.dispatch.rename,
             new_name,
             session=session.dispatch if session else session,
@@ -427,7 +484,8 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
         hint: Optional[Union[IndexModel, List[Tuple[str, Any]]]] = None,
         session: Optional[AsyncClientSession] = None,
     ) -> UpdateResult:
-        return await util.run_sync(
+        return await util.run_sync_in(
+            "db",
             self.dispatch.replace_one,
             query,
             replacement,
@@ -450,7 +508,8 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
         hint: Optional[Union[IndexModel, List[Tuple[str, Any]]]] = None,
         session: Optional[AsyncClientSession] = None,
     ) -> UpdateResult:
-        return await util.run_sync(
+        return await util.run_sync_in(
+            "db",
             self.dispatch.update_many,
             query,
             update,
@@ -474,7 +533,8 @@ class AsyncCollection(AsyncBaseProperty, Generic[_DocumentType]):
         hint: Optional[Union[IndexModel, List[Tuple[str, Any]]]] = None,
         session: Optional[AsyncClientSession] = None,
     ) -> UpdateResult:
-        return await util.run_sync(
+        return await util.run_sync_in(
+            "db",
             self.dispatch.update_one,
             query,
             update,
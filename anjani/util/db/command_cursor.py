@@ -75,7 +75,7 @@ class CommandCursor(_CommandCursor, Generic[_DocumentType]):
         )
 
     async def _AsyncCommandCursor__die(self, synchronous: bool = False) -> None:
-        await util.run_sync(self.__die, synchronous=synchronous)
+        await util.run_sync_in("db", self.__die, synchronous=synchronous)
 
     @property
     def _AsyncCommandCursor__data(self) -> Deque[Any]:
@@ -187,7 +187,9 @@ class AsyncLatentCommandCursor(AsyncCommandCursor):
         if not self.started:
             self.started = True
             original_future = self.loop.create_future()
-            future = self.loop.create_task(util.run_sync(self.start, *self.args, **self.kwargs))
+            future = self.loop.create_task(
+                util.run_sync_in("db", self.start, *self.args, **self.kwargs)
+            )
             future.add_done_callback(
                 partial(self.loop.call_soon_threadsafe, self._on_started, original_future)
             )
@@ -75,7 +75,7 @@ class Cursor(_Cursor, Generic[_DocumentType]):
         return self.__data
 
     async def _AsyncCursor__die(self, synchronous: bool = False) -> None:
-        await util.run_sync(self.__die, synchronous=synchronous)
+        await util.run_sync_in("db", self.__die, synchronous=synchronous)
 
     @property
     def _AsyncCursor__exhaust(self) -> bool:
@@ -143,10 +143,10 @@ class AsyncCursor(AsyncCursorBase, Generic[_DocumentType]):
         return self
 
     async def distinct(self, key: str) -> List[Any]:
-        return await util.run_sync(self.dispatch.distinct, key)
+        return await util.run_sync_in("db", self.dispatch.distinct, key)
 
     async def explain(self) -> _DocumentType:
-        return await util.run_sync(self.dispatch.explain)
+        return await util.run_sync_in("db", self.dispatch.explain)
 
     def hint(self, index: Union[str, List[Tuple[str, Any]]]) -> "AsyncCursor[_DocumentType]":
         self.dispatch = self.dispatch.hint(index)
@@ -20,6 +20,7 @@ from functools import partial
 from typing import (
     TYPE_CHECKING,
     Any,
+    AsyncIterator,
     Coroutine,
     Deque,
     Generic,
@@ -44,6 +45,19 @@ if TYPE_CHECKING:
     from .collection import AsyncCollection
     from .command_cursor import CommandCursor, _LatentCursor
 
+_default_batch_size = 0
+
+
+def set_default_batch_size(batch_size: int) -> None:
+    """Set the batch size of the queries that don't set their own, 0 lets the server decide"""
+    global _default_batch_size  # skipcq: PYL-W0603
+
+    _default_batch_size = batch_size
+
+
+def get_default_batch_size() -> int:
+    return _default_batch_size
+
 
 class AsyncCursorBase(AsyncBase, Generic[_DocumentType]):
     """Base class for Cursor AsyncIOMongoDB instances
@@ -156,7 +170,7 @@ class AsyncCursorBase(AsyncBase, Generic[_DocumentType]):
                 future.set_exception(exc)
 
     async def _refresh(self) -> int:
-        return await util.run_sync(self.dispatch._refresh)  # skipcq: PYL-W0212
+        return await util.run_sync_in("db", self.dispatch._refresh)  # skipcq: PYL-W0212
 
     def batch_size(self, batch_size: int) -> "AsyncCursorBase":
         self.dispatch.batch_size(batch_size)
@@ -165,13 +179,22 @@ class AsyncCursorBase(AsyncBase, Generic[_DocumentType]):
     async def close(self) -> None:
         if not self.closed:
             self.closed = True
-            await util.run_sync(self.dispatch.close)
+            await util.run_sync_in("db", self.dispatch.close)
 
     async def next(self) -> Any:
+        # Only fetching a new batch needs a thread, buffered documents are popped right away
         if self.alive and (self._buffer_size() or await self._get_more()):
-            return await util.run_sync(next, self.dispatch)
+            return self._data().popleft()
         raise StopAsyncIteration
 
+    async def batches(self) -> AsyncIterator[List[Any]]:
+        """Iterate over the results one batch at a time, as they are received from the server"""
+        while self.alive and (self._buffer_size() or await self._get_more()):
+            data = self._data()
+            batch = list(data)
+            data.clear()
+            yield batch
+
     def to_list(self, length: Optional[int] = None) -> asyncio.Future[List[Mapping[str, Any]]]:
         if length is not None and length < 0:
             raise ValueError("length must be non-negative")
@@ -0,0 +1,975 @@
+"""Anjani in-memory database"""
+# Copyright (C) 2020 - 2023  UserbotIndo Team, <https://github.com/userbotindo.git>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+import re
+from collections import Counter
+from copy import deepcopy
+from functools import cmp_to_key
+from typing import (
+    Any,
+    AsyncIterator,
+    Iterable,
+    List,
+    Mapping,
+    MutableMapping,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+from bson.objectid import ObjectId
+from pymongo.collection import ReturnDocument
+from pymongo.operations import DeleteMany, DeleteOne, UpdateMany, UpdateOne
+from pymongo.results import (
+    BulkWriteResult,
+    DeleteResult,
+    InsertManyResult,
+    InsertOneResult,
+    UpdateResult,
+)
+
+from .bulk_writer import BulkWriter
+from .errors import OperationFailure
+
+Document = MutableMapping[str, Any]
+SortSpec = Union[str, List[Tuple[str, int]]]
+
+_MISSING = object()
+
+
+def _resolve(value: Any, parts: List[str]) -> List[Any]:
+    """Return every value a dotted path points to, arrays are traversed"""
+    if not parts:
+        return [value]
+
+    head, rest = parts[0], parts[1:]
+    if isinstance(value, Mapping):
+        return _resolve(value[head], rest) if head in value else [_MISSING]
+    if isinstance(value, list):
+        if head.isdigit():
+            index = int(head)
+            return _resolve(value[index], rest) if index < len(value) else [_MISSING]
+
+        found = [v for item in value if isinstance(item, Mapping) for v in _resolve(item, parts)]
+        return found or [_MISSING]
+
+    return [_MISSING]
+
+
+def _get(doc: Mapping[str, Any], path: str) -> Any:
+    value: Any = doc
+    for part in path.split("."):
+        if isinstance(value, Mapping) and part in value:
+            value = value[part]
+        elif isinstance(value, list) and part.isdigit() and int(part) < len(value):
+            value = value[int(part)]
+        else:
+            return _MISSING
+
+    return value
+
+
+def _parent(doc: Document, path: str, *, create: bool) -> Tuple[Any, str]:
+    parts = path.split(".")
+    value: Any = doc
+    for part in parts[:-1]:
+        if isinstance(value, list):
+            value = value[int(part)]
+            continue
+
+        if part not in value:
+            if not create:
+                return None, parts[-1]
+            value[part] = {}
+
+        value = value[part]
+
+    return value, parts[-1]
+
+
+def _set(doc: Document, path: str, value: Any) -> None:
+    parent, key = _parent(doc, path, create=True)
+    if isinstance(parent, list):
+        parent[int(key)] = value
+    else:
+        parent[key] = value
+
+
+def _unset(doc: Document, path: str) -> None:
+    parent, key = _parent(doc, path, create=False)
+    if isinstance(parent, list):
+        parent[int(key)] = None
+    elif isinstance(parent, MutableMapping):
+        parent.pop(key, None)
+
+
+def _compare(a: Any, b: Any) -> int:
+    # Documents that don't have the field sort first, like null
+    a = None if a is _MISSING else a
+    b = None if b is _MISSING else b
+    if a is None or b is None:
+        return (a is not None) - (b is not None)
+
+    try:
+        return (a > b) - (a < b)
+    except TypeError:
+        return (type(a).__name__ > type(b).__name__) - (type(a).__name__ < type(b).__name__)
+
+
+def _flatten(candidates: Iterable[Any]) -> List[Any]:
+    values = []
+    for value in candidates:
+        values.append(value)
+        if isinstance(value, list):
+            values.extend(value)
+
+    return values
+
+
+def _equals(candidates: List[Any], expected: Any) -> bool:
+    if expected is None and any(value is _MISSING or value is None for value in candidates):
+        return True
+
+    return any(value is not _MISSING and value == expected for value in _flatten(candidates))
+
+
+def _match_operators(candidates: List[Any], spec: Mapping[str, Any]) -> bool:
+    for op, arg in spec.items():
+        if op == "$eq":
+            result = _equals(candidates, arg)
+        elif op == "$ne":
+            result = not _equals(candidates, arg)
+        elif op in {"$gt", "$gte", "$lt", "$lte"}:
+            values = [v for v in _flatten(candidates) if v is not _MISSING and v is not None]
+            checks = {
+                "$gt": lambda c: c > 0,
+                "$gte": lambda c: c >= 0,
+                "$lt": lambda c: c < 0,
+                "$lte": lambda c: c <= 0,
+            }
+            result = any(checks[op](_compare(v, arg)) for v in values)
+        elif op == "$in":
+            result = any(_equals(candidates, item) for item in arg)
+        elif op == "$nin":
+            result = not any(_equals(candidates, item) for item in arg)
+        elif op == "$exists":
+            result = any(value is not _MISSING for value in candidates) == bool(arg)
+        elif op == "$size":
+            result = any(isinstance(value, list) and len(value) == arg for value in candidates)
+        elif op == "$all":
+            result = all(_equals(candidates, item) for item in arg)
+        elif op == "$elemMatch":
+            result = any(
+                isinstance(value, list)
+                and any(
+                    match(item, arg) if isinstance(item, Mapping) else _match_value([item], arg)
+                    for item in value
+                )
+                for value in candidates
+            )
+        elif op == "$not":
+            result = not _match_value(candidates, arg)
+        elif op == "$regex":
+            pattern = re.compile(arg, _regex_flags(spec.get("$options", "")))
+            result = any(
+                isinstance(value, str) and pattern.search(value) for value in _flatten(candidates)
+            )
+        elif op == "$options":
+            continue
+        else:
+            raise OperationFailure(f"unknown operator: {op}")
+
+        if not result:
+            return False
+
+    return True
+
+
+def _regex_flags(options: str) -> int:
+    flags = 0
+    for option, flag in (("i", re.I), ("m", re.M), ("s", re.S), ("x", re.X)):
+        if option in options:
+            flags |= flag
+
+    return flags
+
+
+def _is_operator_spec(value: Any) -> bool:
+    return isinstance(value, Mapping) and bool(value) and all(k.startswith("$") for k in value)
+
+
+def _match_value(candidates: List[Any], spec: Any) -> bool:
+    if _is_operator_spec(spec):
+        return _match_operators(candidates, spec)
+    if isinstance(spec, re.Pattern):
+        return any(isinstance(v, str) and spec.search(v) for v in _flatten(candidates))
+
+    return _equals(candidates, spec)
+
+
+def match(doc: Mapping[str, Any], query: Optional[Mapping[str, Any]]) -> bool:
+    """Whether the document matches a MongoDB query filter"""
+    if not query:
+        return True
+
+    for key, spec in query.items():
+        if key == "$and":
+            result = all(match(doc, sub) for sub in spec)
+        elif key == "$or":
+            result = any(match(doc, sub) for sub in spec)
+        elif key == "$nor":
+            result = not any(match(doc, sub) for sub in spec)
+        elif key.startswith("$"):
+            raise OperationFailure(f"unknown top level operator: {key}")
+        else:
+            result = _match_value(_resolve(doc, key.split(".")), spec)
+
+        if not result:
+            return False
+
+    return True
+
+
+def _pull(items: List[Any], condition: Any) -> List[Any]:
+    def pulled(item: Any) -> bool:
+        if isinstance(condition, Mapping) and not _is_operator_spec(condition):
+            return isinstance(item, Mapping) and match(item, condition)
+
+        return _match_value([item], condition)
+
+    return [item for item in items if not pulled(item)]
+
+
+def apply_update(
+    doc: Document, update: Mapping[str, Any], *, inserting: bool = False
+) -> Tuple[Document, List[str]]:
+    """Apply update operators to the document in place.
+
+    Returns the updated fields and the removed fields, for the change events.
+    """
+    updated: Document = {}
+    removed: List[str] = []
+
+    for op, fields in update.items():
+        for path, arg in fields.items():
+            if op == "$set":
+                _set(doc, path, deepcopy(arg))
+            elif op == "$setOnInsert":
+                if not inserting:
+                    continue
+                _set(doc, path, deepcopy(arg))
+            elif op == "$unset":
+                _unset(doc, path)
+                removed.append(path)
+                continue
+            elif op == "$inc":
+                current = _get(doc, path)
+                _set(doc, path, (0 if current is _MISSING else current) + arg)
+            elif op in {"$min", "$max"}:
+                current = _get(doc, path)
+                if current is _MISSING or (_compare(arg, current) < 0) == (op == "$min"):
+                    _set(doc, path, deepcopy(arg))
+            elif op in {"$push", "$addToSet"}:
+                current = _get(doc, path)
+                items = [] if current is _MISSING else list(current)
+                if isinstance(arg, Mapping) and "$each" in arg:
+                    values = deepcopy(list(arg["$each"]))
+                else:
+                    values = [deepcopy(arg)]
+
+                for value in values:
+                    if op == "$push" or value not in items:
+                        items.append(value)
+
+                if op == "$push" and isinstance(arg, Mapping) and "$slice" in arg:
+                    limit = arg["$slice"]
+                    items = items[limit:] if limit < 0 else items[:limit]
+
+                _set(doc, path, items)
+            elif op == "$pull":
+                current = _get(doc, path)
+                if not isinstance(current, list):
+                    continue
+                _set(doc, path, _pull(current, arg))
+            elif op == "$pop":
+                current = _get(doc, path)
+                if not isinstance(current, list):
+                    continue
+                _set(doc, path, current[1:] if arg == -1 else current[:-1])
+            elif op == "$rename":
+                value = _get(doc, path)
+                if value is _MISSING:
+                    continue
+                _unset(doc, path)
+                _set(doc, arg, value)
+                removed.append(path)
+                updated[arg] = deepcopy(value)
+                continue
+            else:
+                raise OperationFailure(f"Unknown modifier: {op}")
+
+            updated[path] = deepcopy(_get(doc, path))
+
+    return updated, removed
+
+
+def _seed(query: Mapping[str, Any]) -> Document:
+    """Build the document an upsert starts from, out of the equality parts of the filter"""
+    doc: Document = {}
+    for key, spec in query.items():
+        if key == "$and":
+            for sub in spec:
+                doc.update(_seed(sub))
+        elif key.startswith("$"):
+            continue
+        elif _is_operator_spec(spec):
+            if "$eq" in spec:
+                _set(doc, key, deepcopy(spec["$eq"]))
+        else:
+            _set(doc, key, deepcopy(spec))
+
+    return doc
+
+
+def project(doc: Mapping[str, Any], projection: Optional[Any]) -> Document:
+    """Return a copy of the document with the projection applied"""
+    if projection is None:
+        return deepcopy(dict(doc))
+
+    if not isinstance(projection, Mapping):
+        projection = {field: True for field in projection}
+
+    include_id = projection.get("_id", True)
+    fields = {k: v for k, v in projection.items() if k != "_id"}
+    inclusion = any(fields.values())
+
+    if inclusion:
+        result: Document = {}
+        for path, wanted in fields.items():
+            value = _get(doc, path)
+            if wanted and value is not _MISSING:
+                _set(result, path, deepcopy(value))
+    else:
+        result = deepcopy(dict(doc))
+        for path in fields:
+            _unset(result, path)
+
+    if include_id and "_id" in doc:
+        result["_id"] = doc["_id"]
+    else:
+        result.pop("_id", None)
+
+    return result
+
+
+def sort_documents(docs: List[Document], spec: Optional[SortSpec], direction: int = 1) -> None:
+    if not spec:
+        return
+
+    keys = [(spec, direction)] if isinstance(spec, str) else list(spec)
+
+    def compare(a: Document, b: Document) -> int:
+        for path, order in keys:
+            result = _compare(_get(a, path), _get(b, path))
+            if result:
+                return result * order
+
+        return 0
+
+    docs.sort(key=cmp_to_key(compare))
+
+
+class MemoryCursor:
+    """Cursor over the documents of a :obj:`~MemoryCollection` query.
+
+    The query runs on the first read, so `sort`, `skip` and `limit` can be chained.
+    """
+
+    _fetch: Any
+    _batch_size: int
+    _docs: Optional[List[Document]]
+    _sort: Optional[SortSpec]
+    _direction: int
+    _skip: int
+    _limit: int
+
+    def __init__(self, fetch: Any) -> None:
+        self._fetch = fetch
+        self._batch_size = 0
+        self._docs = None
+        self._sort = None
+        self._direction = 1
+        self._skip = 0
+        self._limit = 0
+
+    def __aiter__(self) -> "MemoryCursor":
+        return self
+
+    async def __anext__(self) -> Document:
+        return await self.next()
+
+    async def __aenter__(self) -> "MemoryCursor":
+        return self
+
+    async def __aexit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> None:
+        await self.close()
+
+    def _evaluate(self) -> List[Document]:
+        if self._docs is None:
+            docs = self._fetch()
+            sort_documents(docs, self._sort, self._direction)
+            docs = docs[self._skip :]
+            if self._limit:
+                docs = docs[: self._limit]
+
+            self._docs = docs
+
+        return self._docs
+
+    def sort(self, key_or_list: SortSpec, direction: int = 1) -> "MemoryCursor":
+        self._sort = key_or_list
+        self._direction = direction
+        return self
+
+    def skip(self, skip: int) -> "MemoryCursor":
+        self._skip = skip
+        return self
+
+    def limit(self, limit: int) -> "MemoryCursor":
+        self._limit = limit
+        return self
+
+    def batch_size(self, batch_size: int) -> "MemoryCursor":
+        self._batch_size = batch_size
+        return self
+
+    async def next(self) -> Document:
+        docs = self._evaluate()
+        if not docs:
+            raise StopAsyncIteration
+
+        return docs.pop(0)
+
+    async def to_list(self, length: Optional[int] = None) -> List[Document]:
+        docs = self._evaluate()
+        if length is None:
+            length = len(docs)
+
+        result, docs[:length] = docs[:length], []
+        return result
+
+    async def batches(self) -> AsyncIterator[List[Document]]:
+        docs = self._evaluate()
+        while docs:
+            yield await self.to_list(self._batch_size or None)
+
+    async def close(self) -> None:
+        self._docs = []
+
+    @property
+    def alive(self) -> bool:
+        return self._docs is None or bool(self._docs)
+
+
+class MemoryChangeStream:
+    """Change stream of a :obj:`~MemoryDatabase` or a :obj:`~MemoryCollection`.
+
+    Only `$match` stages are supported in the pipeline.
+    """
+
+    database: "MemoryDatabase"
+    collection: Optional[str]
+    full_document: Optional[str]
+    pipeline: List[Mapping[str, Any]]
+    queue: "asyncio.Queue[Mapping[str, Any]]"
+    resume_token: Optional[Mapping[str, Any]]
+
+    _closed: bool
+
+    def __init__(
+        self,
+        database: "MemoryDatabase",
+        collection: Optional[str],
+        pipeline: Optional[List[Mapping[str, Any]]],
+        full_document: Optional[str],
+    ) -> None:
+        for stage in pipeline or []:
+            if set(stage) != {"$match"}:
+                raise OperationFailure(f"Unsupported change stream stage: {list(stage)}")
+
+        self.database = database
+        self.collection = collection
+        self.full_document = full_document
+        self.pipeline = pipeline or []
+        self.queue = asyncio.Queue()
+        self.resume_token = None
+
+        self._closed = False
+
+    def __aiter__(self) -> "MemoryChangeStream":
+        return self
+
+    async def __anext__(self) -> Mapping[str, Any]:
+        return await self.next()
+
+    async def __aenter__(self) -> "MemoryChangeStream":
+        self.database._streams.add(self)  # skipcq: PYL-W0212
+        return self
+
+    async def __aexit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> None:
+        await self.close()
+
+    def _publish(self, change: Mapping[str, Any]) -> None:
+        if self.collection is not None and change["ns"]["coll"] != self.collection:
+            return
+
+        if change["operationType"] == "update" and self.full_document != "updateLookup":
+            change = {k: v for k, v in change.items() if k != "fullDocument"}
+
+        if all(match(change, stage["$match"]) for stage in self.pipeline):
+            self.queue.put_nowait(deepcopy(change))
+
+    async def next(self) -> Mapping[str, Any]:
+        self.database._streams.add(self)  # skipcq: PYL-W0212
+        change = await self.queue.get()
+        self.resume_token = change["_id"]
+        return change
+
+    async def try_next(self) -> Optional[Mapping[str, Any]]:
+        self.database._streams.add(self)  # skipcq: PYL-W0212
+        try:
+            change = self.queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return None
+
+        self.resume_token = change["_id"]
+        return change
+
+    async def close(self) -> None:
+        self._closed = True
+        self.database._streams.discard(self)  # skipcq: PYL-W0212
+
+    @property
+    def alive(self) -> bool:
+        return not self._closed
+
+
+class MemoryCollection:
+    """In-process stand-in of :obj:`~AsyncCollection`.
+
+    Implements the subset of the collection API the plugins use on plain
+    dictionaries. Documents are copied in and out like a round trip to the server.
+    """
+
+    database: "MemoryDatabase"
+    name: str
+
+    _docs: MutableMapping[Any, Document]
+
+    def __init__(self, database: "MemoryDatabase", name: str) -> None:
+        self.database = database
+        self.name = name
+
+        self._docs = {}
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    @property
+    def full_name(self) -> str:
+        return f"{self.database.name}.{self.name}"
+
+    def _count(self, op: str) -> None:
+        self.database.op_counts[(self.name, op)] += 1
+
+    def _matching(self, query: Optional[Mapping[str, Any]]) -> List[Document]:
+        if query and set(query) == {"_id"} and not _is_operator_spec(query["_id"]):
+            doc = self._docs.get(query["_id"])
+            return [doc] if doc is not None else []
+
+        return [doc for doc in self._docs.values() if match(doc, query)]
+
+    def _publish(self, op: str, doc: Mapping[str, Any], **extra: Any) -> None:
+        self.database._publish(  # skipcq: PYL-W0212
+            {
+                "operationType": op,
+                "ns": {"db": self.database.name, "coll": self.name},
+                "documentKey": {"_id": doc["_id"]},
+                **extra,
+            }
+        )
+
+    def _insert(self, doc: Mapping[str, Any]) -> Document:
+        doc = deepcopy(dict(doc))
+        doc.setdefault("_id", ObjectId())
+        if doc["_id"] in self._docs:
+            raise OperationFailure(f"E11000 duplicate key error collection: {self.full_name}")
+
+        self._docs[doc["_id"]] = doc
+        self._publish("insert", doc, fullDocument=doc)
+        return doc
+
+    def _update(
+        self, query: Mapping[str, Any], update: Mapping[str, Any], upsert: bool, multi: bool
+    ) -> Tuple[int, int, Any, Optional[Document]]:
+        if not update or not all(key.startswith("$") for key in update):
+            raise ValueError("update only works with $ operators")
+
+        docs = self._matching(query)
+        if not docs:
+            if not upsert:
+                return 0, 0, None, None
+
+            doc = _seed(query)
+            apply_update(doc, update, inserting=True)
+            doc = self._insert(doc)
+            return 0, 0, doc["_id"], doc
+
+        modified = 0
+        for doc in docs if multi else docs[:1]:
+            before = deepcopy(doc)
+            updated, removed = apply_update(doc, update)
+            if doc != before:
+                modified += 1
+                # Stores handing out copies need it back
+                self._docs[doc["_id"]] = doc
+                self._publish(
+                    "update",
+                    doc,
+                    fullDocument=doc,
+                    updateDescription={"updatedFields": updated, "removedFields": removed},
+                )
+
+        return len(docs) if multi else 1, modified, None, docs[0]
+
+    async def find_one(
+        self, query: Optional[Mapping[str, Any]] = None, projection: Optional[Any] = None, **kwargs
+    ) -> Optional[Document]:
+        self._count("find")
+        docs = self._matching(query)
+        sort_documents(docs, kwargs.get("sort"))
+        return project(docs[0], projection) if docs else None
+
+    def find(
+        self,
+        query: Optional[Mapping[str, Any]] = None,
+        projection: Optional[Any] = None,
+        *,
+        sort: Optional[SortSpec] = None,
+        skip: int = 0,
+        limit: int = 0,
+        batch_size: int = 0,
+        **kwargs: Any,  # skipcq: PYL-W0613
+    ) -> MemoryCursor:
+        def fetch() -> List[Document]:
+            self._count("find")
+            return [project(doc, projection) for doc in self._matching(query)]
+
+        cursor = MemoryCursor(fetch).skip(skip).limit(limit).batch_size(batch_size)
+        return cursor.sort(sort) if sort else cursor
+
+    async def count_documents(self, query: Mapping[str, Any], **kwargs: Any) -> int:
+        self._count("count")
+        docs = self._matching(query)
+        return len(docs[kwargs.get("skip", 0) :][: kwargs.get("limit") or None])
+
+    async def estimated_document_count(self, **kwargs: Any) -> int:  # skipcq: PYL-W0613
+        self._count("count")
+        return len(self._docs)
+
+    async def distinct(self, key: str, query: Optional[Mapping[str, Any]] = None) -> List[Any]:
+        self._count("distinct")
+        values: List[Any] = []
+        for doc in self._matching(query):
+            for value in _flatten(_resolve(doc, key.split("."))):
+                if value is not _MISSING and not isinstance(value, list) and value not in values:
+                    values.append(deepcopy(value))
+
+        return values
+
+    async def insert_one(self, document: Mapping[str, Any], **kwargs: Any) -> InsertOneResult:
+        self._count("insert")
+        doc = self._insert(document)
+        if isinstance(document, MutableMapping):
+            document.setdefault("_id", doc["_id"])
+
+        return InsertOneResult(doc["_id"], True)
+
+    async def insert_many(
+        self, documents: Iterable[Mapping[str, Any]], **kwargs: Any
+    ) -> InsertManyResult:
+        self._count("insert")
+        return InsertManyResult([self._insert(doc)["_id"] for doc in documents], True)
+
+    async def update_one(
+        self, query: Mapping[str, Any], update: Mapping[str, Any], *, upsert: bool = False, **kwargs
+    ) -> UpdateResult:
+        self._count("update")
+        matched, modified, upserted, _ = self._update(query, update, upsert, False)
+        raw = {"n": matched or int(upserted is not None), "nModified": modified}
+        if upserted is not None:
+            raw["upserted"] = upserted
+
+        return UpdateResult(raw, True)
+
+    async def update_many(
+        self, query: Mapping[str, Any], update: Mapping[str, Any], *, upsert: bool = False, **kwargs
+    ) -> UpdateResult:
+        self._count("update")
+        matched, modified, upserted, _ = self._update(query, update, upsert, True)
+        raw = {"n": matched or int(upserted is not None), "nModified": modified}
+        if upserted is not None:
+            raw["upserted"] = upserted
+
+        return UpdateResult(raw, True)
+
+    async def replace_one(
+        self,
+        query: Mapping[str, Any],
+        replacement: Mapping[str, Any],
+        *,
+        upsert: bool = False,
+        **kwargs: Any,
+    ) -> UpdateResult:
+        self._count("update")
+        docs = self._matching(query)
+        if not docs:
+            if not upsert:
+                return UpdateResult({"n": 0, "nModified": 0}, True)
+
+            doc = self._insert({**_seed(query), **replacement})
+            return UpdateResult({"n": 1, "nModified": 0, "upserted": doc["_id"]}, True)
+
+        doc = deepcopy(dict(replacement))
+        doc["_id"] = docs[0]["_id"]
+        self._docs[doc["_id"]] = doc
+        self._publish("replace", doc, fullDocument=doc)
+        return UpdateResult({"n": 1, "nModified": 1}, True)
+
+    async def find_one_and_update(
+        self,
+        query: Mapping[str, Any],
+        update: Mapping[str, Any],
+        projection: Optional[Any] = None,
+        *,
+        sort: Optional[SortSpec] = None,
+        upsert: bool = False,
+        return_document: bool = ReturnDocument.BEFORE,
+        **kwargs: Any,
+    ) -> Optional[Document]:
+        self._count("update")
+        docs = self._matching(query)
+        sort_documents(docs, sort)
+        if docs:
+            # Only touch the first document in sort order
+            query = {"_id": docs[0]["_id"]}
+
+        before = project(docs[0], projection) if docs else None
+        _, _, upserted, doc = self._update(query, update, upsert, False)
+        if return_document == ReturnDocument.AFTER and doc is not None:
+            return project(doc, projection)
+
+        return before
+
+    async def find_one_and_delete(
+        self,
+        query: Mapping[str, Any],
+        projection: Optional[Any] = None,
+        *,
+        sort: Optional[SortSpec] = None,
+        **kwargs: Any,
+    ) -> Optional[Document]:
+        self._count("delete")
+        docs = self._matching(query)
+        sort_documents(docs, sort)
+        if not docs:
+            return None
+
+        doc = self._docs.pop(docs[0]["_id"])
+        self._publish("delete", doc)
+        return project(doc, projection)
+
+    async def delete_one(self, query: Mapping[str, Any], **kwargs: Any) -> DeleteResult:
+        self._count("delete")
+        docs = self._matching(query)[:1]
+        for doc in docs:
+            del self._docs[doc["_id"]]
+            self._publish("delete", doc)
+
+        return DeleteResult({"n": len(docs)}, True)
+
+    async def delete_many(self, query: Mapping[str, Any], **kwargs: Any) -> DeleteResult:
+        self._count("delete")
+        docs = self._matching(query)
+        for doc in docs:
+            del self._docs[doc["_id"]]
+            self._publish("delete", doc)
+
+        return DeleteResult({"n": len(docs)}, True)
+
+    async def bulk_write(self, requests: List[Any], **kwargs: Any) -> BulkWriteResult:
+        """Apply update and delete requests in order, counted as a single operation"""
+        self._count("bulk_write")
+        raw: MutableMapping[str, Any] = {
+            "nInserted": 0,
+            "nUpserted": 0,
+            "nMatched": 0,
+            "nModified": 0,
+            "nRemoved": 0,
+            "upserted": [],
+        }
+        for index, request in enumerate(requests):
+            if isinstance(request, (UpdateOne, UpdateMany)):
+                matched, modified, upserted, _ = self._update(
+                    request._filter,  # skipcq: PYL-W0212
+                    request._doc,  # skipcq: PYL-W0212
+                    bool(request._upsert),  # skipcq: PYL-W0212
+                    isinstance(request, UpdateMany),
+                )
+                raw["nMatched"] += matched
+                raw["nModified"] += modified
+                if upserted is not None:
+                    raw["nUpserted"] += 1
+                    raw["upserted"].append({"index": index, "_id": upserted})
+            elif isinstance(request, (DeleteOne, DeleteMany)):
+                docs = self._matching(request._filter)  # skipcq: PYL-W0212
+                if isinstance(request, DeleteOne):
+                    docs = docs[:1]
+                for doc in docs:
+                    del self._docs[doc["_id"]]
+                    self._publish("delete", doc)
+                raw["nRemoved"] += len(docs)
+            else:
+                raise OperationFailure(f"Unsupported bulk write request: {request!r}")
+
+        return BulkWriteResult(raw, True)
+
+    def buffered(self, *, interval: float = 0.5, max_ops: int = 1000) -> BulkWriter:
+        return BulkWriter(self, interval=interval, max_ops=max_ops)
+
+    def cached(self, *, ttl: float = 60, maxsize: int = 1024, streams: Optional[Any] = None) -> Any:
+        # The cache matches documents with our query engine, it imports this module
+        from .cached import CachedCollection
+
+        return CachedCollection(self, ttl=ttl, maxsize=maxsize, streams=streams)
+
+    def aggregate(self, pipeline: List[Mapping[str, Any]], **kwargs: Any) -> MemoryCursor:
+        def fetch() -> List[Document]:
+            self._count("aggregate")
+            docs = [deepcopy(doc) for doc in self._docs.values()]
+            for stage in pipeline:
+                (name, arg), *_ = stage.items()
+                if name == "$match":
+                    docs = [doc for doc in docs if match(doc, arg)]
+                elif name == "$project" and all(v in {0, 1, True, False} for v in arg.values()):
+                    docs = [project(doc, arg) for doc in docs]
+                elif name == "$sort":
+                    sort_documents(docs, list(arg.items()))
+                elif name == "$skip":
+                    docs = docs[arg:]
+                elif name == "$limit":
+                    docs = docs[:arg]
+                elif name == "$count":
+                    docs = [{arg: len(docs)}] if docs else []
+                else:
+                    raise OperationFailure(f"Unsupported aggregation stage: {name}")
+
+            return docs
+
+        return MemoryCursor(fetch)
+
+    async def create_index(self, keys: Any, **kwargs: Any) -> str:
+        if isinstance(keys, str):
+            return f"{keys}_1"
+
+        return "_".join(f"{key}_{direction}" for key, direction in keys)
+
+    async def create_indexes(
+        self, indexes: List[Any], **kwargs: Any  # skipcq: PYL-W0613
+    ) -> List[str]:
+        self._count("create_indexes")
+        return [index.document["name"] for index in indexes]
+
+    async def drop(self, **kwargs: Any) -> None:  # skipcq: PYL-W0613
+        self._docs.clear()
+        self.database._publish(  # skipcq: PYL-W0212
+            {"operationType": "drop", "ns": {"db": self.database.name, "coll": self.name}}
+        )
+
+    def watch(
+        self,
+        pipeline: Optional[List[Mapping[str, Any]]] = None,
+        *,
+        full_document: Optional[str] = None,
+        **kwargs: Any,  # skipcq: PYL-W0613
+    ) -> MemoryChangeStream:
+        return MemoryChangeStream(self.database, self.name, pipeline, full_document)
+
+
+class MemoryDatabase:
+    """In-process stand-in of :obj:`~AsyncDatabase`, for replays and tests.
+
+    Every operation is counted per collection in `op_counts`.
+    """
+
+    name: str
+    op_counts: "Counter[Tuple[str, str]]"
+
+    _collections: MutableMapping[str, MemoryCollection]
+    _streams: Set[MemoryChangeStream]
+    _token: int
+
+    def __init__(self, name: str = "AnjaniBot") -> None:
+        self.name = name
+        self.op_counts = Counter()
+
+        self._collections = {}
+        self._streams = set()
+        self._token = 0
+
+    def __getitem__(self, name: str) -> MemoryCollection:
+        return self.get_collection(name)
+
+    def _publish(self, change: Mapping[str, Any]) -> None:
+        self._token += 1
+        change = {"_id": {"_data": f"{self._token:016x}"}, **change}
+        for stream in list(self._streams):
+            stream._publish(change)  # skipcq: PYL-W0212
+
+    def get_collection(self, name: str, **kwargs: Any) -> MemoryCollection:  # skipcq: PYL-W0613
+        try:
+            return self._collections[name]
+        except KeyError:
+            collection = self._collections[name] = MemoryCollection(self, name)
+            return collection
+
+    async def list_collection_names(self, **kwargs: Any) -> List[str]:  # skipcq: PYL-W0613
+        return [name for name, collection in self._collections.items() if len(collection)]
+
+    def watch(
+        self,
+        pipeline: Optional[List[Mapping[str, Any]]] = None,
+        *,
+        full_document: Optional[str] = None,
+        **kwargs: Any,  # skipcq: PYL-W0613
+    ) -> MemoryChangeStream:
+        return MemoryChangeStream(self, None, pipeline, full_document)
+
+    async def close(self) -> None:
+        for stream in list(self._streams):
+            await stream.close()
@@ -0,0 +1,266 @@
+"""Anjani database on pymongo's asyncio client"""
+# Copyright (C) 2020 - 2023  UserbotIndo Team, <https://github.com/userbotindo.git>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+)
+
+from .bulk_writer import BulkWriter
+from .cached import CachedCollection
+from .cursor_base import get_default_batch_size
+
+try:
+    from pymongo import AsyncMongoClient  # type: ignore
+except ImportError:
+    AsyncMongoClient = None
+
+# Documents per round trip of batches() when the cursor has no batch size of its own
+FALLBACK_BATCH_SIZE = 101
+
+
+def available() -> bool:
+    """Whether the installed pymongo ships the asyncio client (4.10 or newer)"""
+    return AsyncMongoClient is not None
+
+
+class NativeCursor:
+    """Cursor of the asyncio client, with the extras of :obj:`~AsyncCursor`.
+
+    Aggregations and change streams of the asyncio client have to be awaited
+    before they can be iterated, they are opened on first use instead so every
+    backend can be used the same way.
+    """
+
+    dispatch: Any
+
+    _open: Optional[Callable[[], Awaitable[Any]]]
+    _batch_size: int
+    _options: List[Tuple[str, Tuple[Any, ...], Mapping[str, Any]]]
+
+    def __init__(
+        self,
+        cursor: Any = None,
+        *,
+        opener: Optional[Callable[[], Awaitable[Any]]] = None,
+        batch_size: int = 0,
+    ) -> None:
+        self.dispatch = cursor
+        self._open = opener
+        self._batch_size = batch_size
+        self._options = []
+
+    async def _cursor(self) -> Any:
+        if self._open is not None:
+            opener, self._open = self._open, None
+            self.dispatch = await opener()
+            # Options set before the cursor was opened
+            for name, args, kwargs in self._options:
+                getattr(self.dispatch, name)(*args, **kwargs)
+            self._options.clear()
+
+        return self.dispatch
+
+    def _option(self, name: str, *args: Any, **kwargs: Any) -> "NativeCursor":
+        if self._open is not None:
+            self._options.append((name, args, kwargs))
+        else:
+            getattr(self.dispatch, name)(*args, **kwargs)
+
+        return self
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.dispatch, name)
+
+    def __aiter__(self) -> "NativeCursor":
+        return self
+
+    async def __anext__(self) -> Any:
+        cursor = await self._cursor()
+        return await cursor.next()
+
+    async def __aenter__(self) -> "NativeCursor":
+        await self._cursor()
+        return self
+
+    async def __aexit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> None:
+        await self.close()
+
+    @property
+    def resume_token(self) -> Any:
+        return self.dispatch.resume_token if self.dispatch is not None else None
+
+    def batch_size(self, batch_size: int) -> "NativeCursor":
+        self._batch_size = batch_size
+        return self._option("batch_size", batch_size)
+
+    def limit(self, limit: int) -> "NativeCursor":
+        return self._option("limit", limit)
+
+    def skip(self, skip: int) -> "NativeCursor":
+        return self._option("skip", skip)
+
+    def sort(self, *args: Any, **kwargs: Any) -> "NativeCursor":
+        return self._option("sort", *args, **kwargs)
+
+    async def next(self) -> Any:
+        return await self.__anext__()
+
+    async def to_list(self, length: Optional[int] = None) -> List[Any]:
+        cursor = await self._cursor()
+        return await cursor.to_list(length)
+
+    async def batches(self) -> AsyncIterator[List[Any]]:
+        cursor = await self._cursor()
+        while True:
+            batch = await cursor.to_list(self._batch_size or FALLBACK_BATCH_SIZE)
+            if not batch:
+                return
+
+            yield batch
+
+    async def try_next(self) -> Any:
+        cursor = await self._cursor()
+        return await cursor.try_next()
+
+    async def close(self) -> None:
+        self._open = None
+        if self.dispatch is not None:
+            await self.dispatch.close()
+
+
+class NativeCollection:
+    """:obj:`~AsyncCollection` API on a collection of pymongo's asyncio client"""
+
+    database: "NativeDatabase"
+    dispatch: Any
+
+    def __init__(self, database: "NativeDatabase", collection: Any) -> None:
+        self.database = database
+        self.dispatch = collection
+
+    def __getattr__(self, name: str) -> Any:
+        # Every other operation is already a coroutine with the same signature
+        return getattr(self.dispatch, name)
+
+    def __getitem__(self, name: str) -> "NativeCollection":
+        return NativeCollection(self.database, self.dispatch[name])
+
+    def __hash__(self) -> int:
+        return hash((self.database, self.name))
+
+    def find(self, *args: Any, **kwargs: Any) -> NativeCursor:
+        kwargs.setdefault("batch_size", get_default_batch_size())
+        return NativeCursor(self.dispatch.find(*args, **kwargs), batch_size=kwargs["batch_size"])
+
+    def aggregate(
+        self, pipeline: List[Mapping[str, Any]], *args: Any, **kwargs: Any
+    ) -> NativeCursor:
+        batch_size = get_default_batch_size()
+        if batch_size and "batchSize" not in kwargs:
+            kwargs["batchSize"] = batch_size
+
+        return NativeCursor(
+            opener=lambda: self.dispatch.aggregate(pipeline, *args, **kwargs),
+            batch_size=batch_size,
+        )
+
+    def watch(self, *args: Any, **kwargs: Any) -> NativeCursor:
+        return NativeCursor(opener=lambda: self.dispatch.watch(*args, **kwargs))
+
+    def buffered(self, *, interval: float = 0.5, max_ops: int = 1000) -> BulkWriter:
+        return BulkWriter(self, interval=interval, max_ops=max_ops)
+
+    def cached(
+        self, *, ttl: float = 60, maxsize: int = 1024, streams: Optional[Any] = None
+    ) -> CachedCollection:
+        return CachedCollection(self, ttl=ttl, maxsize=maxsize, streams=streams)
+
+
+class NativeDatabase:
+    """:obj:`~AsyncDatabase` API on a database of pymongo's asyncio client"""
+
+    client: "NativeClient"
+    dispatch: Any
+
+    def __init__(self, client: "NativeClient", database: Any) -> None:
+        self.client = client
+        self.dispatch = database
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.dispatch, name)
+
+    def __getitem__(self, name: str) -> NativeCollection:
+        return self.get_collection(name)
+
+    def __hash__(self) -> int:
+        return hash((self.client, self.name))
+
+    def get_collection(self, name: str, **kwargs: Any) -> NativeCollection:
+        return NativeCollection(self, self.dispatch.get_collection(name, **kwargs))
+
+    def aggregate(
+        self, pipeline: List[Mapping[str, Any]], *args: Any, **kwargs: Any
+    ) -> NativeCursor:
+        return NativeCursor(opener=lambda: self.dispatch.aggregate(pipeline, *args, **kwargs))
+
+    def watch(self, *args: Any, **kwargs: Any) -> NativeCursor:
+        return NativeCursor(opener=lambda: self.dispatch.watch(*args, **kwargs))
+
+    async def list_collection_names(
+        self, *, query: Optional[Mapping[str, Any]] = None, **kwargs: Any
+    ) -> List[str]:
+        return await self.dispatch.list_collection_names(filter=query, **kwargs)
+
+    async def close(self) -> None:
+        await self.client.close()
+
+
+class NativeClient:
+    """:obj:`~AsyncClient` API on pymongo's asyncio client.
+
+    Operations run on the event loop, without the thread hop of the wrapped
+    synchronous driver. Needs pymongo 4.10 or newer, see :obj:`~available`.
+    """
+
+    dispatch: Any
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        if AsyncMongoClient is None:
+            raise RuntimeError("pymongo's asyncio client needs pymongo 4.10 or newer")
+
+        self.dispatch = AsyncMongoClient(*args, **kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.dispatch, name)
+
+    def __getitem__(self, name: str) -> NativeDatabase:
+        return self.get_database(name)
+
+    def get_database(self, name: Optional[str] = None, **kwargs: Any) -> NativeDatabase:
+        return NativeDatabase(self, self.dispatch.get_database(name, **kwargs))
+
+    def watch(self, *args: Any, **kwargs: Any) -> NativeCursor:
+        return NativeCursor(opener=lambda: self.dispatch.watch(*args, **kwargs))
+
+    async def close(self) -> None:
+        await self.dispatch.close()
@@ -0,0 +1,223 @@
+"""Anjani database stored in a local SQLite file"""
+# Copyright (C) 2020 - 2023  UserbotIndo Team, <https://github.com/userbotindo.git>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import sqlite3
+from contextlib import contextmanager
+from typing import Any, Iterable, Iterator, List, Mapping, MutableMapping, Optional
+
+from bson import json_util
+from pymongo.results import (
+    BulkWriteResult,
+    DeleteResult,
+    InsertManyResult,
+    UpdateResult,
+)
+
+from .memory import Document, MemoryCollection, MemoryDatabase, match
+
+_JSON_OPTIONS = json_util.RELAXED_JSON_OPTIONS
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _encode(value: Any) -> str:
+    return json_util.dumps(value, json_options=_JSON_OPTIONS)
+
+
+def _decode(data: str) -> Any:
+    return json_util.loads(data, json_options=_JSON_OPTIONS)
+
+
+class SQLiteDocuments(MutableMapping[Any, Document]):
+    """Documents of a collection keyed by `_id`, stored as JSON in a table.
+
+    `chat_id` is extracted to an indexed generated column, every read returns
+    a fresh copy of the document.
+    """
+
+    connection: sqlite3.Connection
+    table: str
+
+    def __init__(self, connection: sqlite3.Connection, name: str) -> None:
+        self.connection = connection
+        self.table = _quote(name)
+
+        connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} ("
+            "id TEXT PRIMARY KEY, "
+            "doc TEXT NOT NULL, "
+            "chat_id GENERATED ALWAYS AS (json_extract(doc, '$.chat_id')) VIRTUAL)"
+        )
+        connection.execute(
+            f"CREATE INDEX IF NOT EXISTS {_quote(name + '_chat_id')} ON {self.table} (chat_id)"
+        )
+
+    def __getitem__(self, key: Any) -> Document:
+        row = self.connection.execute(
+            f"SELECT doc FROM {self.table} WHERE id = ?", (_encode(key),)
+        ).fetchone()
+        if row is None:
+            raise KeyError(key)
+
+        return _decode(row[0])
+
+    def __setitem__(self, key: Any, doc: Document) -> None:
+        # Upsert in place, keeping the rowid and so the insertion order
+        self.connection.execute(
+            f"INSERT INTO {self.table} (id, doc) VALUES (?, ?) "
+            "ON CONFLICT (id) DO UPDATE SET doc = excluded.doc",
+            (_encode(key), _encode(doc)),
+        )
+
+    def __delitem__(self, key: Any) -> None:
+        cursor = self.connection.execute(f"DELETE FROM {self.table} WHERE id = ?", (_encode(key),))
+        if not cursor.rowcount:
+            raise KeyError(key)
+
+    def __contains__(self, key: Any) -> bool:
+        row = self.connection.execute(
+            f"SELECT 1 FROM {self.table} WHERE id = ?", (_encode(key),)
+        ).fetchone()
+        return row is not None
+
+    def __iter__(self) -> Iterator[Any]:
+        for (key,) in self.connection.execute(f"SELECT id FROM {self.table} ORDER BY rowid"):
+            yield _decode(key)
+
+    def __len__(self) -> int:
+        return self.connection.execute(f"SELECT count(*) FROM {self.table}").fetchone()[0]
+
+    def values(self) -> List[Document]:  # type: ignore
+        return [
+            _decode(doc)
+            for (doc,) in self.connection.execute(f"SELECT doc FROM {self.table} ORDER BY rowid")
+        ]
+
+    def by_chat(self, chat_id: int) -> List[Document]:
+        return [
+            _decode(doc)
+            for (doc,) in self.connection.execute(
+                f"SELECT doc FROM {self.table} WHERE chat_id = ? ORDER BY rowid", (chat_id,)
+            )
+        ]
+
+    def clear(self) -> None:
+        self.connection.execute(f"DELETE FROM {self.table}")
+
+
+class SQLiteCollection(MemoryCollection):
+    """:obj:`~MemoryCollection` persisted in a :obj:`~SQLiteDatabase`.
+
+    Queries on `_id` and on a plain `chat_id` value are answered from the
+    indexes, anything else scans the collection.
+    """
+
+    database: "SQLiteDatabase"
+
+    _docs: SQLiteDocuments
+
+    def __init__(self, database: "SQLiteDatabase", name: str) -> None:
+        super().__init__(database, name)
+
+        self._docs = SQLiteDocuments(database.connection, name)
+
+    def _matching(self, query: Optional[Mapping[str, Any]]) -> List[Document]:
+        chat_id = query.get("chat_id") if query else None
+        if isinstance(chat_id, int) and not isinstance(chat_id, bool):
+            return [doc for doc in self._docs.by_chat(chat_id) if match(doc, query)]
+
+        return super()._matching(query)
+
+    # Writes touching several documents are committed at once
+
+    async def insert_many(
+        self, documents: Iterable[Mapping[str, Any]], **kwargs: Any
+    ) -> InsertManyResult:
+        with self.database.transaction():
+            return await super().insert_many(documents, **kwargs)
+
+    async def update_many(
+        self, query: Mapping[str, Any], update: Mapping[str, Any], *, upsert: bool = False, **kwargs
+    ) -> UpdateResult:
+        with self.database.transaction():
+            return await super().update_many(query, update, upsert=upsert, **kwargs)
+
+    async def delete_many(self, query: Mapping[str, Any], **kwargs: Any) -> DeleteResult:
+        with self.database.transaction():
+            return await super().delete_many(query, **kwargs)
+
+    async def bulk_write(self, requests: List[Any], **kwargs: Any) -> BulkWriteResult:
+        with self.database.transaction():
+            return await super().bulk_write(requests, **kwargs)
+
+
+class SQLiteDatabase(MemoryDatabase):
+    """Database stored in a local SQLite file, for small deployments and tests.
+
+    Collections are tables of JSON documents, queried and updated with the
+    engine of :obj:`~MemoryDatabase`. Everything runs on the event loop,
+    change streams only see the writes of this process.
+
+    Parameters:
+        path (`str`):
+            Database file, created if missing. ":memory:" keeps it in memory.
+    """
+
+    path: str
+    connection: sqlite3.Connection
+
+    _collections: MutableMapping[str, SQLiteCollection]  # type: ignore
+
+    def __init__(self, path: str, name: str = "AnjaniBot") -> None:
+        super().__init__(name)
+
+        self.path = path
+        # Autocommit, grouped writes go through transaction()
+        self.connection = sqlite3.connect(path, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("PRAGMA synchronous = NORMAL")
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        if self.connection.in_transaction:
+            yield
+            return
+
+        self.connection.execute("BEGIN")
+        try:
+            yield
+        finally:
+            # Ordered writes applied before a failure are kept, like on the server
+            self.connection.execute("COMMIT")
+
+    def get_collection(self, name: str, **kwargs: Any) -> SQLiteCollection:  # skipcq: PYL-W0613
+        try:
+            return self._collections[name]
+        except KeyError:
+            collection = self._collections[name] = SQLiteCollection(self, name)
+            return collection
+
+    async def list_collection_names(self, **kwargs: Any) -> List[str]:  # skipcq: PYL-W0613
+        tables = self.connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' ORDER BY name"
+        ).fetchall()
+        return [name for (name,) in tables if len(self.get_collection(name))]
+
+    async def close(self) -> None:
+        await super().close()
+        self.connection.close()
@@ -0,0 +1,136 @@
+"""Anjani rate limiter"""
+# Copyright (C) 2020 - 2023  UserbotIndo Team, <https://github.com/userbotindo.git>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from collections import OrderedDict
+from time import monotonic
+from typing import Any, Callable, List, Optional
+
+
+class TokenBucketScope:
+    """Token buckets of one scope (eg: per user), refilled lazily on access.
+
+    Buckets are kept in least recently used order, so idle buckets that are
+    already refilled can be evicted from the front in amortized O(1).
+
+    Parameters:
+        rate (`float`): Number of token refilled per second.
+        burst (`int`): Maximum number of token a bucket can hold.
+        maxsize (`int`, *Optional*): Maximum number of bucket kept in memory.
+    """
+
+    rate: float
+    burst: int
+    maxsize: int
+
+    _buckets: "OrderedDict[Any, List[float]]"
+    _idle: float
+
+    def __init__(self, rate: float, burst: int, *, maxsize: int = 10000) -> None:
+        if rate <= 0 or burst < 1:
+            raise ValueError("rate and burst must be positive")
+
+        self.rate = rate
+        self.burst = burst
+        self.maxsize = maxsize
+
+        self._buckets = OrderedDict()
+        # Time it takes for an empty bucket to be full again
+        self._idle = burst / rate
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def refill(self, key: Any, now: float) -> List[float]:
+        """Return the `[tokens, updated_at]` bucket of the key, refilled up to now"""
+        try:
+            bucket = self._buckets[key]
+        except KeyError:
+            self._evict(now)
+            bucket = self._buckets[key] = [float(self.burst), now]
+            return bucket
+
+        self._buckets.move_to_end(key)
+        bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+        bucket[1] = now
+        return bucket
+
+    def _evict(self, now: float) -> None:
+        while self._buckets:
+            _, (_, updated_at) = next(iter(self._buckets.items()))
+            # A refilled bucket is the same as a missing one
+            if len(self._buckets) >= self.maxsize or now - updated_at >= self._idle:
+                self._buckets.popitem(last=False)
+            else:
+                break
+
+
+class RateLimiter:
+    """Synchronous token bucket limiter with per user, per chat and global buckets.
+
+    A call is allowed only if every bucket it touches has a token left, in which
+    case one token is taken from each of them.
+    """
+
+    user: TokenBucketScope
+    chat: TokenBucketScope
+    all: TokenBucketScope
+    clock: Callable[[], float]
+
+    def __init__(
+        self,
+        *,
+        user: TokenBucketScope,
+        chat: TokenBucketScope,
+        all: TokenBucketScope,  # skipcq: PYL-W0622
+        clock: Callable[[], float] = monotonic,
+    ) -> None:
+        self.user = user
+        self.chat = chat
+        self.all = all
+        self.clock = clock
+
+    def allow(self, user_id: int, chat_id: Optional[int] = None) -> bool:
+        """Take a token for the user in the chat, return False if rate limited"""
+        now = self.clock()
+        buckets = [self.user.refill(user_id, now), *self._shared(user_id, chat_id, now)]
+        return self._take(buckets)
+
+    def allow_user(self, user_id: int) -> bool:
+        """Take a token from the bucket of the user only"""
+        return self._take([self.user.refill(user_id, self.clock())])
+
+    def allow_chat(self, user_id: int, chat_id: Optional[int] = None) -> bool:
+        """Take a token from the chat and global buckets, the user one is left alone"""
+        return self._take(self._shared(user_id, chat_id, self.clock()))
+
+    def _shared(self, user_id: int, chat_id: Optional[int], now: float) -> List[List[float]]:
+        buckets = [self.all.refill(None, now)]
+        # Private chat shares the id of the user
+        if chat_id is not None and chat_id != user_id:
+            buckets.append(self.chat.refill(chat_id, now))
+
+        return buckets
+
+    @staticmethod
+    def _take(buckets: List[List[float]]) -> bool:
+        for bucket in buckets:
+            if bucket[0] < 1:
+                return False
+
+        for bucket in buckets:
+            bucket[0] -= 1
+
+        return True
@@ -19,7 +19,7 @@ from inspect import signature
 import pytest
 
 from anjani.error import BadArgument
-from anjani.util.converter import parse_arguments
+from anjani.util.converter import InvocationPlan, parse_arguments
 
 from . import Context, Message
 
@@ -145,3 +145,13 @@ class TestBaseConverter:
         with pytest.raises(BadArgument):
             await self.__parse_arguments(var_keyword)
             await self.__parse_arguments_no_args(var_keyword)
+
+    @pytest.mark.asyncio
+    async def test_unsupported_raises_fresh_error(self):
+        plan = InvocationPlan.compile(var_positional)
+        with pytest.raises(BadArgument) as first:
+            await plan(context)  # type: ignore
+        with pytest.raises(BadArgument) as second:
+            await plan(context)  # type: ignore
+
+        assert first.value is not second.value
@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+# Copyright (C) 2020 - 2023  UserbotIndo Team, <https://github.com/userbotindo.git>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+import gc
+
+import pytest
+
+from anjani.util.db import bulk_writer
+from anjani.util.db.bulk_writer import merge_update
+from anjani.util.db.memory import MemoryDatabase
+
+
+def test_merge_set_inc_add_to_set():
+    pending = {"$set": {"name": "a"}, "$inc": {"count": 1}, "$addToSet": {"chats": 1}}
+    assert merge_update(
+        pending, {"$set": {"name": "b"}, "$inc": {"count": 2}, "$addToSet": {"chats": 2}}
+    )
+    assert merge_update(pending, {"$addToSet": {"chats": {"$each": [1, 3]}}})
+    assert pending == {
+        "$set": {"name": "b"},
+        "$inc": {"count": 3},
+        "$addToSet": {"chats": {"$each": [1, 2, 3]}},
+    }
+
+
+def test_merge_push_slice():
+    pending = {"$push": {"samples": {"$each": [1], "$slice": -2}}}
+    assert merge_update(pending, {"$push": {"samples": {"$each": [2], "$slice": -2}}})
+    assert pending == {"$push": {"samples": {"$each": [1, 2], "$slice": -2}}}
+    assert not merge_update(pending, {"$push": {"samples": 3}})
+
+
+def test_merge_conflicts():
+    pending = {"$set": {"a.b": 1}, "$pull": {"c": 1}}
+    assert not merge_update(pending, {"$inc": {"a": 1}})
+    assert not merge_update(pending, {"$unset": {"a.b": ""}})
+    assert not merge_update(pending, {"$set": {"d": 1}, "$pull": {"c": 2}})
+    # Left untouched when the merge is refused
+    assert pending == {"$set": {"a.b": 1}, "$pull": {"c": 1}}
+
+
+def test_merge_same_operator_conflicts():
+    pending = {"$set": {"a": {"b": 1}}}
+    assert not merge_update(pending, {"$set": {"a.b": 2}})
+    assert pending == {"$set": {"a": {"b": 1}}}
+
+    pending = {"$inc": {"s.x": 1}}
+    assert not merge_update(pending, {"$inc": {"s": 1}})
+    assert pending == {"$inc": {"s.x": 1}}
+
+    # Siblings sharing a prefix don't conflict
+    assert merge_update(pending, {"$inc": {"s.xy": 1, "s.x": 2}})
+    assert pending == {"$inc": {"s.x": 3, "s.xy": 1}}
+
+
+@pytest.mark.asyncio
+async def test_coalesce_into_one_round_trip():
+    db = MemoryDatabase()
+    collection = db.get_collection("STATS")
+    writer = collection.buffered(interval=60)
+
+    for _ in range(100):
+        await writer.update_one({"_id": 1}, {"$inc": {"received": 1}}, upsert=True)
+    for chat in range(10):
+        await writer.update_one({"chat_id": chat}, {"$set": {"seen": True}}, upsert=True)
+
+    assert len(writer) == 11
+    assert not db.op_counts
+
+    await writer.flush()
+    assert db.op_counts == {("STATS", "bulk_write"): 1}
+    assert (await collection.find_one({"_id": 1}))["received"] == 100
+    assert await collection.count_documents({"seen": True}) == 10
+
+
+@pytest.mark.asyncio
+async def test_unmergeable_update_keeps_order():
+    db = MemoryDatabase()
+    collection = db.get_collection("USERS")
+    writer = collection.buffered(interval=60)
+
+    await writer.update_one({"_id": 1}, {"$set": {"value": 1}}, upsert=True)
+    await writer.update_one({"_id": 1}, {"$inc": {"value": 1}})
+
+    await writer.flush()
+    assert writer.round_trips == 2
+    assert (await collection.find_one({"_id": 1}))["value"] == 2
+
+
+@pytest.mark.asyncio
+async def test_flush_on_interval_and_max_ops():
+    db = MemoryDatabase()
+    collection = db.get_collection("CHATS")
+
+    writer = collection.buffered(interval=0.01)
+    await writer.update_one({"_id": 1}, {"$set": {"a": 1}}, upsert=True)
+    await asyncio.sleep(0.05)
+    assert await collection.count_documents({}) == 1
+
+    writer = collection.buffered(interval=60, max_ops=3)
+    for i in range(3):
+        await writer.update_one({"_id": 10 + i}, {"$set": {"a": 1}}, upsert=True)
+    await asyncio.sleep(0.01)
+    assert await collection.count_documents({}) == 4
+
+
+@pytest.mark.asyncio
+async def test_dropped_writer_is_released():
+    collection = MemoryDatabase().get_collection("CHATS")
+
+    writer = collection.buffered(interval=60)
+    await writer.update_one({"_id": 1}, {"$set": {"a": 1}}, upsert=True)
+    del writer
+    gc.collect()
+    # Pending updates keep the writer alive until flushed
+    await bulk_writer.flush_all()
+    assert await collection.count_documents({}) == 1
+
+    gc.collect()
+    assert not list(bulk_writer._writers)
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# Copyright (C) 2020 - 2023  UserbotIndo Team, <https://github.com/userbotindo.git>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+
+import pytest
+
+from anjani.core.change_streams import ChangeStreamService
+from anjani.util.db.cached import cache_key
+from anjani.util.db.memory import MemoryDatabase
+
+
+def test_cache_key_normalized():
+    assert cache_key({"a": 1, "b": 2}, {"x": 1}) == cache_key({"b": 2, "a": 1}, {"x": True})
+    assert cache_key({"a": {"x": 1, "y": 2}}, None) != cache_key({"a": {"y": 2, "x": 1}}, None)
+
+
+@pytest.mark.asyncio
+async def test_coalesce_and_hit():
+    db = MemoryDatabase()
+    collection = db.get_collection("NOTES")
+    await collection.insert_one({"chat_id": 1, "notes": {}})
+    db.op_counts.clear()
+
+    cached = collection.cached()
+    docs = await asyncio.gather(*(cached.find_one({"chat_id": 1}) for _ in range(10)))
+    assert all(doc is docs[0] for doc in docs)
+    assert await cached.find_one({"chat_id": 1}) is docs[0]
+    assert db.op_counts == {("NOTES", "find"): 1}
+    assert (cached.hits, cached.misses) == (1, 10)
+
+
+@pytest.mark.asyncio
+async def test_invalidate_on_write():
+    db = MemoryDatabase()
+    cached = db.get_collection("FEDERATIONS").cached()
+    await cached.insert_one({"_id": "a", "chats": [1]})
+
+    assert (await cached.find_one({"chats": 1}))["_id"] == "a"
+    assert await cached.find_one({"chats": 2}) is None
+    assert (await cached.find_one({"_id": "b"})) is None
+
+    await cached.update_one({"_id": "a"}, {"$push": {"chats": 2}})
+    assert (await cached.find_one({"chats": 2}))["_id"] == "a"
+    assert (await cached.find_one({"chats": 1}))["chats"] == [1, 2]
+
+
+@pytest.mark.asyncio
+async def test_invalidate_on_change_stream():
+    db = MemoryDatabase()
+    streams = ChangeStreamService(db)
+    cached = db.get_collection("RULES").cached(streams=streams)
+    await streams.start()
+    try:
+        await db.get_collection("RULES").insert_one({"chat_id": 1, "rules": "old"})
+        assert (await cached.find_one({"chat_id": 1}))["rules"] == "old"
+
+        # Written behind the view
+        await db.get_collection("RULES").update_one({"chat_id": 1}, {"$set": {"rules": "new"}})
+        await asyncio.sleep(0.01)
+        assert (await cached.find_one({"chat_id": 1}))["rules"] == "new"
+    finally:
+        await streams.stop()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+# Copyright (C) 2020 - 2023  UserbotIndo Team, <https://github.com/userbotindo.git>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import asyncio
+
+import pytest
+
+from anjani.core.catch_up import CatchUpFeeder
+from anjani.core.sharded_dispatcher import ShardedDispatcher
+
+
+@pytest.mark.asyncio
+async def test_put_waits_for_spilled_shards():
+    release = asyncio.Event()
+
+    async def handle() -> None:
+        await release.wait()
+
+    shards = ShardedDispatcher(1, maxsize=1, overflow="spill")
+    shards.start()
+    for _ in range(5):
+        await shards.submit(None, handle)
+    await asyncio.sleep(0)
+
+    queue: "asyncio.Queue" = asyncio.Queue()
+    feeder = CatchUpFeeder(
+        queue,
+        rate=0,
+        high_watermark=3,
+        service_max_age=0,
+        start_pts=0,
+        depth=lambda: queue.qsize() + shards.depth,
+    )
+
+    put = asyncio.ensure_future(feeder.put((None, {}, {})))
+    await asyncio.sleep(0.2)
+    # The client queue is empty but the shards are over the watermark
+    assert not put.done()
+    assert queue.empty()
+
+    release.set()
+    await asyncio.wait_for(put, 1)
+    assert queue.qsize() == 1
+    await shards.stop()
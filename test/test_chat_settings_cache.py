@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# Copyright (C) 2020 - 2023  UserbotIndo Team, <https://github.com/userbotindo.git>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import asyncio
+
+import pytest
+
+from anjani.core.change_streams import ChangeStreamService
+from anjani.core.chat_settings_cache import ChatSettingsCache
+from anjani.util.db.memory import MemoryDatabase
+
+
+async def settings(maxsize: int = 100):
+    db = MemoryDatabase()
+    await db.get_collection("LOCKINGS").insert_many(
+        [{"chat_id": chat_id, "type": ["all"], "note": ""} for chat_id in range(5)]
+    )
+    cache = ChatSettingsCache(db, ChangeStreamService(db), maxsize=maxsize)
+    cache.register("LOCKINGS", fields=["type"])
+    return db, cache
+
+
+@pytest.mark.asyncio
+async def test_lru_bound():
+    _, cache = await settings(maxsize=2)
+    await cache.load(0)
+    await cache.load(1)
+    assert cache.peek(0) is not None  # 0 is now the most recent
+    await cache.load(2)
+
+    assert len(cache) == 2
+    assert cache.peek(1) is None
+    # Only the registered fields are kept
+    assert set(cache.peek(0)["LOCKINGS"]) == {"_id", "type"}
+    assert cache.peek(2) is not None
+
+
+@pytest.mark.asyncio
+async def test_coalesce_misses():
+    db, cache = await settings()
+    collection = db.get_collection("LOCKINGS")
+    find_one = collection.find_one
+    calls = []
+
+    async def counting(*args, **kwargs):
+        calls.append(args)
+        await asyncio.sleep(0.01)
+        return await find_one(*args, **kwargs)
+
+    collection.find_one = counting  # type: ignore
+    snapshots = await asyncio.gather(*(cache.load(3) for _ in range(10)))
+
+    assert len(calls) == 1
+    assert all(snapshot is snapshots[0] for snapshot in snapshots)
+    assert await cache.get(3, "LOCKINGS") is snapshots[0]["LOCKINGS"]
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_change_stream_invalidation():
+    db, cache = await settings()
+    await cache.streams.start()
+    cache.start()
+    await asyncio.sleep(0)
+    collection = db.get_collection("LOCKINGS")
+    for chat_id in range(3):
+        await cache.load(chat_id)
+
+    # Fields the snapshot doesn't hold are filtered out
+    await collection.update_one({"chat_id": 0}, {"$set": {"note": "x"}})
+    await collection.update_one({"chat_id": 1}, {"$set": {"type": []}})
+    await collection.delete_one({"chat_id": 2})
+    await asyncio.sleep(0.05)
+
+    assert cache.peek(0) is not None
+    assert cache.peek(1) is None
+    assert cache.peek(2) is None
+    assert (await cache.get(1, "LOCKINGS"))["type"] == []
+    assert await cache.get(2, "LOCKINGS") is None
+
+    await cache.stop()
+    await cache.streams.stop()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# Copyright (C) 2020 - 2023  UserbotIndo Team, <https://github.com/userbotindo.git>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+from types import SimpleNamespace
+
+import pytest
+
+from anjani.core.event_context import EventContext
+from anjani.listener import Prefetch
+from anjani.util.db.memory import MemoryDatabase
+
+
+def test_parse():
+    assert Prefetch.parse("USERS:_id={from_user.id}") == Prefetch(
+        "USERS", "_id", ("from_user", "id")
+    )
+    assert Prefetch.parse("USERS:_id={from_user.id}[pred_sample,spam]").fields == (
+        "pred_sample",
+        "spam",
+    )
+    with pytest.raises(ValueError):
+        Prefetch.parse("USERS:_id={from_user.id}[]")
+
+
+@pytest.mark.asyncio
+async def test_prefetch_projection():
+    db = MemoryDatabase()
+    await db.get_collection("USERS").insert_one({"_id": 1, "hash": "a", "spam": True, "x": 0})
+    event = SimpleNamespace(from_user=SimpleNamespace(id=1))
+
+    context = await EventContext.prefetch(
+        db,
+        [
+            Prefetch.parse("USERS:_id={from_user.id}[hash]"),
+            Prefetch.parse("USERS:_id={from_user.id}[spam]"),
+        ],
+        event,
+    )
+    assert await context.find_one("USERS", "_id", 1) == {"_id": 1, "hash": "a", "spam": True}
+
+    context = await EventContext.prefetch(
+        db,
+        [
+            Prefetch.parse("USERS:_id={from_user.id}[hash]"),
+            Prefetch.parse("USERS:_id={from_user.id}"),
+        ],
+        event,
+    )
+    assert (await context.find_one("USERS", "_id", 1))["x"] == 0
+
+
+@pytest.mark.asyncio
+async def test_fallback_projection():
+    db = MemoryDatabase()
+    await db.get_collection("USERS").insert_one({"_id": 1, "hash": "a", "spam": True})
+
+    doc = await EventContext(db).find_one("USERS", "_id", 1, {"spam": 1})
+    assert doc == {"_id": 1, "spam": True}
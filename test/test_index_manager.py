@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# Copyright (C) 2020 - 2023  UserbotIndo Team, <https://github.com/userbotindo.git>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from pymongo import IndexModel
+
+from anjani.core.index_manager import IndexManager
+
+
+class StubCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def to_list(self):
+        return self.docs
+
+
+class StubDatabase:
+    def __init__(self, stats):
+        self.stats = stats
+
+    def get_collection(self, name):
+        return SimpleNamespace(aggregate=lambda pipeline: StubCursor(self.stats))
+
+
+def stat(name, since, ops=0):
+    return {"name": name, "accesses": {"ops": ops, "since": since}}
+
+
+@pytest.mark.asyncio
+async def test_report():
+    now = datetime.now(timezone.utc)
+    manager = IndexManager(
+        StubDatabase(
+            [
+                stat("_id_", now - timedelta(days=7)),
+                stat("chat_id_1", now - timedelta(days=7), ops=5),
+                stat("old_1", now - timedelta(days=7)),
+                stat("fresh_1", now),
+            ]
+        )
+    )
+    specs = {"NOTES": [IndexModel("chat_id"), IndexModel("name")]}
+
+    report = await manager.report(specs)
+    assert report.missing == [("NOTES", "name_1")]
+    assert report.unused == []
+
+    report = await manager.report(specs, unused_after=timedelta(days=1))
+    assert [name for _, name, _ in report.unused] == ["old_1"]
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+# Copyright (C) 2020 - 2023  UserbotIndo Team, <https://github.com/userbotindo.git>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import os
+
+import pytest
+
+from anjani import language
+from anjani.language import LanguageString, load_language
+
+
+def write(tmp_path) -> str:
+    path = tmp_path / "xx.yml"
+    path.write_text('greet: "Hi {name}"\nplain: "No {{braces}} here"\n', encoding="utf-8")
+    return str(path)
+
+
+def test_reload_from_cache(tmp_path, monkeypatch):
+    path = write(tmp_path)
+    compiled = load_language(path)
+    assert compiled == {
+        "greet": LanguageString("Hi {name}", None),
+        "plain": LanguageString("No {{braces}} here", "No {braces} here"),
+    }
+    assert os.path.exists(tmp_path / "__pycache__" / "xx.lang")
+
+    def fail(*args, **kwargs):
+        raise AssertionError("The YAML file was parsed again")
+
+    monkeypatch.setattr(language, "full_load", fail)
+    cached = load_language(path)
+    assert cached == compiled
+    assert all(isinstance(string, LanguageString) for string in cached.values())
+
+
+@pytest.mark.parametrize("data", [b"", b"\x80\x04garbage", b"\xe9\x02\x00\x00\x00"])
+def test_broken_cache_is_a_miss(tmp_path, data):
+    path = write(tmp_path)
+    os.makedirs(tmp_path / "__pycache__")
+    (tmp_path / "__pycache__" / "xx.lang").write_bytes(data)
+
+    assert load_language(path)["greet"] == LanguageString("Hi {name}", None)
+    # Replaced by a readable cache
+    assert (tmp_path / "__pycache__" / "xx.lang").read_bytes() != data
@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+# Copyright (C) 2020 - 2023  UserbotIndo Team, <https://github.com/userbotindo.git>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import re
+
+import pytest
+
+from anjani.util.db.errors import OperationFailure
+from anjani.util.db.memory import MemoryDatabase, apply_update, match, project
+
+DOC = {
+    "_id": 1,
+    "chat_id": -100,
+    "name": "Anjani",
+    "admins": [1, 2, 3],
+    "settings": {"lang": "en", "flood": {"limit": 5}},
+    "notes": [{"name": "rules", "count": 2}, {"name": "faq", "count": 7}],
+    "empty": None,
+}
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        ({}, True),
+        ({"chat_id": -100, "name": "Anjani"}, True),
+        ({"chat_id": -100, "name": "Other"}, False),
+        ({"settings.flood.limit": 5}, True),
+        ({"admins": 2}, True),
+        ({"admins": [1, 2, 3]}, True),
+        ({"admins.1": 2}, True),
+        ({"notes.name": "faq"}, True),
+        ({"admins": {"$in": [9, 3]}}, True),
+        ({"admins": {"$nin": [3]}}, False),
+        ({"admins": {"$all": [1, 3]}, "admins.0": {"$gte": 1, "$lt": 2}}, True),
+        ({"admins": {"$size": 3}}, True),
+        ({"missing": None, "empty": None}, True),
+        ({"missing": {"$exists": False}, "empty": {"$exists": True}}, True),
+        ({"name": {"$ne": "Anjani"}}, False),
+        ({"missing": {"$ne": 1}}, True),
+        ({"notes": {"$elemMatch": {"name": "faq", "count": {"$gt": 5}}}}, True),
+        ({"notes": {"$elemMatch": {"name": "rules", "count": {"$gt": 5}}}}, False),
+        ({"name": {"$regex": "^anj", "$options": "i"}}, True),
+        ({"name": re.compile("jan")}, True),
+        ({"name": {"$not": {"$regex": "jan"}}}, False),
+        ({"$or": [{"chat_id": 1}, {"settings.lang": "en"}]}, True),
+        ({"$and": [{"chat_id": -100}, {"admins": 9}]}, False),
+        ({"$nor": [{"chat_id": 1}]}, True),
+    ],
+)
+def test_match(query, expected):
+    assert match(DOC, query) is expected
+
+
+def test_match_unknown_operator():
+    with pytest.raises(OperationFailure):
+        match(DOC, {"name": {"$where": "1"}})
+    with pytest.raises(OperationFailure):
+        match(DOC, {"$where": "1"})
+
+
+def test_apply_update_operators():
+    doc = {"_id": 1, "count": 1, "list": [1, 2], "old": "x", "low": 5, "gone": True}
+    updated, removed = apply_update(
+        doc,
+        {
+            "$set": {"a.b": 1},
+            "$unset": {"gone": ""},
+            "$inc": {"count": 2, "new": 1},
+            "$min": {"low": 3},
+            "$max": {"high": 9},
+            "$push": {"list": {"$each": [3, 4], "$slice": -3}},
+            "$addToSet": {"set": {"$each": [1, 1, 2]}},
+            "$rename": {"old": "renamed"},
+            "$setOnInsert": {"inserted": True},
+        },
+    )
+    assert doc == {
+        "_id": 1,
+        "count": 3,
+        "list": [2, 3, 4],
+        "low": 3,
+        "a": {"b": 1},
+        "new": 1,
+        "high": 9,
+        "set": [1, 2],
+        "renamed": "x",
+    }
+    assert updated["list"] == [2, 3, 4] and updated["renamed"] == "x"
+    assert sorted(removed) == ["gone", "old"]
+
+
+def test_apply_update_pull_and_pop():
+    doc = {"nums": [1, 5, 9, 5], "notes": [{"n": "a"}, {"n": "b"}], "q": [1, 2, 3]}
+    apply_update(doc, {"$pull": {"nums": 5, "notes": {"n": "a"}}, "$pop": {"q": -1}})
+    assert doc == {"nums": [1, 9], "notes": [{"n": "b"}], "q": [2, 3]}
+
+    apply_update(doc, {"$pull": {"nums": {"$gt": 3}}, "$pop": {"q": 1}})
+    assert doc == {"nums": [1], "notes": [{"n": "b"}], "q": [2]}
+
+
+def test_apply_update_unknown_modifier():
+    with pytest.raises(OperationFailure):
+        apply_update({}, {"$bit": {"a": {"and": 1}}})
+
+
+def test_project():
+    assert project(DOC, {"name": 1, "settings.lang": True}) == {
+        "_id": 1,
+        "name": "Anjani",
+        "settings": {"lang": "en"},
+    }
+    assert project(DOC, ["name"]) == {"_id": 1, "name": "Anjani"}
+    assert project(DOC, {"_id": False, "chat_id": 1}) == {"chat_id": -100}
+
+    excluded = project(DOC, {"notes": 0, "settings.flood": False, "_id": 0})
+    assert "notes" not in excluded and "_id" not in excluded
+    assert excluded["settings"] == {"lang": "en"}
+
+    # Always a copy
+    copy = project(DOC, None)
+    copy["admins"].append(4)
+    assert DOC["admins"] == [1, 2, 3]
+
+
+@pytest.mark.asyncio
+async def test_upsert_seed():
+    collection = MemoryDatabase().get_collection("FEDERATIONS")
+    result = await collection.update_one(
+        {"$and": [{"chat_id": -100}, {"owner": {"$eq": 1}}], "admins": {"$in": [1]}},
+        {"$set": {"name": "fed"}, "$setOnInsert": {"banned": {}}},
+        upsert=True,
+    )
+    assert result.upserted_id is not None
+
+    doc = await collection.find_one({"chat_id": -100}, {"_id": False})
+    # Operators other than $eq don't seed the document
+    assert doc == {"chat_id": -100, "owner": 1, "name": "fed", "banned": {}}
+
+    # Matched now, $setOnInsert is left alone
+    await collection.update_one(
+        {"chat_id": -100}, {"$setOnInsert": {"banned": {"1": True}}}, upsert=True
+    )
+    assert (await collection.find_one({"chat_id": -100}))["banned"] == {}
+
+    with pytest.raises(ValueError):
+        await collection.update_one({"chat_id": -100}, {"name": "replaced"})
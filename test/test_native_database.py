@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+# Copyright (C) 2020 - 2023  UserbotIndo Team, <https://github.com/userbotindo.git>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import pytest
+
+from anjani.util.db import native
+from anjani.util.db.cursor_base import set_default_batch_size
+
+
+class StubCursor:
+    """Cursor of pymongo's asyncio client over a list"""
+
+    def __init__(self, docs):
+        self.docs = list(docs)
+        self.options = []
+        self.closed = False
+        self.resume_token = None
+
+    def __getattr__(self, name):
+        if name in {"batch_size", "limit", "skip", "sort"}:
+            return lambda *args, **kwargs: self.options.append((name, args))
+
+        raise AttributeError(name)
+
+    async def next(self):
+        if not self.docs:
+            raise StopAsyncIteration
+
+        doc = self.docs.pop(0)
+        self.resume_token = {"_data": doc["_id"]}
+        return doc
+
+    async def to_list(self, length=None):
+        result, self.docs = self.docs[:length], self.docs[length:] if length else []
+        return result
+
+    async def close(self):
+        self.closed = True
+
+
+class StubCollection:
+    def __init__(self, docs):
+        self.name = "NOTES"
+        self.docs = docs
+        self.calls = []
+
+    def find(self, *args, **kwargs):
+        self.calls.append(("find", kwargs))
+        return StubCursor(self.docs)
+
+    async def aggregate(self, pipeline, **kwargs):
+        self.calls.append(("aggregate", kwargs))
+        return StubCursor(self.docs)
+
+    async def watch(self, *args, **kwargs):
+        self.calls.append(("watch", kwargs))
+        return StubCursor(self.docs)
+
+    async def find_one(self, query):
+        return self.docs[0]
+
+
+class StubDatabase:
+    name = "AnjaniBot"
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def get_collection(self, name, **kwargs):
+        return self.collection
+
+
+class StubClient:
+    def __init__(self, *args, **kwargs):
+        self.closed = False
+        self.database = StubDatabase(StubCollection([{"_id": i} for i in range(5)]))
+
+    def get_database(self, name=None, **kwargs):
+        return self.database
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(native, "AsyncMongoClient", StubClient)
+    set_default_batch_size(2)
+    yield native.NativeClient("mongodb://stub")
+    set_default_batch_size(0)
+
+
+@pytest.mark.asyncio
+async def test_find(client):
+    collection = client.get_database("AnjaniBot").get_collection("NOTES")
+    cursor = collection.find({}).sort("_id", -1).limit(4)
+    assert cursor.dispatch.options == [("sort", ("_id", -1)), ("limit", (4,))]
+    assert collection.dispatch.calls == [("find", {"batch_size": 2})]
+
+    assert [batch async for batch in cursor.batches()] == [
+        [{"_id": 0}, {"_id": 1}],
+        [{"_id": 2}, {"_id": 3}],
+        [{"_id": 4}],
+    ]
+    assert await collection.find_one({}) == {"_id": 0}
+
+
+@pytest.mark.asyncio
+async def test_lazy_cursor_options(client):
+    collection = client["AnjaniBot"]["NOTES"]
+    cursor = collection.aggregate([{"$match": {}}]).batch_size(3)
+    # Nothing runs until the cursor is read
+    assert collection.dispatch.calls == []
+
+    assert len(await cursor.to_list()) == 5
+    assert collection.dispatch.calls == [("aggregate", {"batchSize": 2})]
+    assert cursor.dispatch.options == [("batch_size", (3,))]
+
+
+@pytest.mark.asyncio
+async def test_watch(client):
+    db = client.get_database("AnjaniBot")
+    async with db.get_collection("NOTES").watch([], resume_after=None) as stream:
+        assert stream.resume_token is None
+        assert await stream.next() == {"_id": 0}
+        assert stream.resume_token == {"_data": 0}
+
+    assert stream.dispatch.closed
+
+    await db.close()
+    assert client.dispatch.closed
+
+
+def test_unavailable(monkeypatch):
+    monkeypatch.setattr(native, "AsyncMongoClient", None)
+    assert not native.available()
+    with pytest.raises(RuntimeError):
+        native.NativeClient("mongodb://stub")
@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+# Copyright (C) 2020 - 2023  UserbotIndo Team, <https://github.com/userbotindo.git>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from types import SimpleNamespace
+
+from anjani.core.query_monitor import QueryMonitor
+
+
+def _run(monitor: QueryMonitor, request_id: int, command: dict, duration: float) -> None:
+    name = next(iter(command))
+    monitor.started(
+        SimpleNamespace(  # type: ignore
+            command_name=name, command=command, connection_id=("db", 1), request_id=request_id
+        )
+    )
+    monitor.succeeded(
+        SimpleNamespace(  # type: ignore
+            connection_id=("db", 1), request_id=request_id, duration_micros=int(duration * 1e6)
+        )
+    )
+
+
+def test_slow_find_logged(caplog):
+    monitor = QueryMonitor(slow_threshold=0.1)
+    _run(monitor, 1, {"find": "NOTES", "filter": {"chat_id": 1}}, 0.2)
+
+    [(key, stats)] = monitor.slowest()
+    assert key == ("NOTES", "find", '{"chat_id":"?"}')
+    assert stats.count == 1
+    assert "Slow find on 'NOTES'" in caplog.text
+
+
+def test_awaiting_get_more_ignored(caplog):
+    monitor = QueryMonitor(slow_threshold=0.1)
+    # Idle change stream of the database, then one of a collection
+    _run(monitor, 1, {"getMore": 1, "collection": "$cmd.aggregate", "maxTimeMS": 1000}, 1)
+    _run(monitor, 2, {"getMore": 1, "collection": "CHATS", "maxTimeMS": 1000}, 1)
+    assert not monitor.slowest()
+    assert not caplog.text
+
+    # A plain cursor batch is still timed
+    _run(monitor, 3, {"getMore": 1, "collection": "CHATS", "batchSize": 100}, 0.01)
+    assert [key for key, _ in monitor.slowest()] == [("CHATS", "getMore", "")]
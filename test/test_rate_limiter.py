@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+# Copyright (C) 2020 - 2023  UserbotIndo Team, <https://github.com/userbotindo.git>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from types import SimpleNamespace
+
+import pytest
+from pyrogram.enums.chat_type import ChatType
+
+from anjani import filters
+from anjani.core.command_dispatcher import CommandDispatcher
+from anjani.util.rate_limiter import RateLimiter, TokenBucketScope
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def new_limiter(clock: Clock) -> RateLimiter:
+    return RateLimiter(
+        user=TokenBucketScope(1, 3),
+        chat=TokenBucketScope(1, 5),
+        all=TokenBucketScope(10, 8, maxsize=1),
+        clock=clock,
+    )
+
+
+def test_user_burst_and_refill():
+    clock = Clock()
+    limiter = new_limiter(clock)
+    assert all(limiter.allow(1) for _ in range(3))
+    assert not limiter.allow(1)
+
+    clock.now += 1
+    assert limiter.allow(1)
+    assert not limiter.allow(1)
+
+
+def test_user_isolated():
+    clock = Clock()
+    limiter = new_limiter(clock)
+    assert all(limiter.allow(1) for _ in range(3))
+    assert not limiter.allow(1)
+    assert limiter.allow(2)
+
+
+def test_chat_bucket():
+    clock = Clock()
+    limiter = new_limiter(clock)
+    assert all(limiter.allow(user, -100) for user in range(5))
+    assert not limiter.allow(6, -100)
+    assert limiter.allow(6, -200)
+
+
+def test_private_chat_only_use_user_bucket():
+    clock = Clock()
+    limiter = new_limiter(clock)
+    assert all(limiter.allow(1, 1) for _ in range(3))
+    assert len(limiter.chat) == 0
+
+
+def test_denied_call_takes_no_token():
+    clock = Clock()
+    limiter = new_limiter(clock)
+    assert all(limiter.allow(user, -100) for user in range(5))
+    # Denied by the chat bucket, user 10 still has their whole burst elsewhere
+    assert not limiter.allow(10, -100)
+    assert all(limiter.allow(10, -200) for _ in range(3))
+
+
+def test_global_bucket():
+    clock = Clock()
+    limiter = new_limiter(clock)
+    assert all(limiter.allow(user) for user in range(8))
+    assert not limiter.allow(9)
+
+    clock.now += 0.1
+    assert limiter.allow(9)
+
+
+def test_split_buckets():
+    clock = Clock()
+    limiter = new_limiter(clock)
+    # The chat and global buckets are left alone by allow_user
+    assert all(limiter.allow_user(1) for _ in range(3))
+    assert not limiter.allow_user(1)
+    assert all(limiter.allow_chat(1, -100) for _ in range(5))
+    assert not limiter.allow_chat(2, -100)
+    assert limiter.allow_user(2)
+
+
+def test_is_privileged():
+    assert filters.is_privileged(filters.admin_only)
+    assert filters.is_privileged(filters.group & filters.can_restrict)
+    assert filters.is_privileged(filters.staff_only | filters.owner_only)
+    assert not filters.is_privileged(filters.admin_only | filters.private)
+    assert not filters.is_privileged(~filters.admin_only)
+    assert not filters.is_privileged(None)
+
+
+def _message(user_id: int, text: str) -> SimpleNamespace:
+    return SimpleNamespace(
+        via_bot=None,
+        chat=SimpleNamespace(id=-100, type=ChatType.SUPERGROUP),
+        sender_chat=None,
+        forward_from_chat=None,
+        from_user=SimpleNamespace(id=user_id),
+        text=text,
+    )
+
+
+@pytest.mark.asyncio
+async def test_spammer_does_not_starve_admins():
+    async def admin(_, __, message) -> bool:
+        return message.from_user.id == 1
+
+    admin_only = filters.create(admin, "admin_only")
+    bot = SimpleNamespace(
+        commands={
+            "id": SimpleNamespace(filters=None, privileged=False),
+            "ban": SimpleNamespace(
+                filters=admin_only, privileged=filters.is_privileged(admin_only)
+            ),
+        },
+        user=SimpleNamespace(username="anjani"),
+        staff=set(),
+        _limiter=RateLimiter(
+            user=TokenBucketScope(1, 100),
+            chat=TokenBucketScope(1, 5),
+            all=TokenBucketScope(100, 100, maxsize=1),
+            clock=Clock(),
+        ),
+    )
+    predicate = CommandDispatcher.command_predicate(bot)  # type: ignore
+
+    # A single member drains the chat bucket
+    results = [await predicate(None, _message(2, "/id")) for _ in range(10)]
+    assert results.count(True) == 5
+    assert not await predicate(None, _message(3, "/id"))
+
+    # Moderation still goes through
+    assert await predicate(None, _message(1, "/ban 2"))
+    # Rejected by the filters, so it doesn't count either
+    assert not await predicate(None, _message(2, "/ban 1"))
+
+
+def test_eviction():
+    clock = Clock()
+    scope = TokenBucketScope(1, 2, maxsize=3)
+    for key in range(3):
+        scope.refill(key, clock())
+    assert len(scope) == 3
+
+    # Evicted by size
+    scope.refill(3, clock())
+    assert len(scope) == 3
+
+    # Evicted once refilled
+    clock.now += 2
+    scope.refill(4, clock())
+    assert len(scope) == 1
+
+
+def test_invalid_scope():
+    with pytest.raises(ValueError):
+        TokenBucketScope(0, 1)
@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+# Copyright (C) 2020 - 2023  UserbotIndo Team, <https://github.com/userbotindo.git>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import asyncio
+import random
+
+import pytest
+from pyrogram.enums import ChatType
+from pyrogram.types import Chat, Message
+
+from anjani.core.sharded_dispatcher import ShardedDispatcher
+
+
+def message(chat_id: int, message_id: int) -> Message:
+    return Message(id=message_id, chat=Chat(id=chat_id, type=ChatType.SUPERGROUP))
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.handled = []
+        self.release = asyncio.Event()
+
+    async def handle(self, item) -> None:
+        await self.release.wait()
+        self.handled.append(item)
+
+
+@pytest.mark.asyncio
+async def test_same_chat_order():
+    handled = {}
+
+    async def handle(update: Message) -> None:
+        await asyncio.sleep(random.random() / 1000)
+        handled.setdefault(update.chat.id, []).append(update.id)
+
+    shards = ShardedDispatcher(4, maxsize=5, overflow="block")
+    shards.start()
+    for message_id in range(30):
+        for chat_id in range(-100, -90):
+            await shards.submit(message(chat_id, message_id), handle, message(chat_id, message_id))
+    await shards.join()
+    await shards.stop()
+
+    assert handled == {chat_id: list(range(30)) for chat_id in range(-100, -90)}
+
+
+@pytest.mark.asyncio
+async def test_block():
+    recorder = Recorder()
+    shards = ShardedDispatcher(1, maxsize=1, overflow="block")
+    shards.start()
+    await shards.submit(None, recorder.handle, 1)
+    await asyncio.sleep(0)  # Taken by the worker
+    await shards.submit(None, recorder.handle, 2)
+
+    blocked = asyncio.ensure_future(shards.submit(None, recorder.handle, 3))
+    await asyncio.sleep(0.05)
+    assert not blocked.done()
+
+    recorder.release.set()
+    await asyncio.wait_for(blocked, 1)
+    await shards.join()
+    await shards.stop()
+    assert recorder.handled == [1, 2, 3]
+
+
+@pytest.mark.asyncio
+async def test_drop():
+    recorder = Recorder()
+    shards = ShardedDispatcher(1, maxsize=1, overflow="drop")
+    shards.start()
+    await shards.submit(None, recorder.handle, 1)
+    await asyncio.sleep(0)
+    for item in range(2, 5):
+        await shards.submit(None, recorder.handle, item)
+    assert shards.depth == 1
+
+    recorder.release.set()
+    await shards.join()
+    await shards.stop()
+    assert recorder.handled == [1, 2]
+
+
+@pytest.mark.asyncio
+async def test_spill():
+    recorder = Recorder()
+    shards = ShardedDispatcher(1, maxsize=1, overflow="spill")
+    shards.start()
+    await shards.submit(None, recorder.handle, 0)
+    await asyncio.sleep(0)
+    for item in range(1, 10):
+        await shards.submit(None, recorder.handle, item)
+    assert shards.depth == 9
+
+    recorder.release.set()
+    await shards.join()
+    await shards.stop()
+    assert recorder.handled == list(range(10))
+
+
+@pytest.mark.asyncio
+async def test_stop_drains_queued_updates():
+    handled = []
+
+    async def handle(item: int) -> None:
+        await asyncio.sleep(0.001)
+        handled.append(item)
+
+    shards = ShardedDispatcher(2, maxsize=2, overflow="spill")
+    shards.start()
+    for item in range(20):
+        await shards.submit(message(item % 3, item), handle, item)
+    await shards.stop(1)
+
+    assert sorted(handled) == list(range(20))
+
+
+@pytest.mark.asyncio
+async def test_stop_gives_up_after_timeout():
+    recorder = Recorder()
+    shards = ShardedDispatcher(1, maxsize=1, overflow="spill")
+    shards.start()
+    for item in range(3):
+        await shards.submit(None, recorder.handle, item)
+
+    await asyncio.wait_for(shards.stop(0.05), 1)
+    assert recorder.handled == []
+    assert not shards._workers
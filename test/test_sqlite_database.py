@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+# Copyright (C) 2020 - 2023  UserbotIndo Team, <https://github.com/userbotindo.git>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from datetime import datetime
+
+import pytest
+from pymongo.operations import DeleteOne, UpdateOne
+
+from anjani.util.db.sqlite import SQLiteDatabase
+
+
+@pytest.mark.asyncio
+async def test_update_operators_persist(tmp_path):
+    path = str(tmp_path / "anjani.db")
+    db = SQLiteDatabase(path)
+    collection = db.get_collection("FEDERATIONS")
+    await collection.update_one(
+        {"chat_id": -100},
+        {"$set": {"name": "fed", "time": datetime(2020, 1, 1)}, "$push": {"admins": 1}},
+        upsert=True,
+    )
+    await collection.update_one(
+        {"chat_id": -100},
+        {"$addToSet": {"admins": 2}, "$inc": {"count": 3}, "$unset": {"name": ""}},
+    )
+    await collection.update_one({"chat_id": -100}, {"$pull": {"admins": 1}})
+    await db.close()
+
+    db = SQLiteDatabase(path)
+    doc = await db.get_collection("FEDERATIONS").find_one({"chat_id": -100}, {"_id": False})
+    assert doc == {"chat_id": -100, "time": datetime(2020, 1, 1), "admins": [2], "count": 3}
+    assert await db.list_collection_names() == ["FEDERATIONS"]
+    await db.close()
+
+
+@pytest.mark.asyncio
+async def test_queries():
+    db = SQLiteDatabase(":memory:")
+    collection = db.get_collection("NOTES")
+    await collection.insert_many([{"chat_id": i % 3, "n": i} for i in range(9)])
+
+    assert await collection.count_documents({"chat_id": 1}) == 3
+    assert await collection.count_documents({"n": {"$gte": 5}}) == 4
+    docs = await collection.find({"chat_id": 2}).sort("n", -1).to_list()
+    assert [doc["n"] for doc in docs] == [8, 5, 2]
+
+    await collection.bulk_write([UpdateOne({"n": 0}, {"$set": {"n": 10}}), DeleteOne({"n": 1})])
+    assert (await collection.delete_many({"chat_id": 0})).deleted_count == 3
+    assert [doc["n"] for doc in await collection.find().to_list()] == [2, 4, 5, 7, 8]
+    await db.close()
+
+
+@pytest.mark.asyncio
+async def test_watch():
+    db = SQLiteDatabase(":memory:")
+    collection = db.get_collection("RULES")
+    async with collection.watch([{"$match": {"operationType": "update"}}]) as stream:
+        await collection.insert_one({"chat_id": 1})
+        await collection.update_one({"chat_id": 1}, {"$set": {"rules": "be nice"}})
+        change = await stream.next()
+
+    assert change["operationType"] == "update"
+    assert change["updateDescription"]["updatedFields"] == {"rules": "be nice"}
+    await db.close()